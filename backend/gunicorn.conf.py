@@ -0,0 +1,35 @@
+"""
+Gunicorn config for running the API with several worker processes.
+
+    gunicorn -c gunicorn.conf.py
+
+preload_app imports app.py once in the master, so config validation, the
+compiled LangGraph agent and the SQLite schemas are set up a single time
+and shared copy-on-write by every forked worker. Workers share LLM slots,
+upstream rate limits, in-flight research and metrics through
+src/core/coordinator.py.
+"""
+
+import os
+import multiprocessing
+
+# Must be set before the app (and config) is imported
+os.environ.setdefault("DRAFTLY_MULTI_WORKER", "true")
+
+wsgi_app = "app:app"
+pythonpath = "src"
+bind = os.getenv("DRAFTLY_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count(), 4))))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+graceful_timeout = 30
+
+
+def child_exit(server, worker):
+    """Release whatever an exited worker held (LLM leases, in-flight claims)
+    and drop its metrics, instead of waiting for them to expire."""
+    from core.coordinator import get_coordinator
+    try:
+        get_coordinator().forget_worker(worker.pid)
+    except Exception as e:
+        server.log.warning(f"Failed to clear coordinator state for worker {worker.pid}: {e}")
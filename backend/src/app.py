@@ -4,20 +4,42 @@ Exposes blog generation endpoint.
 """
 
 import os
+import re
 import sys
+import uuid
+import time
+import asyncio
+import hashlib
+import secrets
+import logging
 sys.path.insert(0, os.path.dirname(__file__))
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
 
-from config import load_config, validate_config, PLATFORM_CONFIGS
-from core.blog_agent import create_blog_agent
-from utils.helpers import setup_logging
+from config import (load_config, validate_config, PLATFORM_CONFIGS, GENERATION_PROFILES, DEFAULT_PROFILE,
+                    SystemConfig)
+from core.blog_agent import (create_blog_agent, create_variants_agent, create_initial_state, run_agent,
+                             generate_variants)
+from core.deadline import DeadlineExceeded, cancel as cancel_run, clear as clear_cancelled
+from core.translator import translate_blog
+from core.scheduler import AdmissionScheduler, SchedulerFull, ClientGone
+from core.model_selector import model_stats
+from core.coordinator import get_coordinator
+from utils.helpers import setup_logging, run_id_var, request_id_var
+from utils.metrics import metrics, merge_snapshots
+from utils.blog_store import BlogStore
+from utils import profiler
+from utils.exporter import Exporter, ExportUnavailable, FORMATS as EXPORT_FORMATS
 
 # Initialize logging
 setup_logging()
+logger = logging.getLogger(__name__)
 
 # Validate config on startup
 api_config, _, _, _ = load_config()
@@ -27,6 +49,10 @@ if not valid:
 
 # Initialize agent once (singleton)
 agent = create_blog_agent()
+variants_agent = create_variants_agent()
+blog_store = BlogStore()
+scheduler = AdmissionScheduler()
+exporter = Exporter()
 
 app = FastAPI(
     title="Blog Writing Agent API",
@@ -41,6 +67,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 
 # ---------------- Request Schema ----------------
@@ -48,15 +75,65 @@ app.add_middleware(
 class BlogRequest(BaseModel):
     topic: str
     platform: Optional[str] = "generic"
+    profile: Optional[str] = DEFAULT_PROFILE
+    enable_research: Optional[bool] = False
+    max_tokens_budget: Optional[int] = Field(default=None, gt=0)
+    max_cost: Optional[float] = Field(default=None, gt=0)
+    # End-to-end deadline; the X-Draftly-Deadline header (seconds) also works
+    deadline_seconds: Optional[float] = Field(default=None, gt=0)
+    # Also translate the finished blog into these languages
+    languages: Optional[List[str]] = None
+    # "interactive" (default) or "batch"; the X-Draftly-Priority header also works
+    priority: Optional[str] = None
+
+
+class TranslationResponse(BaseModel):
+    id: Optional[int] = None
+    language: str
+    content: str
+    partial: bool = False
+    untranslated_sections: List[int] = []
 
 
 class BlogResponse(BaseModel):
+    id: Optional[int] = None
     title: str
     content: str
     word_count: int
     sections: int
     platform: str
     topic: str
+    profile: str
+    partial: bool = False
+    usage: dict = {}
+    translations: Dict[str, TranslationResponse] = {}
+    metadata: dict
+
+
+class TranslateRequest(BaseModel):
+    languages: List[str] = Field(min_length=1)
+
+
+class VariantsRequest(BaseModel):
+    topic: str
+    platforms: List[str] = Field(min_length=1)
+    profile: Optional[str] = DEFAULT_PROFILE
+    enable_research: Optional[bool] = False
+    max_tokens_budget: Optional[int] = Field(default=None, gt=0)
+    max_cost: Optional[float] = Field(default=None, gt=0)
+    deadline_seconds: Optional[float] = Field(default=None, gt=0)
+    priority: Optional[str] = None
+    # Also translate every variant into these languages
+    languages: Optional[List[str]] = None
+
+
+class VariantsResponse(BaseModel):
+    topic: str
+    profile: str
+    partial: bool = False
+    usage: dict = {}
+    variants: Dict[str, BlogResponse]
+    metadata: dict
 
 
 # ---------------- Health Check ----------------
@@ -66,10 +143,224 @@ def health_check():
     return {"status": "ok"}
 
 
+# ---------------- Metrics ----------------
+
+def _local_metrics() -> dict:
+    return {**metrics.snapshot(), "models": model_stats.snapshot(), "scheduler": scheduler.snapshot()}
+
+
+def _worker_metrics(local: dict) -> Dict[int, dict]:
+    """Publish this worker's snapshot, then read every live worker's."""
+    coordinator = get_coordinator()
+    coordinator.publish_metrics(local)
+    return coordinator.worker_metrics(max_age=SystemConfig.METRICS_PUBLISH_SECONDS * 3)
+
+
+async def _publish_metrics_forever():
+    while True:
+        await asyncio.sleep(SystemConfig.METRICS_PUBLISH_SECONDS)
+        # Snapshot on the event loop (the scheduler is not thread-safe), write off it
+        local = _local_metrics()
+        try:
+            await run_in_threadpool(get_coordinator().publish_metrics, local)
+        except Exception as e:
+            logger.warning(f"Failed to publish worker metrics: {e}")
+
+
+_metrics_publisher: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def _start_metrics_publisher():
+    global _metrics_publisher
+    if SystemConfig.MULTI_WORKER:
+        _metrics_publisher = asyncio.create_task(_publish_metrics_forever())
+
+
+@app.get("/metrics")
+async def get_metrics():
+    local = _local_metrics()
+    if not SystemConfig.MULTI_WORKER:
+        return local
+
+    # One scrape covers every worker: counters and timings are summed, while
+    # model stats and the admission queue are reported per worker
+    workers = await run_in_threadpool(_worker_metrics, local)
+    return {
+        **merge_snapshots(workers.values()),
+        "workers": {
+            pid: {"models": snap.get("models", {}), "scheduler": snap.get("scheduler", {})}
+            for pid, snap in sorted(workers.items())
+        },
+    }
+
+
 # ---------------- Generate Blog ----------------
 
+def _request_deadline(request, http_request: Request) -> Optional[float]:
+    """Tightest of the body field and the X-Draftly-Deadline header."""
+    candidates = [request.deadline_seconds] if request.deadline_seconds else []
+    header = http_request.headers.get("x-draftly-deadline")
+    if header:
+        try:
+            seconds = float(header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="X-Draftly-Deadline must be a number of seconds.")
+        if seconds <= 0:
+            raise HTTPException(status_code=400, detail="X-Draftly-Deadline must be positive.")
+        candidates.append(seconds)
+    return min(candidates) if candidates else None
+
+
+def _profile_name(profile: Optional[str]) -> str:
+    profile = (profile or DEFAULT_PROFILE).lower()
+    return profile if profile in GENERATION_PROFILES else DEFAULT_PROFILE
+
+
+def _save_translations(source_id: int, metadata: dict, translations: dict) -> Dict[str, TranslationResponse]:
+    """Store each translated variant in history, linked to its source blog."""
+    saved = {}
+    for language, translation in translations.items():
+        blog_id = blog_store.save(translation["content"], {
+            **{k: v for k, v in metadata.items() if k != "translations"},
+            "language": language,
+            "source_blog_id": source_id,
+            "partial": metadata.get("partial", False) or translation["partial"],
+        })
+        saved[language] = TranslationResponse(id=blog_id, language=language, **translation)
+    return saved
+
+
+def _blog_response(blog_id: int, content: str, metadata: dict,
+                   translations: Optional[Dict[str, TranslationResponse]] = None) -> BlogResponse:
+    return BlogResponse(
+        id=blog_id,
+        title=metadata["title"],
+        content=content,
+        word_count=metadata["word_count"],
+        sections=metadata["sections"],
+        platform=metadata["platform"],
+        topic=metadata["topic"],
+        profile=metadata["profile"],
+        partial=metadata.get("partial", False),
+        usage=metadata.get("usage", {}),
+        translations=translations or {},
+        metadata=metadata
+    )
+
+
+def _client_id(http_request: Request) -> str:
+    """Fair-queuing key: API key (hashed), X-Client-ID, else the peer address."""
+    api_key = http_request.headers.get("x-api-key")
+    if api_key:
+        return f"key:{hashlib.sha256(api_key.encode()).hexdigest()[:12]}"
+    client = http_request.headers.get("x-client-id")
+    if client:
+        return f"client:{client[:64]}"
+    return f"ip:{http_request.client.host if http_request.client else 'unknown'}"
+
+
+def _priority(http_request: Request, requested: Optional[str] = None) -> str:
+    """Priority class from the client's configured class (CLIENT_PRIORITIES,
+    else DEFAULT_PRIORITY). The priority field or X-Draftly-Priority header
+    can only lower it to batch."""
+    assigned = SystemConfig.CLIENT_PRIORITIES.get(_client_id(http_request), SystemConfig.DEFAULT_PRIORITY)
+    requested = (http_request.headers.get("x-draftly-priority") or requested or "").lower()
+    return "batch" if requested == "batch" else assigned
+
+
+async def _run_cancellable(http_request: Request, run_id: str, priority: str,
+                           deadline: Optional[float], fn, *args):
+    """Admit the run through the scheduler, then run blocking generation in
+    the threadpool, cancelling the run if the client disconnects so pending
+    sections are skipped."""
+    try:
+        ticket = await scheduler.acquire(
+            _client_id(http_request),
+            priority,
+            timeout=None if deadline is None else deadline - time.time(),
+            is_disconnected=http_request.is_disconnected
+        )
+    except SchedulerFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Deadline passed while queued.")
+    except ClientGone:
+        logger.info(f"Client left the queue, dropping run {run_id}")
+        return Response(status_code=499)
+
+    work = asyncio.ensure_future(run_in_threadpool(fn, *args))
+    try:
+        while True:
+            done, _ = await asyncio.wait({work}, timeout=SystemConfig.DISCONNECT_POLL_SECONDS)
+            if done:
+                break
+            if await http_request.is_disconnected():
+                logger.warning(f"Client disconnected, cancelling run {run_id}")
+                cancel_run(run_id)
+                await asyncio.wait({work})
+                break
+
+        return work.result()
+
+    except HTTPException:
+        raise
+    except DeadlineExceeded as e:
+        logger.warning(f"Blog generation missed its deadline: {e}")
+        raise HTTPException(status_code=504, detail=f"Deadline exceeded before a draft was ready: {e}")
+    except Exception as e:
+        logger.exception("Blog generation failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        scheduler.release(ticket)
+
+
+def _bind_run_id(http_request: Request, response: Response) -> str:
+    """Run ids key per-run usage, cancellation, evidence and profiles, so they
+    are always generated here. A client's X-Request-ID is only logged and
+    echoed back; repeating it never touches another run."""
+    run_id = uuid.uuid4().hex
+    request_id = http_request.headers.get("x-request-id", "")[:128] or run_id
+    run_id_var.set(run_id)
+    request_id_var.set(request_id)
+    response.headers["X-Request-ID"] = request_id
+    response.headers["X-Draftly-Run-ID"] = run_id
+    return run_id
+
+
+def _is_admin(http_request: Request) -> bool:
+    # No token configured means no admins, not open access
+    if not SystemConfig.ADMIN_TOKEN:
+        return False
+    return secrets.compare_digest(http_request.headers.get("x-admin-token", ""), SystemConfig.ADMIN_TOKEN)
+
+
+def _profiling_requested(http_request: Request, response: Response, run_id: str) -> bool:
+    """X-Draftly-Profile: 1 profiles this run; honoured for admins only."""
+    requested = http_request.headers.get("x-draftly-profile", "").lower() in ("1", "true", "yes")
+    if not (requested and SystemConfig.PROFILING_ENABLED and _is_admin(http_request)):
+        return False
+    response.headers["X-Draftly-Profile-ID"] = run_id
+    return True
+
+
+def _run_generation(request: BlogRequest, state: dict, profile_run: bool = False) -> BlogResponse:
+    result = run_agent(
+        agent,
+        state,
+        max_tokens_budget=request.max_tokens_budget,
+        max_cost=request.max_cost,
+        profile_run=profile_run
+    )
+
+    metadata = result["metadata"]
+    blog_id = blog_store.save(result["final_blog"], metadata)
+    translations = _save_translations(blog_id, metadata, result.get("translations") or {})
+    return _blog_response(blog_id, result["final_blog"], metadata, translations)
+
+
 @app.post("/generate-blog", response_model=BlogResponse)
-def generate_blog(request: BlogRequest):
+async def generate_blog(request: BlogRequest, http_request: Request, response: Response):
 
     if not request.topic.strip():
         raise HTTPException(status_code=400, detail="Topic cannot be empty.")
@@ -78,33 +369,188 @@ def generate_blog(request: BlogRequest):
     if platform not in PLATFORM_CONFIGS:
         platform = "generic"
 
-    try:
-        result = agent.invoke({
-            "topic": request.topic,
-            "platform": platform,
-            "needs_research": False,
-            "mode": "",
-            "queries": [],
-            "evidence": [],
-            "plan": None,
-            "sections": [],
-            "final_blog": "",
-            "md_with_placeholders": "",
-            "image_specs": [],
-            "final_images": [],
-            "metadata": {}
-        })
+    run_id = _bind_run_id(http_request, response)
+    state = create_initial_state(
+        request.topic,
+        platform,
+        profile=_profile_name(request.profile),
+        needs_research=bool(request.enable_research),
+        run_id=run_id,
+        deadline_seconds=_request_deadline(request, http_request),
+        languages=request.languages
+    )
 
-        metadata = result["metadata"]
+    return await _run_cancellable(http_request, run_id, _priority(http_request, request.priority),
+                                  state["deadline"],
+                                  _run_generation, request, state,
+                                  _profiling_requested(http_request, response, run_id))
 
-        return BlogResponse(
-            title=metadata["title"],
-            content=result["final_blog"],
-            word_count=metadata["word_count"],
-            sections=metadata["sections"],
-            platform=metadata["platform"],
-            topic=metadata["topic"]
-        )
 
+# ---------------- Multi-platform Variants ----------------
+
+def _run_variants(request: VariantsRequest, run_id: str, deadline: Optional[float],
+                  profile_run: bool = False) -> VariantsResponse:
+    profile = _profile_name(request.profile)
+    result = generate_variants(
+        request.topic,
+        [p.lower() for p in request.platforms],
+        profile=profile,
+        needs_research=bool(request.enable_research),
+        run_id=run_id,
+        max_tokens_budget=request.max_tokens_budget,
+        max_cost=request.max_cost,
+        # Time spent queued counts against the deadline
+        deadline_seconds=max(deadline - time.time(), 0.001) if deadline else None,
+        profile_run=profile_run,
+        languages=request.languages,
+        agent=variants_agent
+    )
+
+    variants = {}
+    for platform, variant in result["variants"].items():
+        blog_id = blog_store.save(variant["final_blog"], variant["metadata"])
+        translations = _save_translations(blog_id, variant["metadata"], variant["translations"])
+        variants[platform] = _blog_response(blog_id, variant["final_blog"], variant["metadata"], translations)
+
+    metadata = result["metadata"]
+    return VariantsResponse(
+        topic=request.topic,
+        profile=profile,
+        partial=metadata["partial"],
+        usage=metadata["usage"],
+        variants=variants,
+        metadata=metadata
+    )
+
+
+@app.post("/generate-variants", response_model=VariantsResponse)
+async def generate_blog_variants(request: VariantsRequest, http_request: Request, response: Response):
+
+    if not request.topic.strip():
+        raise HTTPException(status_code=400, detail="Topic cannot be empty.")
+
+    run_id = _bind_run_id(http_request, response)
+    deadline_seconds = _request_deadline(request, http_request)
+    deadline = time.time() + deadline_seconds if deadline_seconds else None
+    return await _run_cancellable(http_request, run_id, _priority(http_request, request.priority),
+                                  deadline,
+                                  _run_variants, request, run_id, deadline,
+                                  _profiling_requested(http_request, response, run_id))
+
+
+# ---------------- Blog History ----------------
+
+@app.get("/blogs")
+def list_blogs(limit: int = Query(20, ge=1, le=100),
+               cursor: Optional[int] = None,
+               platform: Optional[str] = None,
+               date_from: Optional[str] = None,
+               date_to: Optional[str] = None):
+    return blog_store.list(
+        limit=limit,
+        cursor=cursor,
+        platform=platform.lower() if platform else None,
+        date_from=date_from,
+        date_to=date_to
+    )
+
+
+@app.get("/blogs/search")
+def search_blogs(q: str = Query(..., min_length=1),
+                 limit: int = Query(20, ge=1, le=100)):
+    return {"items": blog_store.search(q, limit=limit)}
+
+
+@app.get("/blogs/{blog_id}")
+def get_blog(blog_id: int, request: Request, response: Response):
+    # Cheap hash lookup first so unchanged posts are never re-sent
+    digest = blog_store.get_hash(blog_id)
+    if digest is None:
+        raise HTTPException(status_code=404, detail="Blog not found.")
+
+    etag = f'"{digest}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return blog_store.get(blog_id)
+
+
+@app.get("/blogs/{blog_id}/export")
+async def export_blog(blog_id: int, request: Request,
+                      format: str = Query("html", pattern="^(html|pdf|docx)$")):
+    digest = await run_in_threadpool(blog_store.get_hash, blog_id)
+    if digest is None:
+        raise HTTPException(status_code=404, detail="Blog not found.")
+
+    etag = f'"{digest}-{format}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    blog = await run_in_threadpool(blog_store.get, blog_id)
+    start = time.perf_counter()
+    try:
+        path = await exporter.export(blog["content"], format, blog["title"], digest=digest)
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
     except Exception as e:
+        logger.exception("Export failed")
         raise HTTPException(status_code=500, detail=str(e))
+    metrics.observe(f"export.seconds.{format}", time.perf_counter() - start)
+
+    stem = re.sub(r"[^\w-]+", "_", blog["title"].lower()).strip("_") or f"blog_{blog_id}"
+    return FileResponse(
+        path,
+        media_type=EXPORT_FORMATS[format],
+        filename=f"{stem}.{format}",
+        headers={"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"},
+    )
+
+
+def _run_translation(blog_id: int, blog: dict, languages: List[str], run_id: str) -> dict:
+    try:
+        translations = translate_blog(blog["content"], languages)
+        return {
+            "source_id": blog_id,
+            "translations": _save_translations(blog_id, blog["metadata"], translations),
+        }
+    finally:
+        # Not a graph run, so nothing else clears a disconnect's cancellation
+        clear_cancelled(run_id)
+
+
+@app.post("/blogs/{blog_id}/translate")
+async def translate_stored_blog(blog_id: int, request: TranslateRequest, http_request: Request, response: Response):
+    blog = await run_in_threadpool(blog_store.get, blog_id)
+    if blog is None:
+        raise HTTPException(status_code=404, detail="Blog not found.")
+
+    # Translation calls the LLM per section x language, so it is admitted
+    # like a generation run
+    run_id = _bind_run_id(http_request, response)
+    return await _run_cancellable(http_request, run_id, _priority(http_request), None,
+                                  _run_translation, blog_id, blog, request.languages, run_id)
+
+
+# ---------------- Admin: Profiles ----------------
+
+@app.get("/admin/profiles")
+def list_run_profiles(http_request: Request, limit: int = Query(50, ge=1, le=500)):
+    if not _is_admin(http_request):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+    return {"items": profiler.list_profiles(limit)}
+
+
+@app.get("/admin/profiles/{run_id}")
+def get_run_profile(run_id: str, http_request: Request,
+                    format: str = Query("json", pattern="^(json|pstats)$")):
+    if not _is_admin(http_request):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+
+    path = profiler.profile_path(run_id, "json" if format == "json" else "prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    if format == "json":
+        return FileResponse(path, media_type="application/json")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
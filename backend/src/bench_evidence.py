@@ -0,0 +1,149 @@
+"""
+Draftly - Evidence representation benchmark
+
+Compares the previous representation (every worker Send payload carries the
+run's full evidence list of dicts) with the shared per-run EvidenceStore
+(payloads carry only the ids selected for their section).
+
+Reports, per run: memory held by evidence and payloads (tracemalloc), bytes
+per Send when payloads are serialized (as checkpointing or streaming does),
+and the time to build and serialize one run's Sends (for the store, that
+includes picking each section's evidence).
+
+Usage:
+    python bench_evidence.py --runs 200 --sections 8 --evidence 25
+    python bench_evidence.py --enriched
+"""
+
+import gc
+import json
+import time
+import pickle
+import random
+import argparse
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from core.evidence import EvidenceStore
+
+_WORDS = (
+    "latency throughput cache index query vector model token stream batch shard replica "
+    "schema python rust kernel memory thread async runtime compiler benchmark profile"
+).split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def make_results(rng: random.Random, count: int, enriched: bool) -> str:
+    """One run's research results as JSON, shaped like research_node output.
+    Each run parses its own copy, as it would from Tavily or the cache."""
+    results = []
+    for i in range(count):
+        item = {
+            "title": _text(rng, 8).title(),
+            "url": f"https://example{rng.randint(0, 40)}.com/{_text(rng, 4).replace(' ', '-')}/{i}",
+            "snippet": _text(rng, 45),
+        }
+        if enriched:
+            item["chunks"] = [_text(rng, 150), _text(rng, 150)]
+        results.append(item)
+    return json.dumps(results)
+
+
+def make_sections(rng: random.Random, count: int) -> List[dict]:
+    return [
+        {"id": i + 1, "title": _text(rng, 4), "goal": _text(rng, 12),
+         "bullets": [_text(rng, 6) for _ in range(3)], "target_words": 300}
+        for i in range(count)
+    ]
+
+
+def _base_payload(run_id: str, section: dict) -> dict:
+    return {"run_id": run_id, "deadline": None, "section": section, "topic": "benchmark topic",
+            "platform": "generic", "profile": "balanced", "blog_title": "Benchmark", "tone": None}
+
+
+# ---------------------------------------------------------------------
+# Representations
+# ---------------------------------------------------------------------
+
+def legacy_run(run_id: str, results: str, sections: List[dict]) -> Tuple[object, List[dict]]:
+    """Before: state holds the dict list; each payload references all of it."""
+    evidence = json.loads(results)
+    payloads = [{**_base_payload(run_id, s), "evidence": evidence} for s in sections]
+    return evidence, payloads
+
+
+def store_run(run_id: str, results: str, sections: List[dict]) -> Tuple[object, List[dict]]:
+    """After: one slotted store per run; payloads carry selected ids."""
+    store = EvidenceStore()
+    ids = store.add(json.loads(results))
+    selected = store.select_many(ids, [" ".join([s["title"], s["goal"], *s["bullets"]]) for s in sections], 3)
+    payloads = [{**_base_payload(run_id, s), "evidence": chosen} for s, chosen in zip(sections, selected)]
+    return (store, ids), payloads
+
+
+# ---------------------------------------------------------------------
+# Measurements
+# ---------------------------------------------------------------------
+
+def measure(build: Callable, runs: int, results: List[str], sections: List[dict]) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build(f"run{i}", results[i], sections) for i in range(runs)]
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    # Serialization: what each Send costs once the payload leaves the process
+    send_bytes = [len(pickle.dumps(p, protocol=pickle.HIGHEST_PROTOCOL)) for _, payloads in held for p in payloads]
+
+    start = time.perf_counter()
+    for i in range(runs):
+        _, payloads = build(f"t{i}", results[i], sections)
+        for p in payloads:
+            pickle.dumps(p, protocol=pickle.HIGHEST_PROTOCOL)
+    elapsed = time.perf_counter() - start
+
+    del held
+    return {
+        "kb_per_run": memory / runs / 1024,
+        "bytes_per_send": sum(send_bytes) / len(send_bytes),
+        "ms_per_run": elapsed / runs * 1000,
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Draftly - evidence representation benchmark")
+    parser.add_argument("--runs", type=int, default=200, help="Concurrent runs held in memory")
+    parser.add_argument("--sections", type=int, default=8, help="Sections (Sends) per run")
+    parser.add_argument("--evidence", type=int, default=25, help="Evidence items per run")
+    parser.add_argument("--enriched", action="store_true", help="Items carry full-page chunks")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    rng = random.Random(args.seed)
+    results = [make_results(rng, args.evidence, args.enriched) for _ in range(args.runs)]
+    sections = make_sections(rng, args.sections)
+
+    print(f"{args.runs} runs x {args.sections} sections, {args.evidence} evidence items"
+          f"{' (enriched)' if args.enriched else ''}")
+    rows = {"before (dict list per Send)": measure(legacy_run, args.runs, results, sections),
+            "after (store + ids)": measure(store_run, args.runs, results, sections)}
+    for name, row in rows.items():
+        print(f"  {name:<28} {row['kb_per_run']:>8.1f} KB/run  {row['bytes_per_send']:>9.0f} B/Send"
+              f"  {row['ms_per_run']:>7.2f} ms/run (build + serialize)")
+
+    before, after = rows.values()
+    print(f"  Serialized Send: {before['bytes_per_send'] / after['bytes_per_send']:.1f}x smaller | "
+          f"memory per run: {after['kb_per_run'] - before['kb_per_run']:+.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
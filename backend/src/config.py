@@ -10,6 +10,7 @@ Centralized configuration for:
 """
 
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -26,6 +27,7 @@ class APIConfig:
     OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
 
     TAVILY_API_KEY: str = os.getenv("TAVILY_API_KEY", "")
+    TAVILY_BASE_URL: str = "https://api.tavily.com"
 
     @classmethod
     def validate(cls) -> tuple[bool, str]:
@@ -49,19 +51,68 @@ class ModelConfig:
     # Quality tasks (Planning, Writing) - Gemini for better output
     PLANNER_MODEL: str = "google/gemini-2.0-flash-001"
     WRITER_MODEL: str = "google/gemini-2.0-flash-001"
+    TRANSLATION_MODEL: str = "google/gemini-2.0-flash-001"
     
     # Fallback model for all tasks
     BACKUP_MODEL: str = "google/gemini-2.0-flash-001"
 
+    # Profile-specific models (see GENERATION_PROFILES)
+    FAST_MODEL: str = "google/gemini-2.0-flash-lite-001"
+    QUALITY_WRITER_MODEL: str = "google/gemini-2.5-flash"
+
+    # Adaptive per-task selection (core/model_selector.py)
+    ADAPTIVE_SELECTION: bool = os.getenv("DRAFTLY_ADAPTIVE_MODELS", "false").lower() == "true"
+    TASK_CANDIDATES: dict = {
+        "router": [ROUTER_MODEL, FAST_MODEL],
+        "planner": [PLANNER_MODEL, ROUTER_MODEL],
+        "writer": [WRITER_MODEL, ROUTER_MODEL],
+        "quality": [ROUTER_MODEL, FAST_MODEL],
+    }
+    # p90 latency target per call, in seconds
+    LATENCY_SLO_SECONDS: dict = {
+        "router": 3.0,
+        "planner": 10.0,
+        "writer": 20.0,
+        "quality": 5.0,
+    }
+    MAX_ERROR_RATE: float = 0.2
+    STATS_WINDOW: int = 50
+
+    # Cached prompt tokens are billed at this fraction of the prompt price
+    CACHED_PROMPT_DISCOUNT: float = 0.25
+
+    # USD per 1M tokens: (prompt, completion)
+    MODEL_PRICES: dict = {
+        "google/gemini-2.0-flash-001": (0.10, 0.40),
+        "google/gemini-2.0-flash-lite-001": (0.075, 0.30),
+        "google/gemini-2.5-flash": (0.30, 2.50),
+        "meta-llama/llama-3.3-70b-instruct": (0.13, 0.40),
+    }
+
     TEMPERATURE: float = 0.7
     MAX_TOKENS: int = 4096
 
+    # Per-attempt HTTP timeout, capped by the run's remaining deadline
+    REQUEST_TIMEOUT: float = 60.0
+    MAX_ATTEMPTS: int = 3
+    # An attempt is not started (or retried) with less time than this left
+    MIN_ATTEMPT_SECONDS: float = 2.0
+
+    # Targeted re-asks when structured output fails to parse/validate
+    STRUCTURED_REPAIR_ATTEMPTS: int = 1
+
     @classmethod
     def validate(cls) -> tuple[bool, str]:
         if not (0 <= cls.TEMPERATURE <= 2):
             return False, "TEMPERATURE must be between 0 and 2."
         if cls.MAX_TOKENS <= 0:
             return False, "MAX_TOKENS must be positive."
+        if cls.STRUCTURED_REPAIR_ATTEMPTS < 0:
+            return False, "STRUCTURED_REPAIR_ATTEMPTS cannot be negative."
+        if not (0 <= cls.MAX_ERROR_RATE <= 1):
+            return False, "MAX_ERROR_RATE must be between 0 and 1."
+        if cls.REQUEST_TIMEOUT <= 0 or cls.MAX_ATTEMPTS <= 0:
+            return False, "REQUEST_TIMEOUT and MAX_ATTEMPTS must be positive."
         return True, "Model configuration valid."
 
 
@@ -78,10 +129,55 @@ class BlogConfig:
     MAX_SECTIONS: int = 9
     MIN_QUALITY_SCORE: int = 7
     MAX_RETRIES: int = 2
+    ENABLE_QUALITY_CHECK: bool = True
+
+    # Budget planning estimates (per section)
+    SECTION_PROMPT_TOKENS: int = 900
+    TOKENS_PER_WORD: float = 1.35
+    MIN_SECTION_WORDS: int = 150
 
     # Research limits
     RESULTS_PER_QUERY: int = 5
     MAX_RESEARCH_QUERIES: int = 5
+    # Per Tavily request, further capped by the run's deadline
+    TAVILY_TIMEOUT_SECONDS: float = 20.0
+    # Evidence items each section writer receives, picked by relevance
+    EVIDENCE_PER_SECTION: int = 3
+
+    # Local research corpus (core/research_corpus.py):
+    # "hybrid" answers from the corpus when it covers the query, else Tavily;
+    # "tavily" always calls Tavily; "offline" never does
+    RESEARCH_SOURCE: str = os.getenv("DRAFTLY_RESEARCH_SOURCE", "hybrid").lower()
+    CORPUS_MIN_COVERAGE: float = 0.8
+    CORPUS_MIN_RESULTS: int = 3
+    CORPUS_MAX_AGE_DAYS: float = 30.0
+    # Time-sensitive (open_book) topics only trust recent results
+    CORPUS_OPEN_BOOK_MAX_AGE_DAYS: float = 1.0
+
+    # Full-page enrichment of top research results (core/enrichment.py)
+    ENABLE_ENRICHMENT: bool = os.getenv("DRAFTLY_ENRICH_RESEARCH", "false").lower() == "true"
+    ENRICH_TOP_URLS: int = 5
+    ENRICH_MAX_WORKERS: int = 4
+    ENRICH_PER_HOST: int = 2
+    ENRICH_TIMEOUT_SECONDS: float = 10.0
+    ENRICH_MAX_BYTES: int = 2 * 1024 * 1024
+    ENRICH_MAX_CHARS: int = 200_000
+    ENRICH_CHUNK_WORDS: int = 150
+    ENRICH_CHUNKS_PER_DOC: int = 2
+
+    # Pipelined mode: plan concurrently with routing/research
+    PIPELINED_MODE: bool = os.getenv("DRAFTLY_PIPELINED", "false").lower() == "true"
+    SPECULATIVE_RESEARCH: bool = True
+
+    # Inline SEO report in metadata (core/seo.py)
+    ENABLE_SEO_ANALYSIS: bool = True
+
+    # Translation stage (core/translator.py)
+    MAX_TRANSLATION_LANGUAGES: int = 10
+
+    # Near-duplicate topic reuse: "off", "plan" (evidence + plan) or "blog"
+    REUSE_POLICY: str = os.getenv("DRAFTLY_REUSE_POLICY", "plan").lower()
+    SIMILARITY_THRESHOLD: float = float(os.getenv("DRAFTLY_SIMILARITY_THRESHOLD", "0.8"))
 
     @classmethod
     def validate(cls) -> tuple[bool, str]:
@@ -89,6 +185,16 @@ class BlogConfig:
             return False, "MIN_SECTIONS cannot exceed MAX_SECTIONS."
         if cls.MAX_RETRIES < 0:
             return False, "MAX_RETRIES cannot be negative."
+        if cls.RESEARCH_SOURCE not in ("hybrid", "tavily", "offline"):
+            return False, "RESEARCH_SOURCE must be one of hybrid, tavily, offline."
+        if not (0 < cls.CORPUS_MIN_COVERAGE <= 1):
+            return False, "CORPUS_MIN_COVERAGE must be in (0, 1]."
+        if cls.ENRICH_MAX_WORKERS <= 0 or cls.ENRICH_PER_HOST <= 0:
+            return False, "ENRICH_MAX_WORKERS and ENRICH_PER_HOST must be positive."
+        if cls.REUSE_POLICY not in ("off", "plan", "blog"):
+            return False, "REUSE_POLICY must be one of off, plan, blog."
+        if not (0 < cls.SIMILARITY_THRESHOLD <= 1):
+            return False, "SIMILARITY_THRESHOLD must be in (0, 1]."
         return True, "Blog configuration valid."
 
 
@@ -120,6 +226,64 @@ PLATFORM_CONFIGS = {
 }
 
 
+# ---------------------------------------------------------------------
+# GENERATION PROFILES
+# ---------------------------------------------------------------------
+
+# models:           task -> model overrides (router, planner, writer, quality)
+# combined_planning: route and plan in a single structured call
+# research:         "auto" (router decides) or "forced_only" (only if requested)
+# sections:         (min, max) planned sections
+# max_section_words: cap on per-section target_words (None = planner decides)
+# max_tokens:       completion budget per LLM call
+# quality_rounds:   rewrite rounds in the quality stage (0 disables it)
+GENERATION_PROFILES = {
+    "fast": {
+        "models": {
+            "router": ModelConfig.FAST_MODEL,
+            "planner": ModelConfig.FAST_MODEL,
+            "writer": ModelConfig.FAST_MODEL,
+        },
+        "combined_planning": True,
+        "research": "forced_only",
+        "sections": (3, 4),
+        "max_section_words": 250,
+        "max_tokens": 1024,
+        "quality_rounds": 0,
+        "min_quality_score": BlogConfig.MIN_QUALITY_SCORE,
+    },
+    "balanced": {
+        "models": {},
+        "combined_planning": False,
+        "research": "auto",
+        "sections": (BlogConfig.MIN_SECTIONS, BlogConfig.MAX_SECTIONS),
+        "max_section_words": None,
+        "max_tokens": ModelConfig.MAX_TOKENS,
+        "quality_rounds": BlogConfig.MAX_RETRIES,
+        "min_quality_score": BlogConfig.MIN_QUALITY_SCORE,
+    },
+    "quality": {
+        "models": {
+            "writer": ModelConfig.QUALITY_WRITER_MODEL,
+        },
+        "combined_planning": False,
+        "research": "auto",
+        "sections": (BlogConfig.MIN_SECTIONS, BlogConfig.MAX_SECTIONS),
+        "max_section_words": None,
+        "max_tokens": ModelConfig.MAX_TOKENS,
+        "quality_rounds": BlogConfig.MAX_RETRIES + 1,
+        "min_quality_score": BlogConfig.MIN_QUALITY_SCORE + 1,
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(name: str) -> dict:
+    """Return profile settings, falling back to the default profile."""
+    return GENERATION_PROFILES.get(name, GENERATION_PROFILES[DEFAULT_PROFILE])
+
+
 # ---------------------------------------------------------------------
 # SYSTEM SETTINGS
 # ---------------------------------------------------------------------
@@ -131,16 +295,94 @@ class SystemConfig:
     CACHE_DIR: str = ".cache"
     CACHE_TTL_HOURS: int = 24
 
-    LOG_LEVEL: str = "INFO"
+    LOG_LEVEL: str = os.getenv("DRAFTLY_LOG_LEVEL", "INFO").upper()
     LOG_FILE: str = "blog_agent.log"
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    # Fraction of DEBUG records kept (INFO and above are never sampled)
+    LOG_DEBUG_SAMPLE_RATE: float = float(os.getenv("DRAFTLY_LOG_DEBUG_SAMPLE_RATE", "0.1"))
 
     MAX_PARALLEL_WORKERS: int = 5
+    # Process-wide cap on in-flight LLM requests, across all runs and pools
+    MAX_CONCURRENT_LLM_CALLS: int = int(os.getenv("DRAFTLY_MAX_LLM_CONCURRENCY", "8"))
     OUTPUT_DIR: str = "generated_blogs"
+    DB_PATH: str = os.getenv("DRAFTLY_DB_PATH", "draftly.db")
+
+    # Router tier: "hybrid" (cache/local, LLM if unsure), "local" or "llm"
+    ROUTER_TIER: str = os.getenv("DRAFTLY_ROUTER_TIER", "hybrid").lower()
+    ROUTER_CONFIDENCE_THRESHOLD: float = float(os.getenv("DRAFTLY_ROUTER_CONFIDENCE", "0.7"))
+
+    # End-to-end deadline applied when a request does not set one (0 = none)
+    DEFAULT_DEADLINE_SECONDS: float = float(os.getenv("DRAFTLY_DEADLINE_SECONDS", "0"))
+    # Sections are not started with less time than this left
+    MIN_SECTION_SECONDS: float = 8.0
+    # How often the API checks whether the client is still connected
+    DISCONNECT_POLL_SECONDS: float = 1.0
+
+    # Admission scheduler (core/scheduler.py)
+    MAX_CONCURRENT_RUNS: int = int(os.getenv("DRAFTLY_MAX_CONCURRENT_RUNS", "4"))
+    MAX_RUNS_PER_CLIENT: int = int(os.getenv("DRAFTLY_MAX_RUNS_PER_CLIENT", "2"))
+    # Slots batch requests may never take, kept free for interactive ones
+    INTERACTIVE_RESERVED_RUNS: int = 1
+    MAX_QUEUE_DEPTH: int = 200
+    # Fair-share weights by client id, e.g. '{"key:3f2a9c1b7e4d": 3}'
+    CLIENT_WEIGHTS: dict = json.loads(os.getenv("DRAFTLY_CLIENT_WEIGHTS", "{}"))
+    # Priority class by client id, e.g. '{"key:3f2a9c1b7e4d": "interactive"}';
+    # other clients get DEFAULT_PRIORITY. Requests may only lower their class
+    CLIENT_PRIORITIES: dict = json.loads(os.getenv("DRAFTLY_CLIENT_PRIORITIES", "{}"))
+    DEFAULT_PRIORITY: str = os.getenv("DRAFTLY_DEFAULT_PRIORITY", "interactive").lower()
+
+    # Export rendering (utils/exporter.py), in its own process pool
+    EXPORT_WORKERS: int = int(os.getenv("DRAFTLY_EXPORT_WORKERS", "2"))
+    # Unicode TTF for PDF export. -Bold, -Oblique (or -Italic) and -BoldOblique
+    # siblings next to it are used when present, else the nearest face stands in.
+    # Without this file PDFs fall back to latin-1 Helvetica
+    PDF_FONT_PATH: str = os.getenv("DRAFTLY_PDF_FONT", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+    # Per-run profiling (utils/profiler.py): X-Draftly-Profile header / --profile-run
+    PROFILING_ENABLED: bool = os.getenv("DRAFTLY_PROFILING", "true").lower() == "true"
+    PROFILE_DIR: str = os.getenv("DRAFTLY_PROFILE_DIR", "profiles")
+    PROFILE_TOP_FUNCTIONS: int = 30
+    # Required as X-Admin-Token on /admin/* and for the profiling header;
+    # both are refused while it is unset
+    ADMIN_TOKEN: str = os.getenv("DRAFTLY_ADMIN_TOKEN", "")
+
+    # Multi-worker mode (core/coordinator.py, gunicorn.conf.py): LLM slots,
+    # in-flight research and metrics are shared across worker processes
+    MULTI_WORKER: bool = os.getenv("DRAFTLY_MULTI_WORKER", "false").lower() == "true"
+    COORDINATOR_DB: str = os.getenv("DRAFTLY_COORDINATOR_DB", ".cache/coordinator.db")
+    # Upstream request rates shared by all workers (0 = unlimited)
+    LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("DRAFTLY_LLM_RPM", "0"))
+    TAVILY_REQUESTS_PER_MINUTE: float = float(os.getenv("DRAFTLY_TAVILY_RPM", "0"))
+    # Leases of crashed workers expire after this long
+    LEASE_TTL_SECONDS: float = 120.0
+    METRICS_PUBLISH_SECONDS: float = 5.0
 
     @classmethod
     def validate(cls) -> tuple[bool, str]:
         if cls.MAX_PARALLEL_WORKERS <= 0:
             return False, "MAX_PARALLEL_WORKERS must be positive."
+        if cls.MAX_CONCURRENT_LLM_CALLS <= 0:
+            return False, "MAX_CONCURRENT_LLM_CALLS must be positive."
+        if not (0 <= cls.LOG_DEBUG_SAMPLE_RATE <= 1):
+            return False, "LOG_DEBUG_SAMPLE_RATE must be between 0 and 1."
+        if cls.ROUTER_TIER not in ("hybrid", "local", "llm"):
+            return False, "ROUTER_TIER must be one of hybrid, local, llm."
+        if not (0 <= cls.ROUTER_CONFIDENCE_THRESHOLD <= 1):
+            return False, "ROUTER_CONFIDENCE_THRESHOLD must be between 0 and 1."
+        if cls.MAX_CONCURRENT_RUNS <= 0 or cls.MAX_RUNS_PER_CLIENT <= 0:
+            return False, "MAX_CONCURRENT_RUNS and MAX_RUNS_PER_CLIENT must be positive."
+        if any(float(w) <= 0 for w in cls.CLIENT_WEIGHTS.values()):
+            return False, "CLIENT_WEIGHTS must be positive."
+        priorities = ("interactive", "batch")
+        if cls.DEFAULT_PRIORITY not in priorities or any(p not in priorities for p in cls.CLIENT_PRIORITIES.values()):
+            return False, "DEFAULT_PRIORITY and CLIENT_PRIORITIES must be interactive or batch."
+        if cls.DEFAULT_DEADLINE_SECONDS < 0:
+            return False, "DEFAULT_DEADLINE_SECONDS cannot be negative."
+        if cls.EXPORT_WORKERS <= 0:
+            return False, "EXPORT_WORKERS must be positive."
+        if cls.LLM_REQUESTS_PER_MINUTE < 0 or cls.TAVILY_REQUESTS_PER_MINUTE < 0:
+            return False, "Request-per-minute limits cannot be negative."
         return True, "System configuration valid."
 
 
@@ -1,75 +1,256 @@
+import functools
 import logging
+from contextlib import contextmanager
 from typing import TypedDict, List, Annotated, Optional, Any, cast
 import operator
+import time
+import uuid
 from datetime import date
 from pathlib import Path
 import os
 import json
+import requests
+from concurrent.futures import wait
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.types import Send
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.messages import HumanMessage, SystemMessage
 
 
-from core.llm_client import LLMClient, generate_structured, create_client_for_task
-from config import BlogConfig, PLATFORM_CONFIGS, APIConfig, ModelConfig
-from utils.helpers import CacheManager, count_words
+from core.llm_client import LLMClient, generate_structured, create_client_for_task, get_client
+from core.schemas import RouterDecision, BlogPlan, CombinedPlan, QualityReport
+from core.local_router import LocalRouter, default_queries
+from core.topic_index import TopicIndex
+from core.translator import translate_blog
+from core.enrichment import enrich_evidence
+from core.research_corpus import ResearchCorpus
+from core.evidence import store_for, open_store, release as release_evidence
+from core.coordinator import get_coordinator, rate_limit
+from core import seo
+from core.usage import start_run, get_run, end_run
+from core.deadline import (DeadlineExceeded, deadline_var, time_left, call_timeout, is_cancelled,
+                           clear as clear_cancelled)
+from config import (BlogConfig, PLATFORM_CONFIGS, APIConfig, ModelConfig, SystemConfig,
+                    DEFAULT_PROFILE, get_profile)
+from utils.helpers import CacheManager, ContextThreadPoolExecutor, count_words, run_id_var
+from utils.blog_store import BlogStore, content_hash
+from utils.metrics import metrics
+from utils import profiler
 
 from prompts import system_prompts
 
 logger = logging.getLogger(__name__)
 
-llm_client = LLMClient()
 cache = CacheManager()
+local_router = LocalRouter()
+topic_index = TopicIndex()
+research_corpus = ResearchCorpus()
+blog_store = BlogStore()
+
+
+def _client_for(profile: Optional[str], task: str) -> LLMClient:
+    """Return the client for a task, honouring the profile's model overrides."""
+    model = get_profile(profile or DEFAULT_PROFILE)["models"].get(task)
+    if model:
+        return get_client(model)
+    return create_client_for_task(task)
+
+
+def _merge_models(left: dict, right: dict) -> dict:
+    """Reducer: task -> list of distinct models actually called."""
+    merged = {task: list(models) for task, models in (left or {}).items()}
+    for task, models in (right or {}).items():
+        known = merged.setdefault(task, [])
+        known.extend(m for m in models if m not in known)
+    return merged
 
 
 # ---------------- STATE ----------------
 
 class BlogState(TypedDict):
+    run_id: str
+    # Absolute end-to-end deadline (epoch seconds), None when unbounded
+    deadline: Optional[float]
     topic: str
     platform: str
+    profile: str
 
     needs_research: bool
     mode: str
     queries: List[str]
+    routing: dict
 
-    evidence: List[dict]
+    # Ids into the run's EvidenceStore (core/evidence.py), not the results themselves
+    evidence: List[int]
     plan: Optional[dict]
 
     sections: Annotated[List[tuple[int, str]], operator.add]
+    skipped: Annotated[List[int], operator.add]
+    budget: dict
+    models_used: Annotated[dict, _merge_models]
+    quality: dict
+    pipeline: dict
+    reuse: dict
 
     final_blog: str
     metadata: dict
 
+    # Target languages for the translation stage, and its output
+    languages: List[str]
+    translations: dict
+
+    # Variant runs: target platforms, and each one's finished blog
+    platforms: List[str]
+    variants: Annotated[dict, operator.or_]
+
+
+# ---------------- DEDUPE ----------------
+
+def _max_age_days(mode: Optional[str]) -> float:
+    """How old research may be before it is stale, by routing mode."""
+    return BlogConfig.CORPUS_OPEN_BOOK_MAX_AGE_DAYS if mode == "open_book" else BlogConfig.CORPUS_MAX_AGE_DAYS
+
+
+def dedupe_node(state: BlogState) -> dict:
+    """Reuse work from a near-duplicate earlier topic, per REUSE_POLICY.
+
+    plan: reuse the earlier evidence and plan, go straight to the workers
+          (through research when it is forced and there is no evidence)
+    blog: return the earlier blog as-is (falls back to plan, and always
+          for variant runs)
+
+    Entries older than their mode's research freshness are not reused.
+    """
+    policy = BlogConfig.REUSE_POLICY
+    if policy == "off":
+        return {"reuse": {"decision": "off"}}
+
+    metrics.incr("reuse.lookups")
+    try:
+        match = topic_index.find_similar(
+            state["topic"], state["platform"], state.get("profile") or DEFAULT_PROFILE,
+            max_age_days=_max_age_days
+        )
+    except Exception as e:
+        logger.warning(f"Topic similarity lookup failed: {e}")
+        return {"reuse": {"decision": "none"}}
+
+    if not match:
+        return {"reuse": {"decision": "none", "score": 0.0}}
+
+    reuse = {"score": match["score"], "matched_topic": match["topic"], "matched_at": match["created_at"]}
+    if match["score"] < BlogConfig.SIMILARITY_THRESHOLD:
+        return {"reuse": {**reuse, "decision": "none"}}
+
+    # A variant run needs one blog per platform, so it only reuses the plan
+    if policy == "blog" and match["content_hash"] and not state.get("platforms"):
+        blog = blog_store.get_by_hash(match["content_hash"])
+        if blog:
+            metrics.incr("reuse.blog")
+            reuse = {**reuse, "decision": "blog", "blog_id": blog["id"]}
+            return {
+                "final_blog": blog["content"],
+                "metadata": {**blog["metadata"], "run_id": state.get("run_id"), "reuse": reuse},
+                "reuse": reuse,
+            }
+
+    if match["plan"]:
+        metrics.incr("reuse.plan")
+        plan, budget = _apply_budget(match["plan"], state)
+        mode = match["mode"] or "closed_book"
+        reuse = {**reuse, "decision": "plan"}
+        update = {
+            "needs_research": state.get("needs_research") or bool(match["evidence"]),
+            "mode": mode,
+            "routing": {"source": "reuse"},
+            "evidence": store_for(state.get("run_id")).add(match["evidence"]),
+            "plan": plan,
+            "budget": budget,
+        }
+        if state.get("needs_research") and not match["evidence"]:
+            # Forced research, but the earlier run had none: research before the workers
+            update["queries"] = default_queries(state["topic"], mode)
+            reuse["researched"] = True
+        return {**update, "reuse": reuse}
+
+    return {"reuse": {**reuse, "decision": "none"}}
+
 
 # ---------------- ROUTER ----------------
 
-def router_node(state: BlogState) -> dict:
+def _llm_route(state: BlogState) -> tuple[dict, str]:
     ctx = f"Topic: {state['topic']}\nPlatform: {state['platform']}\nDate: {date.today().isoformat()}\nResearch Requested: {state.get('needs_research')}"
     prompt = f"{system_prompts.ROUTER_PROMPT}\n\n{ctx}"
 
+    client = _client_for(state.get("profile"), "router")
     decision = generate_structured(
-        llm_client,
+        client,
         [
             {"role": "system", "content": system_prompts.MASTER_BLOG_WRITER_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        "{needs_research, mode, queries}"
+        "{needs_research, mode, queries}",
+        response_model=RouterDecision
     )
+    return decision, client.model
+
+
+def _route(state: BlogState) -> tuple[dict, dict]:
+    """Resolve a router decision through the configured tier.
+
+    hybrid: cache -> local classifier -> LLM for low-confidence topics
+    local:  cache -> local classifier, never the LLM
+    llm:    always the LLM
+    """
+    tier = SystemConfig.ROUTER_TIER
+    topic = state["topic"]
+
+    if tier != "llm":
+        cached = local_router.lookup(topic)
+        if cached:
+            metrics.incr("router.cache_hits")
+            return cached, {"source": "cache"}
+
+        decision, confidence = local_router.classify(topic)
+        if tier == "local" or confidence >= SystemConfig.ROUTER_CONFIDENCE_THRESHOLD:
+            metrics.incr("router.local")
+            return decision, {"source": "local", "confidence": confidence}
+
+    metrics.incr("router.llm_fallback")
+    decision, model = _llm_route(state)
+    # The prompt carries "Research Requested", so a forced answer is not one
+    # to replay for normal runs of the same topic
+    if tier != "llm" and not state.get("needs_research"):
+        local_router.store(topic, decision)
+    return decision, {"source": "llm", "model": model}
+
 
-    # If user forced research, override the boolean but keep queries/mode
+def router_node(state: BlogState) -> dict:
+    decision, routing = _route(state)
+    models_used = {"router": [routing["model"]]} if "model" in routing else {}
+
+    # If user forced research, override the boolean but keep queries/mode;
+    # a closed_book decision (local or cached) has no queries of its own
     if state.get("needs_research"):
+        mode = str(decision.get("mode", "research")) # default to research mode
         return {
             "needs_research": True,
-            "mode": str(decision.get("mode", "research")), # default to research mode
-            "queries": cast(List[str], decision.get("queries", []))
+            "mode": mode,
+            "queries": cast(List[str], decision.get("queries") or default_queries(state["topic"], mode)),
+            "routing": routing,
+            "models_used": models_used
         }
 
+    needs_research = bool(decision.get("needs_research", False))
+    if get_profile(state.get("profile"))["research"] == "forced_only":
+        needs_research = False
+
     return {
-        "needs_research": bool(decision.get("needs_research", False)),
+        "needs_research": needs_research,
         "mode": str(decision.get("mode", "closed_book")),
-        "queries": cast(List[str], decision.get("queries", []))
+        "queries": cast(List[str], decision.get("queries", [])),
+        "routing": routing,
+        "models_used": models_used
     }
 
 
@@ -79,27 +260,57 @@ def route_next(state: BlogState) -> str:
 
 # ---------------- RESEARCH ----------------
 
-def research_node(state: BlogState) -> dict:
-    if not APIConfig.TAVILY_API_KEY:
-        logger.warning("Tavily API key missing. Skipping research.")
-        return {"evidence": []}
+def _corpus_lookup(query: str, mode: Optional[str]) -> tuple[List[dict], bool]:
+    """Local corpus results for a query and whether they are good enough
+    to skip Tavily."""
+    if BlogConfig.RESEARCH_SOURCE == "tavily":
+        return [], False
 
     try:
-        tool = TavilySearchResults(
-            max_results=BlogConfig.RESULTS_PER_QUERY,
-            tavily_api_key=APIConfig.TAVILY_API_KEY
-        )
+        results, coverage = research_corpus.lookup(query, max_age_days=_max_age_days(mode))
+    except Exception as e:
+        logger.warning(f"Research corpus lookup failed: {e}")
+        return [], False
+
+    covered = len(results) >= BlogConfig.CORPUS_MIN_RESULTS and coverage >= BlogConfig.CORPUS_MIN_COVERAGE
+    return results, covered
+
+
+def _tavily_search(query: str) -> List[dict]:
+    """One Tavily search, with the time left before the deadline as its timeout."""
+    timeout = call_timeout(BlogConfig.TAVILY_TIMEOUT_SECONDS, ModelConfig.MIN_ATTEMPT_SECONDS)
+    response = requests.post(
+        f"{APIConfig.TAVILY_BASE_URL}/search",
+        headers={"Authorization": f"Bearer {APIConfig.TAVILY_API_KEY}"},
+        json={"query": query, "max_results": BlogConfig.RESULTS_PER_QUERY, "search_depth": "advanced"},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json().get("results", [])
 
-        results = []
-        queries = cast(List[str], state.get("queries", []))
-        for query in queries[:BlogConfig.MAX_RESEARCH_QUERIES]:
-            cache_key = f"tavily_{query}"
-            cached = cache.get(cache_key)
-            if cached:
-                results.extend(cached)
-                continue
 
-            response = tool.invoke({"query": query})
+def research_node(state: BlogState) -> dict:
+    offline = BlogConfig.RESEARCH_SOURCE == "offline"
+    if not offline and not APIConfig.TAVILY_API_KEY:
+        logger.warning("Tavily API key missing. Researching from the local corpus only.")
+        offline = True
+
+    try:
+        def fetch(query: str, cache_key: str) -> List[dict]:
+            try:
+                rate_limit("tavily", SystemConfig.TAVILY_REQUESTS_PER_MINUTE)
+                metrics.incr("research.tavily_calls")
+                response = _tavily_search(query)
+            except DeadlineExceeded as e:
+                # Only this query is lost; the others keep their results
+                logger.warning(f"Tavily search timed out for '{query}': {e}")
+                return []
+            except (requests.RequestException, ValueError) as e:
+                # Timeouts, 429/5xx, connection errors and bad JSON: drop this
+                # query only, and cache nothing so a later run retries it
+                metrics.incr("research.tavily_errors")
+                logger.warning(f"Tavily search failed for '{query}': {e}")
+                return []
             normalized = [{
                 "title": r.get("title", ""),
                 "url": r.get("url", ""),
@@ -107,9 +318,59 @@ def research_node(state: BlogState) -> dict:
             } for r in response or []]
 
             cache.set(cache_key, normalized)
-            results.extend(normalized)
+            try:
+                research_corpus.add(query, normalized)
+            except Exception as e:
+                logger.warning(f"Failed to add results to research corpus: {e}")
+            return normalized
+
+        def search(query: str) -> List[dict]:
+            cache_key = f"tavily_{query}"
+            cached = cache.get(cache_key)
+            if cached:
+                return cached
+
+            local, covered = _corpus_lookup(query, state.get("mode"))
+            if covered or offline:
+                metrics.incr("research.corpus_hits" if covered else "research.corpus_offline")
+                return local
 
-        return {"evidence": results}
+            if SystemConfig.MULTI_WORKER:
+                # Another worker may be running the same query; wait for its cached result
+                return get_coordinator().single_flight(
+                    cache_key, lambda: cache.get(cache_key), lambda: fetch(query, cache_key)
+                )
+            return fetch(query, cache_key)
+
+        # Queries are independent, so issue them concurrently; whatever has
+        # not returned by the deadline is dropped
+        queries = cast(List[str], state.get("queries", []))[:BlogConfig.MAX_RESEARCH_QUERIES]
+        results = []
+        if queries:
+            pool = ContextThreadPoolExecutor(max_workers=len(queries))
+            try:
+                futures = [pool.submit(search, query) for query in queries]
+                left = time_left()
+                done, not_done = wait(futures, timeout=None if left is None else max(left, 0))
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+            if not_done:
+                logger.warning(f"Research deadline reached, dropped {len(not_done)} query(ies)")
+            for query, future in zip(queries, futures):
+                if future not in done:
+                    continue
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    logger.warning(f"Research failed for '{query}': {e}")
+            # Corpus answers for related queries often share URLs
+            results = _merge_evidence(results)
+
+        if BlogConfig.ENABLE_ENRICHMENT and results:
+            results = enrich_evidence(results, " ".join([state.get("topic", ""), *queries]))
+
+        return {"evidence": store_for(state.get("run_id")).add(results)}
     except Exception as e:
         logger.error(f"Research failed: {e}")
         return {"evidence": []}
@@ -117,49 +378,268 @@ def research_node(state: BlogState) -> dict:
 
 # ---------------- PLANNER ----------------
 
+def _apply_profile_limits(plan: dict, profile: dict) -> dict:
+    _, max_sections = profile["sections"]
+    cap = profile["max_section_words"]
+
+    sections = []
+    for section in cast(List[dict], plan.get("sections", []))[:max_sections]:
+        if cap:
+            section = {**section, "target_words": min(int(section.get("target_words", cap)), cap)}
+        sections.append(section)
+
+    return {**plan, "sections": sections}
+
+
+def _estimate_section_tokens(target_words: int, with_quality: bool) -> float:
+    output = target_words * BlogConfig.TOKENS_PER_WORD
+    tokens = BlogConfig.SECTION_PROMPT_TOKENS + output
+    if with_quality:
+        # The quality checker reads the section back and answers briefly
+        tokens += 400 + output
+    return tokens
+
+
+def _apply_budget(plan: dict, state: BlogState, share: float = 1.0) -> tuple[dict, dict]:
+    """Fit the plan to the run's remaining token/cost budget.
+
+    Shrinks per-section word targets first (down to MIN_SECTION_WORDS),
+    then drops sections, always keeping the first and last. `share` is the
+    fraction of the remaining budget this plan may use.
+    """
+    run = get_run(state.get("run_id"))
+    if run is None:
+        return plan, {}
+
+    writer_model = _client_for(state.get("profile"), "writer").model
+    available = run.remaining_tokens(writer_model)
+    if available is None:
+        return plan, {}
+    available = int(available * share)
+
+    with_quality = BlogConfig.ENABLE_QUALITY_CHECK and get_profile(state.get("profile"))["quality_rounds"] > 0
+    sections = [dict(s) for s in cast(List[dict], plan.get("sections", []))]
+
+    def estimate(secs: List[dict]) -> float:
+        return sum(_estimate_section_tokens(int(s.get("target_words", 300)), with_quality) for s in secs)
+
+    needed = estimate(sections)
+    if needed <= available:
+        return plan, {"available_tokens": available, "estimated_tokens": int(needed)}
+
+    fixed = estimate([{**s, "target_words": 0} for s in sections])
+    variable = needed - fixed
+    scale = max((available - fixed) / variable, 0.0) if variable else 0.0
+    for s in sections:
+        s["target_words"] = max(BlogConfig.MIN_SECTION_WORDS, int(int(s.get("target_words", 300)) * scale))
+
+    dropped = 0
+    while len(sections) > 1 and estimate(sections) > available:
+        sections.pop(-2 if len(sections) > 2 else -1)
+        dropped += 1
+
+    logger.info(f"Plan trimmed to budget: {available} tokens, scale {scale:.2f}, {dropped} section(s) dropped")
+    return {**plan, "sections": sections}, {
+        "available_tokens": available,
+        "estimated_tokens": int(needed),
+        "word_scale": round(scale, 3),
+        "sections_dropped": dropped,
+    }
+
+
 def planner_node(state: BlogState) -> dict:
+    profile = get_profile(state.get("profile"))
     platform_config = PLATFORM_CONFIGS.get(
         state["platform"],
         PLATFORM_CONFIGS["generic"]
     )
 
-    evidence = cast(List[dict], state.get("evidence", []))
-    evidence_text = "\n".join(
-        f"- {e.get('title', 'N/A')}: {e.get('snippet', '')} ({e.get('url', '')})"
-        for e in evidence[:5]
-    )
+    evidence = store_for(state.get("run_id")).get(cast(List[int], state.get("evidence", []))[:5])
+    evidence_text = "\n".join(f"- {e.title or 'N/A'}: {e.snippet} ({e.url})" for e in evidence)
 
-    ctx = f"Topic: {state['topic']}\nTone: {platform_config['tone']}\nWord Target: {platform_config['word_count']}\nEvidence:\n{evidence_text}"
+    min_sections, max_sections = profile["sections"]
+    ctx = f"Topic: {state['topic']}\nTone: {platform_config['tone']}\nWord Target: {platform_config['word_count']}\nSections: {min_sections}-{max_sections}\nEvidence:\n{evidence_text}"
     prompt = f"{system_prompts.PLANNER_PROMPT}\n\n{ctx}"
 
+    client = _client_for(state.get("profile"), "planner")
     plan = generate_structured(
-        llm_client,
+        client,
         [
             {"role": "system", "content": system_prompts.MASTER_BLOG_WRITER_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        "{blog_title, sections}"
+        "{blog_title, sections: [{id, title, goal, bullets, target_words}]}",
+        response_model=BlogPlan
     )
 
-    return {"plan": plan}
+    plan, budget = _apply_budget(_apply_profile_limits(plan, profile), state)
+    return {
+        "plan": plan,
+        "budget": budget,
+        "models_used": {"planner": [client.model]}
+    }
+
+
+def fast_plan_node(state: BlogState) -> dict:
+    """Route and plan in a single structured call (fast profile)."""
+    profile = get_profile(state.get("profile"))
+    platform_config = PLATFORM_CONFIGS.get(
+        state["platform"],
+        PLATFORM_CONFIGS["generic"]
+    )
+
+    min_sections, max_sections = profile["sections"]
+    prompt = system_prompts.COMBINED_PLANNER_PROMPT.format(
+        min_sections=min_sections,
+        max_sections=max_sections
+    )
+    ctx = f"Topic: {state['topic']}\nPlatform: {state['platform']}\nTone: {platform_config['tone']}\nDate: {date.today().isoformat()}\nResearch Requested: {state.get('needs_research')}"
+
+    client = _client_for(state.get("profile"), "planner")
+    result = generate_structured(
+        client,
+        [
+            {"role": "system", "content": system_prompts.MASTER_BLOG_WRITER_PROMPT},
+            {"role": "user", "content": f"{prompt}\n\n{ctx}"}
+        ],
+        "{needs_research, mode, queries, blog_title, sections: [{id, title, goal, bullets, target_words}]}",
+        response_model=CombinedPlan
+    )
+
+    needs_research = bool(state.get("needs_research")) or (
+        profile["research"] == "auto" and result["needs_research"]
+    )
+    plan, budget = _apply_budget(
+        _apply_profile_limits({"blog_title": result["blog_title"], "sections": result["sections"]}, profile),
+        state
+    )
+
+    return {
+        "needs_research": needs_research,
+        "mode": result["mode"],
+        "queries": result["queries"] or (default_queries(state["topic"], result["mode"]) if needs_research else []),
+        "routing": {"source": "combined"},
+        "plan": plan,
+        "budget": budget,
+        "models_used": {"router": [client.model], "planner": [client.model]},
+    }
+
+
+# ---------------- PIPELINED PREPARE ----------------
+
+def _merge_evidence(*groups: List[dict]) -> List[dict]:
+    seen = set()
+    merged = []
+    for group in groups:
+        for item in group:
+            url = item.get("url", "")
+            if url and url in seen:
+                continue
+            seen.add(url)
+            merged.append(item)
+    return merged
+
+
+def prepare_node(state: BlogState) -> dict:
+    """Pipelined replacement for router -> research -> planner.
+
+    A draft plan starts alongside the router call, as does speculative
+    research on the raw topic when research is forced or the local
+    classifier expects it. Routed queries start as soon as the router
+    returns; if it decides against research, the speculative search is
+    dropped unused. The plan is re-done with evidence for open_book and
+    hybrid topics, whose outline depends on what the sources say;
+    closed_book plans keep the draft.
+    """
+    speculate = BlogConfig.SPECULATIVE_RESEARCH and (
+        bool(state.get("needs_research")) or local_router.classify(state["topic"])[0]["needs_research"]
+    )
+    pool = ContextThreadPoolExecutor(max_workers=3)
+    try:
+        speculative = pool.submit(research_node, {"queries": [state["topic"]]}) if speculate else None
+        draft = pool.submit(planner_node, {**state, "evidence": []})
+
+        decision = router_node(state)
+
+        routed = None
+        if decision["needs_research"] and decision["queries"]:
+            routed = pool.submit(research_node, {"queries": decision["queries"]})
+
+        drafted = draft.result()
+        plan, budget = drafted["plan"], drafted["budget"]
+        models_used = _merge_models(decision["models_used"], drafted["models_used"])
+
+        evidence: List[int] = []
+        if decision["needs_research"]:
+            # Both searches share the run's store, which already dedupes by URL
+            evidence = list(dict.fromkeys(
+                (routed.result()["evidence"] if routed else [])
+                + (speculative.result()["evidence"] if speculative else [])
+            ))
+    finally:
+        # Do not wait for a speculative search the router made unnecessary
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    refined = decision["mode"] in ("open_book", "hybrid") and bool(evidence)
+    if refined:
+        replanned = planner_node({**state, "evidence": evidence})
+        plan, budget = replanned["plan"], replanned["budget"]
+        models_used = _merge_models(models_used, replanned["models_used"])
+
+    return {
+        **decision,
+        "models_used": models_used,
+        "evidence": evidence,
+        "plan": plan,
+        "budget": budget,
+        "pipeline": {"mode": "pipelined", "plan_refined": refined, "speculative_research": speculate},
+    }
 
 
 # ---------------- FANOUT ----------------
 
+def _section_text(section: dict) -> str:
+    return " ".join([
+        str(section.get("title", "")), str(section.get("goal", "")),
+        *cast(List[str], section.get("bullets", []))
+    ])
+
+
+def _worker_payload(state: BlogState, section: dict, evidence_ids: Optional[List[int]] = None) -> dict:
+    """Everything one section writer needs. Evidence goes by reference: only
+    the ids of the items most relevant to this section."""
+    plan = cast(dict, state.get("plan") or {})
+    if evidence_ids is None:
+        evidence_ids = store_for(state.get("run_id")).select(
+            cast(List[int], state.get("evidence", [])), _section_text(section), BlogConfig.EVIDENCE_PER_SECTION
+        )
+    return {
+        "run_id": state.get("run_id"),
+        "deadline": state.get("deadline"),
+        "section": section,
+        "topic": state["topic"],
+        "platform": state["platform"],
+        "profile": state.get("profile") or DEFAULT_PROFILE,
+        "blog_title": plan.get("blog_title", "Untitled"),
+        "tone": plan.get("tone"),
+        "evidence": evidence_ids
+    }
+
+
 def fanout_to_workers(state: BlogState) -> List[Send]:
     plan = cast(Optional[dict], state.get("plan"))
     if not plan:
         return []
 
+    sections = cast(List[dict], plan.get("sections", []))
+    selected = store_for(state.get("run_id")).select_many(
+        cast(List[int], state.get("evidence", [])),
+        [_section_text(section) for section in sections],
+        BlogConfig.EVIDENCE_PER_SECTION
+    )
     return [
-        Send("worker", {
-            "section": section,
-            "topic": state["topic"],
-            "platform": state["platform"],
-            "blog_title": plan.get("blog_title", "Untitled"),
-            "evidence": cast(List[dict], state.get("evidence", []))
-        })
-        for section in cast(List[dict], plan.get("sections", []))
+        Send("worker", _worker_payload(state, section, evidence_ids))
+        for section, evidence_ids in zip(sections, selected)
     ]
 
 
@@ -167,13 +647,33 @@ def fanout_to_workers(state: BlogState) -> List[Send]:
 
 def worker_node(payload: dict) -> dict:
     section = cast(dict, payload.get("section", {}))
-    evidence = cast(List[dict], payload.get("evidence", []))
+    evidence = store_for(payload.get("run_id")).get(cast(List[int], payload.get("evidence", [])))
+    section_id = int(section.get("id", 0))
+    profile_name = cast(Optional[str], payload.get("profile"))
+    client = _client_for(profile_name, "writer")
 
-    # Format relevant evidence for this section
-    evidence_text = "\n".join(
-        f"- {e.get('snippet', '')} (Source: {e.get('url', '')})"
-        for e in evidence[:3]
-    )
+    # Stop early once the run's budget or time is spent; the merger returns a partial blog
+    left = time_left()
+    if left is not None and left < SystemConfig.MIN_SECTION_SECONDS:
+        logger.warning(f"Deadline near ({max(left, 0):.1f}s left), skipping section {section_id}")
+        return {"skipped": [section_id]}
+
+    max_tokens = get_profile(profile_name or DEFAULT_PROFILE)["max_tokens"]
+    run = get_run(payload.get("run_id"))
+    reserved = 0
+    if run is not None:
+        # Reserve this call's prompt and completion up front: sections run in
+        # parallel, and usage is only recorded once each call returns
+        reserved = run.reserve(BlogConfig.SECTION_PROMPT_TOKENS + max_tokens, client.model)
+        if run.exhausted() or reserved <= BlogConfig.SECTION_PROMPT_TOKENS:
+            run.settle(reserved)
+            logger.warning(f"Budget exhausted, skipping section {section_id}")
+            return {"skipped": [section_id]}
+        max_tokens = reserved - BlogConfig.SECTION_PROMPT_TOKENS
+
+    # Format relevant evidence for this section; enriched results carry
+    # full-page chunks in place of the short snippet
+    evidence_text = "\n".join(f"- {e.text} (Source: {e.url})" for e in evidence)
 
     prompt = system_prompts.WRITER_PROMPT.format(
         section_title=str(section.get("title", "No Title")),
@@ -185,20 +685,154 @@ def worker_node(payload: dict) -> dict:
 
     # Append evidence content strictly
     user_msg = f"{prompt}\n\nEvidence Content:\n{evidence_text}"
+    if payload.get("tone"):
+        user_msg += f"\n\nTone: {payload['tone']}"
 
-    content = llm_client.generate([
-        {"role": "system", "content": system_prompts.MASTER_BLOG_WRITER_PROMPT},
-        {"role": "user", "content": user_msg}
-    ])
+    # Targeted rewrite requested by the quality stage
+    feedback = cast(Optional[dict], payload.get("feedback"))
+    if feedback:
+        fixes = "\n".join(f"- {f}" for f in feedback.get("issues", []) + feedback.get("suggested_fixes", []))
+        user_msg += f"\n\nA previous draft of this section scored {feedback.get('score')}/10. Address:\n{fixes}"
+
+    try:
+        content = client.generate([
+            {"role": "system", "content": system_prompts.MASTER_BLOG_WRITER_PROMPT},
+            {"role": "user", "content": user_msg}
+        ], max_tokens=max_tokens)
+    except Exception as e:
+        # A call cut short by the deadline drops the section, not the blog
+        left = time_left()
+        if isinstance(e, DeadlineExceeded) or (left is not None and left < ModelConfig.MIN_ATTEMPT_SECONDS):
+            logger.warning(f"Deadline reached, skipping section {section_id}: {e}")
+            return {"skipped": [section_id]}
+        raise
+    finally:
+        if run is not None:
+            run.settle(reserved)
+
+    return {
+        "sections": [(section_id, content)],
+        "models_used": {"writer": [client.model]}
+    }
+
+
+# ---------------- QUALITY ----------------
+
+def _score_section(section: dict, content: str, platform: str,
+                   profile: Optional[str] = None) -> tuple[Optional[dict], str]:
+    ctx = (
+        f"Platform: {platform}\n"
+        f"Target words: {section.get('target_words', 300)}\n"
+        f"Actual words: {count_words(content)}\n"
+        f"Section:\n{content}"
+    )
+
+    client = _client_for(profile, "quality")
+    try:
+        report = generate_structured(
+            client,
+            [{"role": "user", "content": f"{system_prompts.QUALITY_CHECKER_PROMPT}\n\n{ctx}"}],
+            "{score, issues, suggested_fixes}",
+            response_model=QualityReport
+        )
+        return report, client.model
+    except Exception as e:
+        # A failed check must never block the blog; treat as passing
+        logger.warning(f"Quality check failed for section {section.get('id')}: {e}")
+        return None, client.model
+
+
+def _out_of_time() -> bool:
+    left = time_left()
+    return left is not None and left < SystemConfig.MIN_SECTION_SECONDS
+
+
+def quality_node(state: BlogState) -> dict:
+    """Score sections concurrently and rewrite only the ones below threshold."""
+    profile = get_profile(state.get("profile"))
+    max_rounds = profile["quality_rounds"]
+    if not BlogConfig.ENABLE_QUALITY_CHECK or max_rounds <= 0:
+        return {}
+
+    run = get_run(state.get("run_id"))
+    if run is not None and run.exhausted():
+        return {"quality": {"skipped": "budget"}}
+    if _out_of_time():
+        return {"quality": {"skipped": "deadline"}}
+
+    start = time.perf_counter()
+    plan = cast(dict, state.get("plan") or {})
+    specs = {int(s.get("id", 0)): s for s in cast(List[dict], plan.get("sections", []))}
+    current = dict(cast(List[tuple[int, str]], state.get("sections", [])))
 
-    return {"sections": [(int(section.get("id", 0)), content)]}
+    scores: dict = {}
+    rewritten: List[int] = []
+    models_used: dict = {}
+    rounds = 0
+    pending = [sid for sid in sorted(current) if sid in specs]
+
+    with ContextThreadPoolExecutor(max_workers=SystemConfig.MAX_PARALLEL_WORKERS) as pool:
+        while pending:
+            scored = list(pool.map(
+                lambda sid: _score_section(specs[sid], current[sid], state["platform"], state.get("profile")),
+                pending
+            ))
+            reports = {sid: report for sid, (report, _) in zip(pending, scored)}
+            models_used = _merge_models(models_used, {"quality": [model for _, model in scored]})
+            scores.update({sid: r["score"] for sid, r in reports.items() if r})
+
+            failing = [
+                sid for sid, r in reports.items()
+                if r and r["score"] < profile["min_quality_score"]
+            ]
+            if not failing or rounds >= max_rounds:
+                break
+            if (run is not None and run.exhausted()) or _out_of_time():
+                break
+
+            rounds += 1
+            results = pool.map(
+                lambda sid: worker_node({**_worker_payload(state, specs[sid]), "feedback": reports[sid]}),
+                failing
+            )
+            pending = []
+            for result in results:
+                for sid, content in result.get("sections", []):
+                    current[sid] = content
+                    pending.append(sid)
+                    if sid not in rewritten:
+                        rewritten.append(sid)
+                models_used = _merge_models(models_used, result.get("models_used", {}))
+
+    latency = round(time.perf_counter() - start, 2)
+    logger.info(f"Quality pass: {len(rewritten)} section(s) rewritten in {rounds} round(s), {latency}s")
+
+    return {
+        "sections": [(sid, current[sid]) for sid in rewritten],
+        "models_used": models_used,
+        "quality": {
+            "scores": scores,
+            "rewritten": rewritten,
+            "rounds": rounds,
+            "latency_seconds": latency,
+        }
+    }
 
 
 # ---------------- MERGER ----------------
 
+def _deadline_summary(state: BlogState) -> dict:
+    deadline = state.get("deadline")
+    if deadline is None:
+        return {}
+    left = deadline - time.time()
+    return {"remaining_seconds": round(left, 2), "exceeded": left <= 0}
+
+
 def merger_node(state: BlogState) -> dict:
-    sections = cast(List[tuple[int, str]], state.get("sections", []))
-    sorted_sections = sorted(sections, key=lambda x: x[0])
+    # Later entries (quality rewrites) replace earlier drafts of the same section
+    sections = dict(cast(List[tuple[int, str]], state.get("sections", [])))
+    sorted_sections = sorted(sections.items(), key=lambda x: x[0])
     combined = "\n\n".join(content for _, content in sorted_sections)
 
     plan = cast(dict, state.get("plan") or {})
@@ -206,42 +840,430 @@ def merger_node(state: BlogState) -> dict:
 
     final_blog = f"# {title}\n\n{combined}"
     word_count = count_words(final_blog)
+    skipped = sorted(set(cast(List[int], state.get("skipped", []))) - set(sections))
+
+    partial_reason = None
+    if skipped:
+        run = get_run(state.get("run_id"))
+        if is_cancelled(state.get("run_id")):
+            partial_reason = "cancelled"
+        elif run is not None and run.exhausted():
+            partial_reason = "budget"
+        else:
+            partial_reason = "deadline"
 
     metadata = {
+        "run_id": state.get("run_id"),
         "title": title,
         "word_count": word_count,
         "sections": len(sorted_sections),
         "platform": state["platform"],
         "topic": state["topic"],
-        "models_used": {
-            "router": ModelConfig.ROUTER_MODEL,
-            "planner": ModelConfig.PLANNER_MODEL,
-            "writer": ModelConfig.WRITER_MODEL,
-        },
+        "profile": state.get("profile") or DEFAULT_PROFILE,
+        # Only models that were actually called: task -> list of models
+        "models_used": {task: list(models) for task, models in (state.get("models_used") or {}).items()},
         "research_used": bool(state.get("needs_research", False)),
+        "routing": state.get("routing") or {},
+        "quality": state.get("quality") or {},
+        "pipeline": state.get("pipeline") or {"mode": "serial"},
+        "reuse": state.get("reuse") or {},
+        "budget": state.get("budget") or {},
+        "partial": bool(skipped),
+        "partial_reason": partial_reason,
+        "skipped_sections": skipped,
+        "deadline": _deadline_summary(state),
         "generated_at": date.today().isoformat()
     }
 
+    reuse = state.get("reuse") or {}
+    try:
+        topic_index.add(
+            state["topic"],
+            state["platform"],
+            metadata["profile"],
+            plan or None,
+            store_for(state.get("run_id")).as_dicts(cast(List[int], state.get("evidence", []))),
+            # Partial blogs must never be served as a reuse hit
+            None if skipped else content_hash(final_blog),
+            mode=state.get("mode"),
+            # Reused plan and evidence keep the age of the run that produced them
+            created_at=(reuse.get("matched_at")
+                        if reuse.get("decision") == "plan" and not reuse.get("researched") else None)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to index topic: {e}")
+
     return {"final_blog": final_blog, "metadata": metadata}
 
 
+# ---------------- SEO ----------------
+
+def seo_node(state: BlogState) -> dict:
+    """Attach an SEO report for the merged blog to its metadata."""
+    if not BlogConfig.ENABLE_SEO_ANALYSIS or not state.get("final_blog"):
+        return {}
+
+    report = seo.analyze(state["final_blog"], state["topic"], state["platform"])
+    return {"metadata": {**(state.get("metadata") or {}), "seo": report}}
+
+
+# ---------------- TRANSLATION ----------------
+
+def translate_node(state: BlogState) -> dict:
+    """Translate the finished blog into the requested languages."""
+    languages = cast(List[str], state.get("languages") or [])
+    if not languages or not state.get("final_blog"):
+        return {}
+
+    start = time.perf_counter()
+    translations = translate_blog(
+        state["final_blog"],
+        languages,
+        client=_client_for(state.get("profile"), "translate")
+    )
+    latency = round(time.perf_counter() - start, 2)
+    logger.info(f"Translated into {len(translations)} language(s) in {latency}s")
+
+    metadata = {
+        **(state.get("metadata") or {}),
+        "translations": {
+            lang: {"partial": t["partial"], "untranslated_sections": t["untranslated_sections"]}
+            for lang, t in translations.items()
+        },
+    }
+    return {"translations": translations, "metadata": metadata}
+
+
 # ---------------- GRAPH ----------------
 
-def create_blog_agent():
+def create_initial_state(topic: str,
+                         platform: str,
+                         profile: str = DEFAULT_PROFILE,
+                         needs_research: bool = False,
+                         run_id: Optional[str] = None,
+                         deadline_seconds: Optional[float] = None,
+                         languages: Optional[List[str]] = None) -> dict:
+    """Build the initial graph state for one generation run.
+
+    deadline_seconds falls back to SystemConfig.DEFAULT_DEADLINE_SECONDS;
+    0/None means no deadline.
+    """
+    seconds = deadline_seconds or SystemConfig.DEFAULT_DEADLINE_SECONDS
+    return {
+        "run_id": run_id or uuid.uuid4().hex[:12],
+        "deadline": time.time() + seconds if seconds else None,
+        "topic": topic,
+        "platform": platform,
+        "profile": profile,
+        "needs_research": needs_research,
+        "mode": "",
+        "queries": [],
+        "routing": {},
+        "evidence": [],
+        "plan": None,
+        "sections": [],
+        "skipped": [],
+        "budget": {},
+        "models_used": {},
+        "quality": {},
+        "pipeline": {},
+        "reuse": {},
+        "final_blog": "",
+        "languages": list(languages or []),
+        "translations": {},
+        "md_with_placeholders": "",
+        "image_specs": [],
+        "final_images": [],
+        "metadata": {}
+    }
+
+
+def _in_run_context(node):
+    """Bind the run id and deadline from the state/payload for the node's
+    duration, so logs, LLM usage and call timeouts follow the run in any
+    thread."""
+
+    name = node.__name__.removesuffix("_node")
+
+    @functools.wraps(node)
+    def wrapper(state):
+        token = run_id_var.set(state.get("run_id") or "-")
+        deadline_token = deadline_var.set(state.get("deadline"))
+        try:
+            run_profile = profiler.active(state.get("run_id"))
+            if run_profile is None:
+                return node(state)
+            with run_profile.span(name):
+                return node(state)
+        finally:
+            deadline_var.reset(deadline_token)
+            run_id_var.reset(token)
+
+    return wrapper
+
+
+def run_agent(agent,
+              state: dict,
+              max_tokens_budget: Optional[int] = None,
+              max_cost: Optional[float] = None,
+              profile_run: bool = False) -> dict:
+    """Invoke the agent with per-run usage accounting, budgets and deadline.
+
+    Usage and budget are reported in result['metadata']['usage']. The run
+    can be cancelled from another thread with core.deadline.cancel(run_id).
+    With profile_run=True, per-node timings and a cProfile are saved to
+    PROFILE_DIR (see utils/profiler.py).
+    """
+    with run_scope(state, max_tokens_budget, max_cost, profile_run=profile_run) as run:
+        result = agent.invoke(state)
+
+    metadata = result.setdefault("metadata", {})
+    metadata["usage"] = run.summary()
+    if profile_run:
+        metadata["profile_id"] = state["run_id"]
+    return result
+
+
+@contextmanager
+def run_scope(state: dict,
+              max_tokens_budget: Optional[int] = None,
+              max_cost: Optional[float] = None,
+              profile_run: bool = False):
+    """Register the run's usage tracker and evidence store and bind its id and deadline."""
+    run_id = state["run_id"]
+    run = start_run(run_id, max_tokens=max_tokens_budget, max_cost=max_cost)
+    try:
+        open_store(run_id)
+    except Exception:
+        end_run(run_id)
+        raise
+    token = run_id_var.set(run_id)
+    deadline_token = deadline_var.set(state.get("deadline"))
+    try:
+        with profiler.profiled_run(run_id, profile_run):
+            yield run
+    finally:
+        deadline_var.reset(deadline_token)
+        run_id_var.reset(token)
+        end_run(run_id)
+        clear_cancelled(run_id)
+        release_evidence(run_id)
+
+
+def _add_planning(graph: StateGraph, pipelined: bool, fanout, target: str, reuse_blog: bool = True):
+    """Dedupe, routing, research and planning. Every path that ends with a
+    plan continues through `fanout` to the `target` node."""
+    graph.add_node("dedupe", _in_run_context(dedupe_node))
+    graph.add_node("fast_plan", _in_run_context(fast_plan_node))
+    graph.add_node("research", _in_run_context(research_node))
+
+    def select_entry(state: BlogState):
+        decision = (state.get("reuse") or {}).get("decision")
+        if decision == "blog":
+            return "translate"
+        if decision == "plan":
+            return "research" if state.get("queries") else fanout(state)
+        if get_profile(state.get("profile"))["combined_planning"]:
+            return "fast_plan"
+        return "prepare" if pipelined else "router"
+
+    def after_research(state: BlogState):
+        # The fast profile plans before research, so go straight to the fan-out
+        if state.get("plan"):
+            return fanout(state)
+        return "planner"
+
+    def after_fast_plan(state: BlogState):
+        if state["needs_research"]:
+            return "research"
+        return fanout(state)
+
+    entries = ["fast_plan", "research", target] + (["translate"] if reuse_blog else [])
+    graph.add_edge(START, "dedupe")
+
+    if pipelined:
+        graph.add_node("prepare", _in_run_context(prepare_node))
+
+        graph.add_conditional_edges("dedupe", select_entry, entries + ["prepare"])
+        graph.add_conditional_edges("prepare", fanout, [target])
+        # Only the fast profile and forced research on a reused plan reach
+        # research here, with the plan already made
+        graph.add_conditional_edges("research", fanout, [target])
+    else:
+        graph.add_node("router", _in_run_context(router_node))
+        graph.add_node("planner", _in_run_context(planner_node))
+
+        graph.add_conditional_edges("dedupe", select_entry, entries + ["router"])
+        graph.add_conditional_edges("router", route_next,
+                                    {"research": "research", "planner": "planner"})
+        graph.add_conditional_edges("research", after_research, ["planner", target])
+        graph.add_conditional_edges("planner", fanout, [target])
+
+    graph.add_conditional_edges("fast_plan", after_fast_plan, ["research", target])
+
+
+def _add_writing(graph: StateGraph):
+    """Section workers through to translation, for one platform's plan."""
+    graph.add_node("worker", _in_run_context(worker_node))
+    graph.add_node("quality", _in_run_context(quality_node))
+    graph.add_node("merger", _in_run_context(merger_node))
+    graph.add_node("seo", _in_run_context(seo_node))
+    graph.add_node("translate", _in_run_context(translate_node))
+
+    graph.add_edge("worker", "quality")
+    graph.add_edge("quality", "merger")
+    graph.add_edge("merger", "seo")
+    graph.add_edge("seo", "translate")
+    graph.add_edge("translate", END)
+
+
+def create_blog_agent(pipelined: Optional[bool] = None):
+    if pipelined is None:
+        pipelined = BlogConfig.PIPELINED_MODE
+
     graph = StateGraph(BlogState)
+    _add_planning(graph, pipelined, fanout_to_workers, "worker")
+    _add_writing(graph)
+    return graph.compile()
+
+
+# ---------------- VARIANTS ----------------
+
+MASTER_PLATFORM = "generic"
+
+
+def derive_platform_plan(master: dict, platform: str, profile_name: Optional[str] = None) -> dict:
+    """Adapt the master outline to a platform's word range and tone.
+
+    Section targets are scaled so the total lands mid-range; if that would
+    leave sections under MIN_SECTION_WORDS, middle sections are dropped,
+    keeping the first and last.
+    """
+    config = PLATFORM_CONFIGS.get(platform, PLATFORM_CONFIGS["generic"])
+    low, high = config["word_count"]
+    target = (low + high) // 2
+
+    sections = [dict(s) for s in cast(List[dict], master.get("sections", []))]
+    while len(sections) > 2 and target / len(sections) < BlogConfig.MIN_SECTION_WORDS:
+        sections.pop(-2)
+
+    planned = sum(int(s.get("target_words", 300)) for s in sections) or 1
+    scale = target / planned
+    cap = get_profile(profile_name or DEFAULT_PROFILE)["max_section_words"]
+    for s in sections:
+        words = max(BlogConfig.MIN_SECTION_WORDS, int(int(s.get("target_words", 300)) * scale))
+        s["target_words"] = min(words, cap) if cap else words
+
+    return {**master, "sections": sections, "platform": platform, "tone": config["tone"]}
+
+
+def fanout_to_platforms(state: BlogState):
+    """One Send per platform, each with the master outline adapted to it and
+    an equal share of the remaining budget."""
+    platforms = state["platforms"]
+    share = 1 / len(platforms)
+    pipeline = {**(state.get("pipeline") or {}), "variants": platforms}
+    sends = []
+    for platform in platforms:
+        plan, budget = _apply_budget(
+            derive_platform_plan(cast(dict, state["plan"]), platform, state.get("profile")), state, share=share
+        )
+        sends.append(Send("platform", {
+            **state,
+            "platform": platform,
+            "plan": plan,
+            "budget": budget,
+            "sections": [],
+            "skipped": [],
+            "pipeline": pipeline,
+        }))
+    return sends
+
+
+@functools.lru_cache(maxsize=1)
+def _platform_agent():
+    """Section workers through translation for one platform's plan."""
+    graph = StateGraph(BlogState)
+    graph.add_conditional_edges(START, fanout_to_workers, ["worker"])
+    _add_writing(graph)
+    return graph.compile()
+
+
+def platform_node(state: BlogState) -> dict:
+    """Write one platform's variant through the shared writing graph. The
+    section workers of all platforms run concurrently, each sharing the
+    global LLM slot cap."""
+    result = _platform_agent().invoke(state)
+    return {"variants": {state["platform"]: {
+        "final_blog": result.get("final_blog", ""),
+        "metadata": result.get("metadata") or {},
+        "translations": result.get("translations") or {},
+    }}}
 
-    graph.add_node("router", router_node)
-    graph.add_node("research", research_node)
-    graph.add_node("planner", planner_node)
-    graph.add_node("worker", worker_node)
-    graph.add_node("merger", merger_node)
 
-    graph.add_edge(START, "router")
-    graph.add_conditional_edges("router", route_next,
-                                {"research": "research", "planner": "planner"})
-    graph.add_edge("research", "planner")
-    graph.add_conditional_edges("planner", fanout_to_workers, ["worker"])
-    graph.add_edge("worker", "merger")
-    graph.add_edge("merger", END)
+def create_variants_agent(pipelined: Optional[bool] = None):
+    """The blog graph with its planning front half fanned out per platform
+    instead of per section."""
+    if pipelined is None:
+        pipelined = BlogConfig.PIPELINED_MODE
 
+    graph = StateGraph(BlogState)
+    _add_planning(graph, pipelined, fanout_to_platforms, "platform", reuse_blog=False)
+    graph.add_node("platform", _in_run_context(platform_node))
+    graph.add_edge("platform", END)
     return graph.compile()
+
+
+def generate_variants(topic: str,
+                      platforms: List[str],
+                      profile: str = DEFAULT_PROFILE,
+                      needs_research: bool = False,
+                      run_id: Optional[str] = None,
+                      max_tokens_budget: Optional[int] = None,
+                      max_cost: Optional[float] = None,
+                      deadline_seconds: Optional[float] = None,
+                      profile_run: bool = False,
+                      languages: Optional[List[str]] = None,
+                      agent=None) -> dict:
+    """Generate one blog per platform from a single dedupe/route/research/plan pass.
+
+    The master outline is adapted per platform (derive_platform_plan) and
+    each platform runs the same worker, quality, merge, SEO and translation
+    nodes as a single blog.
+
+    Returns {"variants": {platform: {"final_blog", "metadata", "translations"}}, "metadata"}.
+    """
+    platforms = list(dict.fromkeys(p if p in PLATFORM_CONFIGS else "generic" for p in platforms))
+    if not platforms:
+        raise ValueError("At least one platform is required.")
+
+    state = create_initial_state(topic, MASTER_PLATFORM, profile=profile, needs_research=needs_research,
+                                 run_id=run_id, deadline_seconds=deadline_seconds, languages=languages)
+    state["platforms"] = platforms
+    state["variants"] = {}
+
+    with run_scope(state, max_tokens_budget, max_cost, profile_run=profile_run) as run:
+        start = time.perf_counter()
+        result = (agent or create_variants_agent()).invoke(state)
+        variants = {platform: result["variants"][platform] for platform in platforms}
+        latency = round(time.perf_counter() - start, 2)
+        logger.info(f"Generated {len(platforms)} variant(s) in {latency}s")
+
+    master_plan = cast(dict, result.get("plan") or {})
+    return {
+        "variants": variants,
+        "metadata": {
+            "run_id": state["run_id"],
+            "topic": topic,
+            "profile": profile,
+            "platforms": platforms,
+            "master_title": master_plan.get("blog_title", "Untitled"),
+            "research_used": bool(result.get("needs_research")),
+            "routing": result.get("routing") or {},
+            "reuse": result.get("reuse") or {},
+            "partial": any(v["metadata"].get("partial") for v in variants.values()),
+            "latency_seconds": latency,
+            "usage": run.summary(),
+            **({"profile_id": state["run_id"]} if profile_run else {}),
+        },
+    }
@@ -0,0 +1,266 @@
+"""
+Cross-process coordination for multi-worker deployments.
+
+Every worker on the host shares one small SQLite database (COORDINATOR_DB,
+WAL mode), which holds:
+
+- token buckets for upstream request rates (LLM, Tavily);
+- leases capping concurrent LLM calls across all workers;
+- in-flight claims, so only one worker runs a given research query while
+  the others wait for its cached result;
+- each worker's latest metrics snapshot, merged for one /metrics scrape.
+
+Writes are short BEGIN IMMEDIATE transactions. No database lock is held
+while waiting on the network.
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from config import SystemConfig
+from core.deadline import DeadlineExceeded, time_left
+from utils.blog_store import SQLiteStore
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS leases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    expires REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_leases_name ON leases(name, expires);
+
+CREATE TABLE IF NOT EXISTS inflight (
+    key TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    expires REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS worker_metrics (
+    pid INTEGER PRIMARY KEY,
+    snapshot TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+# A bucket holds up to this many seconds' worth of requests
+_BURST_SECONDS = 5.0
+_POLL_SECONDS = (0.05, 0.5)
+
+
+def _pause(attempt: int, limit: Optional[float] = None):
+    """Jittered, growing poll interval, never past the run's deadline."""
+    low, high = _POLL_SECONDS
+    delay = min(high, low * (2 ** attempt)) * random.uniform(0.5, 1.0)
+    if limit is not None:
+        delay = min(delay, limit)
+    left = time_left()
+    if left is not None and left <= delay:
+        raise DeadlineExceeded("Deadline reached waiting on a shared limit")
+    time.sleep(delay)
+
+
+class Coordinator(SQLiteStore):
+    """Shared limits, in-flight claims and metrics for all workers on a host."""
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__(db_path or SystemConfig.COORDINATOR_DB)
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    # ---------------- Rate limits ----------------
+
+    def take_token(self, name: str, per_minute: float) -> float:
+        """Take one request token. Returns 0 if granted, else seconds until one is due."""
+        rate = per_minute / 60.0
+        burst = max(1.0, rate * _BURST_SECONDS)
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE name = ?", (name,)).fetchone()
+            tokens = burst if row is None else min(burst, row["tokens"] + (now - row["updated"]) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (name, tokens, now)
+            )
+        return wait
+
+    def wait_for_token(self, name: str, per_minute: float):
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            wait = self.take_token(name, per_minute)
+            if wait == 0:
+                break
+            _pause(attempt, limit=wait)
+            attempt += 1
+        if attempt:
+            metrics.observe(f"coordinator.rate_wait_seconds.{name}", time.perf_counter() - start)
+
+    # ---------------- Leases ----------------
+
+    def acquire_lease(self, name: str, limit: int, ttl: float) -> Optional[int]:
+        now = time.time()
+        with self._write() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND expires < ?", (name, now))
+            held = conn.execute("SELECT COUNT(*) FROM leases WHERE name = ?", (name,)).fetchone()[0]
+            if held >= limit:
+                return None
+            cursor = conn.execute(
+                "INSERT INTO leases (name, pid, expires) VALUES (?, ?, ?)", (name, os.getpid(), now + ttl)
+            )
+            return cursor.lastrowid
+
+    def release_lease(self, lease_id: int):
+        with self._write() as conn:
+            conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+
+    @contextmanager
+    def lease(self, name: str, limit: int, ttl: float = SystemConfig.LEASE_TTL_SECONDS):
+        """Hold one of `limit` host-wide slots; waits no longer than the run's deadline."""
+        start = time.perf_counter()
+        attempt = 0
+        lease_id = self.acquire_lease(name, limit, ttl)
+        while lease_id is None:
+            _pause(attempt)
+            attempt += 1
+            lease_id = self.acquire_lease(name, limit, ttl)
+        if attempt:
+            metrics.observe(f"coordinator.lease_wait_seconds.{name}", time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self.release_lease(lease_id)
+
+    # ---------------- In-flight dedupe ----------------
+
+    def claim(self, key: str, ttl: float = SystemConfig.LEASE_TTL_SECONDS) -> bool:
+        now = time.time()
+        with self._write() as conn:
+            conn.execute("DELETE FROM inflight WHERE key = ? AND expires < ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO inflight (key, pid, expires) VALUES (?, ?, ?)", (key, os.getpid(), now + ttl)
+            )
+            return cursor.rowcount == 1
+
+    def unclaim(self, key: str):
+        with self._write() as conn:
+            conn.execute("DELETE FROM inflight WHERE key = ? AND pid = ?", (key, os.getpid()))
+
+    def claimed(self, key: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM inflight WHERE key = ? AND expires >= ?", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def single_flight(self, key: str, load: Callable, compute: Callable,
+                      ttl: float = SystemConfig.LEASE_TTL_SECONDS):
+        """Run compute() in one worker at a time for `key`. Others poll load()
+        (e.g. the cache the leader writes to) until the leader finishes, and
+        compute themselves only if it left nothing behind."""
+        if self.claim(key, ttl):
+            try:
+                return compute()
+            finally:
+                self.unclaim(key)
+
+        metrics.incr("coordinator.inflight_waits")
+        attempt = 0
+        while self.claimed(key):
+            value = load()
+            if value is not None:
+                return value
+            _pause(attempt)
+            attempt += 1
+
+        value = load()
+        return value if value is not None else compute()
+
+    # ---------------- Metrics ----------------
+
+    def publish_metrics(self, snapshot: dict):
+        with self._write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO worker_metrics (pid, snapshot, updated) VALUES (?, ?, ?)",
+                (os.getpid(), json.dumps(snapshot), time.time())
+            )
+
+    def worker_metrics(self, max_age: float) -> Dict[int, dict]:
+        """Latest snapshot of every worker that published within max_age seconds."""
+        rows = self._conn().execute(
+            "SELECT pid, snapshot FROM worker_metrics WHERE updated >= ?", (time.time() - max_age,)
+        ).fetchall()
+        return {row["pid"]: json.loads(row["snapshot"]) for row in rows}
+
+    def forget_worker(self, pid: int):
+        """Drop an exited worker's leases, claims and metrics."""
+        with self._write() as conn:
+            conn.execute("DELETE FROM leases WHERE pid = ?", (pid,))
+            conn.execute("DELETE FROM inflight WHERE pid = ?", (pid,))
+            conn.execute("DELETE FROM worker_metrics WHERE pid = ?", (pid,))
+
+
+# ---------------- Process-wide access ----------------
+
+_coordinator: Optional[Coordinator] = None
+_coordinator_lock = threading.Lock()
+
+
+def get_coordinator() -> Coordinator:
+    global _coordinator
+    if _coordinator is None:
+        with _coordinator_lock:
+            if _coordinator is None:
+                _coordinator = Coordinator()
+    return _coordinator
+
+
+def rate_limit(name: str, per_minute: float):
+    """Wait for a host-wide request token; no-op when per_minute is 0."""
+    if per_minute > 0:
+        get_coordinator().wait_for_token(name, per_minute)
+
+
+@contextmanager
+def llm_permit():
+    """Host-wide limits around one LLM request: the LLM_REQUESTS_PER_MINUTE
+    rate and, in multi-worker mode, MAX_CONCURRENT_LLM_CALLS across workers."""
+    rate_limit("llm", SystemConfig.LLM_REQUESTS_PER_MINUTE)
+    if not SystemConfig.MULTI_WORKER:
+        yield
+        return
+    with get_coordinator().lease("llm", SystemConfig.MAX_CONCURRENT_LLM_CALLS):
+        yield
@@ -0,0 +1,64 @@
+"""
+End-to-end deadlines and cancellation for generation runs.
+
+The run's absolute deadline (epoch seconds) lives in the graph state and
+is bound to `deadline_var` while a node runs, so LLM and Tavily calls can
+size their timeouts from the time actually left. Cancelling a run (e.g.
+the client disconnected) makes the time left zero.
+"""
+
+import time
+import threading
+import contextvars
+from typing import Optional
+
+from utils.helpers import run_id_var
+
+
+deadline_var: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+_cancelled: set = set()
+_cancelled_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when there is not enough time left to start a call."""
+
+
+def cancel(run_id: str):
+    with _cancelled_lock:
+        _cancelled.add(run_id)
+
+
+def clear(run_id: str):
+    with _cancelled_lock:
+        _cancelled.discard(run_id)
+
+
+def is_cancelled(run_id: Optional[str] = None) -> bool:
+    run_id = run_id or run_id_var.get()
+    with _cancelled_lock:
+        return run_id in _cancelled
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the current run's deadline; None when unbounded."""
+    if is_cancelled():
+        return 0.0
+    deadline = deadline_var.get()
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def call_timeout(default: float, minimum: float = 1.0) -> float:
+    """Timeout for the next call: the default, capped by the time left.
+
+    Raises DeadlineExceeded when less than `minimum` seconds remain.
+    """
+    left = time_left()
+    if left is None:
+        return default
+    if left < minimum:
+        raise DeadlineExceeded(f"{max(left, 0):.1f}s left before deadline")
+    return min(default, left)
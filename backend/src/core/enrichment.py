@@ -0,0 +1,365 @@
+"""
+Full-page research enrichment.
+
+Top result URLs are fetched concurrently (bounded pool, per-host limits,
+timeouts). Main text is extracted while the body streams in, so a page
+never has to fit in memory. It is chunked, and only the best chunks per
+page go into the graph state. Extracted pages are cached on disk per URL
+with their ETag: fresh entries are reused outright, stale ones are
+revalidated with If-None-Match.
+
+Redirects are followed by hand, and every hop must be an http(s) URL whose
+host resolves only to public addresses, so result URLs cannot reach
+loopback, private or link-local services.
+"""
+
+import re
+import json
+import time
+import codecs
+import hashlib
+import ipaddress
+import logging
+import os
+import socket
+import tempfile
+import threading
+from concurrent.futures import wait
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Union
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from config import BlogConfig, SystemConfig
+from core.deadline import call_timeout, time_left
+from utils.helpers import ContextThreadPoolExecutor
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside",
+              "form", "svg", "iframe", "template", "button", "select"}
+_BLOCK_TAGS = {"p", "li", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote",
+               "td", "th", "dd", "dt", "figcaption", "div", "section", "article", "main", "br", "tr"}
+_MAIN_TAGS = {"article", "main"}
+_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+_MAX_REDIRECTS = 5
+
+
+# ---------------- EXTRACTION ----------------
+
+class MainTextExtractor(HTMLParser):
+    """Incremental main-text extractor; feed() it decoded chunks.
+
+    Boilerplate containers are skipped, and text inside <article>/<main>
+    is preferred when there is enough of it. Collection stops at max_chars.
+    """
+
+    def __init__(self, max_chars: int = BlogConfig.ENRICH_MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title = ""
+        self.chars = 0
+
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._in_title = False
+        self._buffer: List[str] = []
+        self._paragraphs: List[str] = []
+        self._main_paragraphs: List[str] = []
+
+    @property
+    def full(self) -> bool:
+        return self.chars >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        if tag in _BLOCK_TAGS:
+            self._flush()
+        if tag in _MAIN_TAGS:
+            self._main_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in _BLOCK_TAGS:
+            self._flush()
+        if tag in _MAIN_TAGS and self._main_depth:
+            self._main_depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title = (self.title + data).strip()[:300]
+        elif not self._skip_depth and not self.full:
+            self._buffer.append(data)
+
+    def _flush(self):
+        text = " ".join("".join(self._buffer).split())
+        self._buffer = []
+        # Drop menu items, buttons and other fragments
+        if len(text.split()) < 4:
+            return
+        self._paragraphs.append(text)
+        if self._main_depth:
+            self._main_paragraphs.append(text)
+        self.chars += len(text)
+
+    def text(self) -> str:
+        self._flush()
+        main_chars = sum(len(p) for p in self._main_paragraphs)
+        paragraphs = self._main_paragraphs if main_chars >= 500 else self._paragraphs
+        return "\n\n".join(paragraphs)
+
+
+def chunk_text(text: str, chunk_words: int = BlogConfig.ENRICH_CHUNK_WORDS) -> List[str]:
+    """Split text into ~chunk_words chunks along paragraph boundaries."""
+    chunks: List[str] = []
+    current: List[str] = []
+
+    for paragraph in text.split("\n\n"):
+        words = paragraph.split()
+        while words:
+            room = chunk_words - len(current)
+            current.extend(words[:room])
+            words = words[room:]
+            if len(current) >= chunk_words:
+                chunks.append(" ".join(current))
+                current = []
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _terms(text: str) -> Set[str]:
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def select_chunks(chunks: List[str], query: str, k: int = BlogConfig.ENRICH_CHUNKS_PER_DOC) -> List[str]:
+    """The k chunks sharing the most terms with the query, best first."""
+    terms = _terms(query)
+    scored = sorted(
+        enumerate(chunks),
+        key=lambda item: (-len(terms & _terms(item[1])), item[0])
+    )
+    return [chunk for _, chunk in scored[:k]]
+
+
+# ---------------- FETCHING ----------------
+
+class BlockedURL(ValueError):
+    """A URL (or a redirect hop) that is not a public http(s) address."""
+
+
+def _is_public(ip: Union[ipaddress.IPv4Address, ipaddress.IPv6Address]) -> bool:
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global
+
+
+class PageFetcher:
+    """Concurrent page fetcher with per-host limits and an on-disk cache.
+
+    allow_private skips the public-address check, for local fixtures only.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 max_workers: int = BlogConfig.ENRICH_MAX_WORKERS,
+                 per_host: int = BlogConfig.ENRICH_PER_HOST,
+                 timeout: float = BlogConfig.ENRICH_TIMEOUT_SECONDS,
+                 max_bytes: int = BlogConfig.ENRICH_MAX_BYTES,
+                 max_chars: int = BlogConfig.ENRICH_MAX_CHARS,
+                 allow_private: bool = False):
+        self.cache_dir = Path(cache_dir or Path(SystemConfig.CACHE_DIR) / "pages")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.allow_private = allow_private
+
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._hosts_lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return self._hosts[host]
+
+    def _cache_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]}.json"
+
+    def _load(self, url: str) -> Optional[dict]:
+        path = self._cache_path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return doc if doc.get("url") == url else None
+
+    def _store(self, doc: dict):
+        # Write-then-rename so concurrent readers never see a partial file
+        path = self._cache_path(doc["url"])
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(doc, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache page {doc['url']}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _check_url(self, url: str):
+        """Raise BlockedURL unless url is http(s) and its host resolves only
+        to public addresses."""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise BlockedURL(f"Not an http(s) URL: {url}")
+        if self.allow_private:
+            return
+
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        for *_, sockaddr in socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP):
+            ip = ipaddress.ip_address(sockaddr[0].split("%")[0])
+            if not _is_public(ip):
+                raise BlockedURL(f"{parsed.hostname} resolves to non-public address {ip}")
+
+    def _get(self, url: str, headers: dict, timeout: float) -> requests.Response:
+        """Streaming GET that follows redirects itself, checking every hop."""
+        target = url
+        for _ in range(_MAX_REDIRECTS + 1):
+            self._check_url(target)
+            response = requests.get(target, headers=headers, stream=True, allow_redirects=False,
+                                    timeout=(min(3.05, timeout), timeout))
+            if not response.is_redirect:
+                return response
+            target = urljoin(target, response.headers["Location"])
+            response.close()
+        raise requests.TooManyRedirects(f"More than {_MAX_REDIRECTS} redirects from {url}")
+
+    def fetch(self, url: str) -> Optional[dict]:
+        """Return {url, title, text, etag, fetched_at}, or None for non-text pages."""
+        cached = self._load(url)
+        if cached and time.time() - cached["fetched_at"] < SystemConfig.CACHE_TTL_HOURS * 3600:
+            metrics.incr("enrich.cache_hits")
+            return cached
+
+        headers = {"User-Agent": "Draftly/1.0 (+research enrichment)"}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+
+        with self._host_slot(url):
+            timeout = call_timeout(self.timeout)
+            with self._get(url, headers, timeout) as response:
+                if response.status_code == 304 and cached:
+                    metrics.incr("enrich.revalidated")
+                    cached["fetched_at"] = time.time()
+                    self._store(cached)
+                    return cached
+
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "").lower()
+                if "html" not in content_type and "text/plain" not in content_type:
+                    return None
+
+                title, text = self._extract(response, content_type, timeout)
+                etag = response.headers.get("ETag")
+
+        metrics.incr("enrich.fetched")
+        doc = {"url": url, "title": title, "text": text, "etag": etag, "fetched_at": time.time()}
+        self._store(doc)
+        return doc
+
+    def _extract(self, response, content_type: str, timeout: float) -> tuple[str, str]:
+        encoding = response.encoding if "charset" in content_type else "utf-8"
+        try:
+            decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        parser = MainTextExtractor(self.max_chars)
+        received = 0
+        started = time.monotonic()
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            received += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            # Bounded by bytes, extracted text and wall time, whichever comes first
+            if received >= self.max_bytes or parser.full or time.monotonic() - started > timeout:
+                break
+
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+        return parser.title, parser.text()
+
+    def fetch_many(self, urls: List[str]) -> Dict[str, dict]:
+        """Fetch URLs concurrently; failures and pages unfinished at the deadline are left out."""
+        urls = list(dict.fromkeys(u for u in urls if u.startswith(("http://", "https://"))))
+        if not urls:
+            return {}
+
+        pool = ContextThreadPoolExecutor(max_workers=min(self.max_workers, len(urls)))
+        try:
+            futures = {pool.submit(self.fetch, url): url for url in urls}
+            left = time_left()
+            done, not_done = wait(futures, timeout=None if left is None else max(left, 0))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        docs = {}
+        for future in done:
+            url = futures[future]
+            try:
+                doc = future.result()
+            except Exception as e:
+                metrics.incr("enrich.failures")
+                logger.warning(f"Failed to fetch {url}: {e}")
+                continue
+            if doc and doc["text"]:
+                docs[url] = doc
+
+        if not_done:
+            logger.warning(f"Enrichment deadline reached, dropped {len(not_done)} page(s)")
+        return docs
+
+
+_fetcher: Optional[PageFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> PageFetcher:
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = PageFetcher()
+        return _fetcher
+
+
+def enrich_evidence(evidence: List[dict], query: str,
+                    fetcher: Optional[PageFetcher] = None) -> List[dict]:
+    """Attach the best full-page chunks to the top evidence items."""
+    fetcher = fetcher or get_fetcher()
+    urls = [e.get("url", "") for e in evidence[:BlogConfig.ENRICH_TOP_URLS]]
+    docs = fetcher.fetch_many(urls)
+
+    enriched = []
+    for item in evidence:
+        doc = docs.get(item.get("url", ""))
+        if doc:
+            item = {**item, "chunks": select_chunks(chunk_text(doc["text"]), query)}
+        enriched.append(item)
+
+    logger.info(f"Enriched {len(docs)}/{len(set(urls))} result(s) with full-page text")
+    return enriched
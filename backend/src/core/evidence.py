@@ -0,0 +1,159 @@
+"""
+Per-run evidence store.
+
+Research results are stored once per run as slotted records, deduplicated by
+URL. Graph state carries only their integer ids, and each worker's Send
+payload carries just the few ids selected for its section, so evidence is
+never duplicated per section or re-serialized with every payload.
+
+Stores live in this process, keyed by the server-generated run id, for the
+duration of the run (opened and released by run_scope in core.blog_agent).
+Ids are only meaningful inside that run: looking up a run without a store,
+or ids its store does not hold, raises UnknownEvidence instead of quietly
+writing sections without their evidence.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.helpers import run_id_var
+
+_TERM_RE = re.compile(r"[a-z0-9][a-z0-9+#-]*")
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "into", "that", "this", "what", "how",
+    "why", "are", "was", "were", "you", "your", "about", "its", "their", "can",
+}
+
+
+def _terms(text: str) -> frozenset:
+    return frozenset(t for t in _TERM_RE.findall(text.lower()) if len(t) > 2 and t not in _STOPWORDS)
+
+
+class UnknownEvidence(LookupError):
+    """Raised for a run with no open store, or ids its store does not hold."""
+
+
+class EvidenceRecord:
+    """One research result. Slotted: no per-record __dict__."""
+
+    __slots__ = ("title", "url", "snippet", "chunks")
+
+    def __init__(self, title: str, url: str, snippet: str, chunks: Tuple[str, ...] = ()):
+        self.title = title
+        self.url = url
+        self.snippet = snippet
+        self.chunks = chunks
+
+    @classmethod
+    def from_dict(cls, item: dict) -> "EvidenceRecord":
+        return cls(
+            item.get("title", "") or "",
+            item.get("url", "") or "",
+            item.get("snippet", "") or "",
+            tuple(item.get("chunks") or ()),
+        )
+
+    def to_dict(self) -> dict:
+        item = {"title": self.title, "url": self.url, "snippet": self.snippet}
+        if self.chunks:
+            item["chunks"] = list(self.chunks)
+        return item
+
+    @property
+    def text(self) -> str:
+        """Chunks from page enrichment when present, else the snippet."""
+        return " ".join(self.chunks) if self.chunks else self.snippet
+
+
+class EvidenceStore:
+    """Append-only evidence for one run; ids are list indexes."""
+
+    __slots__ = ("_records", "_by_url", "_lock")
+
+    def __init__(self):
+        self._records: List[EvidenceRecord] = []
+        self._by_url: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, items: Iterable[dict]) -> List[int]:
+        """Store results (deduplicated by URL) and return their ids, in order."""
+        ids: List[int] = []
+        with self._lock:
+            for item in items:
+                url = item.get("url", "")
+                known = self._by_url.get(url) if url else None
+                if known is None:
+                    known = len(self._records)
+                    self._records.append(EvidenceRecord.from_dict(item))
+                    if url:
+                        self._by_url[url] = known
+                elif item.get("chunks") and not self._records[known].chunks:
+                    # A later, enriched copy of the same page wins
+                    self._records[known] = EvidenceRecord.from_dict(item)
+                if known not in ids:
+                    ids.append(known)
+        return ids
+
+    def get(self, ids: Sequence[int]) -> List[EvidenceRecord]:
+        records = self._records
+        missing = [i for i in ids if not 0 <= i < len(records)]
+        if missing:
+            raise UnknownEvidence(f"Evidence ids {missing} are not in this run's store")
+        return [records[i] for i in ids]
+
+    def as_dicts(self, ids: Sequence[int]) -> List[dict]:
+        return [r.to_dict() for r in self.get(ids)]
+
+    def select(self, ids: Sequence[int], text: str, k: int) -> List[int]:
+        """The k ids most relevant to `text` by term overlap; research order breaks ties."""
+        return self.select_many(ids, [text], k)[0]
+
+    def select_many(self, ids: Sequence[int], texts: Sequence[str], k: int) -> List[List[int]]:
+        """select() for several texts (e.g. every section of a plan), tokenizing
+        each record once. Ranks on title + snippet; chunks were already picked
+        by relevance at enrichment. Term sets are not kept on the records:
+        that would cost several times the memory of the evidence itself."""
+        if len(ids) <= k:
+            return [list(ids) for _ in texts]
+        record_terms = [_terms(f"{r.title} {r.snippet}") for r in self.get(ids)]
+
+        selected = []
+        for text in texts:
+            wanted = _terms(text)
+            overlap = [len(wanted & terms) for terms in record_terms]
+            ranked = sorted(range(len(overlap)), key=lambda pos: (-overlap[pos], pos))
+            selected.append([ids[pos] for pos in ranked[:k]])
+        return selected
+
+
+# ---------------- Registry ----------------
+
+_stores: Dict[str, EvidenceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(run_id: str) -> EvidenceStore:
+    """Create the run's store; a run id is never shared by two live runs."""
+    with _stores_lock:
+        if run_id in _stores:
+            raise RuntimeError(f"Evidence store for run {run_id} is already open")
+        store = _stores[run_id] = EvidenceStore()
+    return store
+
+
+def store_for(run_id: Optional[str] = None) -> EvidenceStore:
+    """The run's open store; defaults to the bound run id."""
+    run_id = run_id or run_id_var.get()
+    store = _stores.get(run_id)
+    if store is None:
+        raise UnknownEvidence(f"No evidence store is open for run {run_id} in this process")
+    return store
+
+
+def release(run_id: str):
+    with _stores_lock:
+        _stores.pop(run_id, None)
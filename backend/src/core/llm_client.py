@@ -3,16 +3,59 @@ LLM client using OpenRouter with retry and fallback support.
 """
 
 import logging
+import re
+import threading
+import time
 import requests
+from contextlib import contextmanager
 import json
-from typing import List, Dict, Any, Optional
-from tenacity import retry, stop_after_attempt, wait_exponential
+from typing import List, Dict, Any, Optional, Type
+from pydantic import BaseModel, ValidationError
+from tenacity import Retrying, stop_after_attempt, wait_exponential, retry_if_not_exception_type
 
-from config import APIConfig, ModelConfig
+from config import APIConfig, ModelConfig, SystemConfig
+from core.coordinator import llm_permit
+from core.deadline import DeadlineExceeded, call_timeout, time_left
+from core.model_selector import model_stats, model_selector
+from core.usage import get_run
+from utils.helpers import run_id_var
+from utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 
+# Global limiter: every LLM request in the process holds a slot while in flight
+_llm_slots = threading.BoundedSemaphore(SystemConfig.MAX_CONCURRENT_LLM_CALLS)
+
+
+@contextmanager
+def _llm_slot():
+    """Hold a global LLM slot, waiting no longer than the run's deadline.
+    The process slot is taken first, then the host-wide permit (rate limit and,
+    with several workers, the shared concurrency cap)."""
+    left = time_left()
+    start = time.perf_counter()
+    if not _llm_slots.acquire(timeout=None if left is None else max(left, 0)):
+        raise DeadlineExceeded("Deadline reached waiting for an LLM slot")
+    waited = time.perf_counter() - start
+    if waited > 0.01:
+        metrics.observe("llm.slot_wait_seconds", waited)
+    try:
+        with llm_permit():
+            yield
+    finally:
+        _llm_slots.release()
+
+
+def _stop_at_deadline(retry_state) -> bool:
+    """Stop retrying when the backoff plus one attempt would overrun the deadline."""
+    left = time_left()
+    if left is None:
+        return False
+    sleep = getattr(retry_state, "upcoming_sleep", 0) or 0
+    return left < sleep + ModelConfig.MIN_ATTEMPT_SECONDS
+
+
 class LLMClient:
     """Unified OpenRouter client."""
 
@@ -31,48 +74,184 @@ class LLMClient:
         self.total_calls = 0
         self.total_tokens = 0
 
-    @retry(stop=stop_after_attempt(3),
-           wait=wait_exponential(multiplier=1, min=2, max=8),
-           reraise=True)
     def generate(self,
                  messages: List[Dict[str, str]],
-                 json_mode: bool = False) -> str:
+                 json_mode: bool = False,
+                 max_tokens: Optional[int] = None) -> str:
+        """Chat completion with retries bounded by the run's deadline.
+
+        Each attempt's timeout is capped by the time left, and a retry is
+        not attempted when it could not start before the deadline.
+        """
 
         payload = {
             "model": self.model,
             "messages": messages,
             "temperature": self.temperature,
-            "max_tokens": self.max_tokens
+            "max_tokens": max_tokens or self.max_tokens
         }
 
         if json_mode:
             payload["response_format"] = {"type": "json_object"}
 
+        # Ask OpenRouter for detailed usage (incl. cached prompt tokens)
+        payload["usage"] = {"include": True}
+
+        for attempt in Retrying(stop=stop_after_attempt(ModelConfig.MAX_ATTEMPTS) | _stop_at_deadline,
+                                wait=wait_exponential(multiplier=1, min=2, max=8),
+                                retry=retry_if_not_exception_type(DeadlineExceeded),
+                                reraise=True):
+            with attempt:
+                return self._post(payload)
+
+    def _post(self, payload: dict) -> str:
+        with _llm_slot():
+            return self._post_unlimited(payload)
+
+    def _post_unlimited(self, payload: dict) -> str:
+        timeout = call_timeout(ModelConfig.REQUEST_TIMEOUT, ModelConfig.MIN_ATTEMPT_SECONDS)
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
 
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=60
-        )
+        start = time.perf_counter()
+        try:
+            response = requests.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=timeout
+            )
+
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            model_stats.record(self.model, time.perf_counter() - start, ok=False)
+            raise
 
-        response.raise_for_status()
-        data = response.json()
+        model_stats.record(self.model, time.perf_counter() - start, ok=True)
 
+        usage = data.get("usage") or {}
         self.total_calls += 1
-        self.total_tokens += data.get("usage", {}).get("total_tokens", 0)
+        self.total_tokens += usage.get("total_tokens", 0)
+
+        run = get_run(run_id_var.get())
+        if run is not None:
+            run.record(self.model, usage)
 
         return data["choices"][0]["message"]["content"]
 
 
+# ---------------- STRUCTURED OUTPUT ----------------
+
+class StructuredOutputError(ValueError):
+    """Raised when a structured response cannot be parsed or validated."""
+
+
+_FENCE_RE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"', "\u2018": "'", "\u2019": "'"})
+
+
+def _find_json_block(text: str) -> Optional[str]:
+    """Return the first balanced {...} or [...] block, ignoring braces in strings."""
+    start = next((i for i, ch in enumerate(text) if ch in "{["), None)
+    if start is None:
+        return None
+
+    stack = []
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not stack or stack.pop() != ch:
+                return None
+            if not stack:
+                return text[start:i + 1]
+
+    # Truncated output: close whatever is still open
+    if in_string:
+        return None
+    return text[start:] + "".join(reversed(stack))
+
+
+def _repair_json(text: str) -> str:
+    """Apply cheap, conservative fixes for common LLM JSON slips."""
+    text = text.translate(_SMART_QUOTES)
+    text = _TRAILING_COMMA_RE.sub(r"\1", text)
+    text = re.sub(r"\bTrue\b", "true", text)
+    text = re.sub(r"\bFalse\b", "false", text)
+    text = re.sub(r"\bNone\b", "null", text)
+    return text
+
+
+def extract_json(raw: str) -> Any:
+    """Tolerantly extract a JSON value from an LLM response.
+
+    Handles code fences, leading/trailing prose, trailing commas and
+    truncated closing brackets. Raises StructuredOutputError on failure.
+    """
+    text = _FENCE_RE.sub("", raw or "").strip()
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    block = _find_json_block(text)
+    if block is None:
+        raise StructuredOutputError("No JSON object found in response.")
+
+    for candidate in (block, _repair_json(block)):
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError as e:
+            error = e
+
+    raise StructuredOutputError(f"Invalid JSON: {error}")
+
+
+def _parse_structured(raw: str,
+                      response_model: Optional[Type[BaseModel]]) -> Dict[str, Any]:
+    data = extract_json(raw)
+    if response_model is None:
+        if not isinstance(data, dict):
+            raise StructuredOutputError("Expected a JSON object.")
+        return data
+
+    try:
+        return response_model.model_validate(data).model_dump()
+    except ValidationError as e:
+        raise StructuredOutputError(str(e)) from e
+
+
 def generate_structured(client: LLMClient,
                         messages: List[Dict[str, str]],
-                        output_schema: str) -> Dict[str, Any]:
-    """Force structured JSON response."""
+                        output_schema: str,
+                        response_model: Optional[Type[BaseModel]] = None) -> Dict[str, Any]:
+    """Force structured JSON response, validated against response_model.
+
+    On a parse or validation failure a short targeted re-ask is sent with
+    the error, instead of failing the whole pipeline.
+    """
+
+    name = response_model.__name__ if response_model else "raw"
+    metrics.incr(f"structured.{name}.calls")
 
     system_instruction = {
         "role": "system",
@@ -82,15 +261,48 @@ def generate_structured(client: LLMClient,
     messages = [system_instruction] + messages
     raw = client.generate(messages, json_mode=True)
 
-    cleaned = raw.strip().replace("```json", "").replace("```", "")
-    return json.loads(cleaned)
+    reasks = 0
+    while True:
+        try:
+            return _parse_structured(raw, response_model)
+        except StructuredOutputError as e:
+            metrics.incr(f"structured.{name}.parse_failures")
+            if reasks >= ModelConfig.STRUCTURED_REPAIR_ATTEMPTS:
+                metrics.incr(f"structured.{name}.failures")
+                raise
+
+            reasks += 1
+            logger.warning(f"Structured output for {name} invalid, re-asking: {e}")
+            metrics.incr(f"structured.{name}.reasks")
+            raw = client.generate(messages + [
+                {"role": "assistant", "content": raw[:2000]},
+                {"role": "user", "content": (
+                    f"Your previous response was invalid: {str(e)[:500]}\n"
+                    f"Return ONLY the corrected JSON matching the schema:\n{output_schema}"
+                )}
+            ], json_mode=True)
+
+
+_clients: Dict[str, LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(model: str) -> LLMClient:
+    """Return the shared client for a model, creating it on first use."""
+    with _clients_lock:
+        if model not in _clients:
+            _clients[model] = LLMClient(model=model)
+        return _clients[model]
 
 
 def create_client_for_task(task: str) -> LLMClient:
     """Create LLM client for specific task with optimized model.
-    
+
+    With ModelConfig.ADAPTIVE_SELECTION the model is chosen from the
+    task's candidates using live latency/error statistics.
+
     Args:
-        task: Task name (router, research, planner, writer, image_plan)
+        task: Task name (router, research, planner, writer, quality)
         
     Returns:
         LLMClient configured with task-appropriate model
@@ -100,10 +312,13 @@ def create_client_for_task(task: str) -> LLMClient:
         "research": ModelConfig.RESEARCH_MODEL,
         "planner": ModelConfig.PLANNER_MODEL,
         "writer": ModelConfig.WRITER_MODEL,
-        "writer": ModelConfig.WRITER_MODEL,
+        "quality": ModelConfig.ROUTER_MODEL,
+        "translate": ModelConfig.TRANSLATION_MODEL,
     }
     
     model = model_map.get(task, ModelConfig.BACKUP_MODEL)
+    if ModelConfig.ADAPTIVE_SELECTION:
+        model = model_selector.choose(task, default=model)
     logger.debug(f"Creating client for task '{task}' with model '{model}'")
     
-    return LLMClient(model=model)
+    return get_client(model)
@@ -0,0 +1,154 @@
+"""
+Local router tier: cached decisions plus a lexical classifier.
+
+Answers the router question (needs_research / mode / queries) without an
+LLM call when the topic text makes the answer obvious. Low-confidence
+topics are left to the LLM router.
+"""
+
+import re
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from config import SystemConfig
+from utils.helpers import CacheManager
+
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "with",
+    "about", "your", "my", "our", "is", "are", "at", "by", "from",
+}
+
+# (pattern, weight) per routing mode
+_SIGNALS: Dict[str, List[Tuple[re.Pattern, float]]] = {
+    "open_book": [
+        (re.compile(r"\b(latest|news|today|this (week|month|year)|recent(ly)?|just released)\b"), 2.0),
+        (re.compile(r"\b20[2-9]\d\b"), 2.0),
+        (re.compile(r"\b(trends?|announce(d|ment)|release[sd]?|roadmap|ranking|rankings)\b"), 1.5),
+        (re.compile(r"\b(top \d+|best \w+ (of|in) \d{4}|market|prices?|election)\b"), 1.0),
+    ],
+    "hybrid": [
+        (re.compile(r"\b(tools|frameworks|libraries|platforms|alternatives)\b"), 1.5),
+        (re.compile(r"\b(statistics|stats|data|benchmarks?|case stud(y|ies))\b"), 1.5),
+        (re.compile(r"\b(vs\.?|versus|compared?|comparison)\b"), 1.0),
+        (re.compile(r"\b(state of|industry|companies|startups?)\b"), 1.0),
+    ],
+    "closed_book": [
+        (re.compile(r"\b(what is|what are|introduction|intro to|basics|fundamentals)\b"), 2.0),
+        (re.compile(r"\b(beginners?|guide to|how to|explained|understanding)\b"), 1.5),
+        (re.compile(r"\b(tips|principles|habits|mindset|lessons|why)\b"), 1.0),
+    ],
+}
+
+
+# Words that give a topic a direction: "from Java to Python" is not
+# "from Python to Java"
+_DIRECTIONAL = {"from", "to", "into", "onto", "vs", "versus", "over", "than"}
+
+
+def _topic_tokens(topic: str) -> List[str]:
+    return re.findall(r"[a-z0-9+#]+", topic.lower())
+
+
+def normalize_topic(topic: str) -> str:
+    """Normalized form used as a cache key: stopwords dropped, word order
+    and directional words kept."""
+    return " ".join(t for t in _topic_tokens(topic) if t not in _STOPWORDS or t in _DIRECTIONAL)
+
+
+def topic_terms(topic: str) -> str:
+    """Order-insensitive content words, for finding paraphrase candidates."""
+    return " ".join(sorted(t for t in _topic_tokens(topic) if t not in _STOPWORDS and t not in _DIRECTIONAL))
+
+
+def topic_direction(topic: str) -> Tuple[str, ...]:
+    """Each directional word with the content word after it, in order
+    (("from java", "to python")); equal for topics that point the same way."""
+    tokens = normalize_topic(topic).split()
+    return tuple(
+        f"{t} {n}" for t, n in zip(tokens, tokens[1:])
+        if t in _DIRECTIONAL and n not in _DIRECTIONAL
+    )
+
+
+def default_queries(topic: str, mode: str) -> List[str]:
+    year = str(date.today().year)
+    suffixes = ["latest", year, "news"] if mode == "open_book" else ["examples", "statistics", "best practices"]
+
+    lowered = topic.lower()
+    queries = [topic]
+    queries += [f"{topic} {suffix}" for suffix in suffixes if suffix not in lowered]
+    return queries[:3]
+
+
+class LocalRouter:
+    """Cache + heuristic router in front of the LLM router."""
+
+    MEMORY_ENTRIES = 1024
+
+    def __init__(self):
+        self.cache = CacheManager()
+        self._memory: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, topic: str) -> str:
+        digest = hashlib.sha1(normalize_topic(topic).encode("utf-8")).hexdigest()[:16]
+        return f"router_{digest}"
+
+    def lookup(self, topic: str) -> Optional[dict]:
+        """Return a previously cached router decision for this topic."""
+        key = self._key(topic)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and time.time() - entry[0] < SystemConfig.CACHE_TTL_HOURS * 3600:
+                self._memory.move_to_end(key)
+                return entry[1]
+
+        decision = self.cache.get(key)
+        if decision:
+            self._remember(key, decision)
+        return decision
+
+    def store(self, topic: str, decision: dict):
+        key = self._key(topic)
+        self._remember(key, decision)
+        self.cache.set(key, decision)
+
+    def _remember(self, key: str, decision: dict):
+        with self._lock:
+            self._memory[key] = (time.time(), decision)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def classify(self, topic: str) -> Tuple[dict, float]:
+        """Classify a topic lexically.
+
+        Returns:
+            (decision, confidence) where confidence is in [0, 1]
+        """
+        text = topic.lower()
+        scores = {
+            mode: sum(weight for pattern, weight in signals if pattern.search(text))
+            for mode, signals in _SIGNALS.items()
+        }
+
+        total = sum(scores.values())
+        if total == 0:
+            mode, confidence = "closed_book", 0.4
+        else:
+            mode = max(scores, key=lambda m: scores[m])
+            best = scores[mode]
+            confidence = (best / total) * min(1.0, 0.5 + 0.25 * best)
+
+        needs_research = mode != "closed_book"
+        decision = {
+            "needs_research": needs_research,
+            "mode": mode,
+            "queries": default_queries(topic, mode) if needs_research else [],
+        }
+        return decision, round(confidence, 3)
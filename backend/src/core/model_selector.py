@@ -0,0 +1,89 @@
+"""
+Adaptive per-task model selection from rolling latency/error statistics.
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from config import ModelConfig
+
+
+class ModelStats:
+    """Rolling window of call latencies and outcomes per model."""
+
+    def __init__(self, window: int = ModelConfig.STATS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._calls: Dict[str, deque] = {}
+
+    def record(self, model: str, latency: float, ok: bool):
+        with self._lock:
+            calls = self._calls.setdefault(model, deque(maxlen=self.window))
+            calls.append((latency, ok))
+
+    def summary(self, model: str) -> Optional[dict]:
+        """Return p90 latency and error rate, or None without samples."""
+        with self._lock:
+            calls = list(self._calls.get(model, ()))
+
+        if not calls:
+            return None
+
+        latencies = sorted(latency for latency, ok in calls if ok)
+        errors = sum(1 for _, ok in calls if not ok)
+        p90 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))] if latencies else None
+
+        return {
+            "samples": len(calls),
+            "p90_latency": round(p90, 3) if p90 is not None else None,
+            "error_rate": round(errors / len(calls), 3),
+        }
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            models = list(self._calls)
+        return {model: self.summary(model) for model in models}
+
+
+def model_cost(model: str) -> float:
+    """Blended USD per 1M tokens; unknown models sort last."""
+    prompt, completion = ModelConfig.MODEL_PRICES.get(model, (float("inf"), float("inf")))
+    return prompt + completion
+
+
+class ModelSelector:
+    """Pick the cheapest candidate that meets the task's latency SLO."""
+
+    def __init__(self, stats: ModelStats):
+        self.stats = stats
+
+    def _meets_slo(self, model: str, slo: float) -> bool:
+        summary = self.stats.summary(model)
+        if summary is None:
+            # No data yet: let it be tried so it can earn statistics
+            return True
+        if summary["error_rate"] > ModelConfig.MAX_ERROR_RATE:
+            return False
+        return summary["p90_latency"] is not None and summary["p90_latency"] <= slo
+
+    def choose(self, task: str, default: str) -> str:
+        candidates = ModelConfig.TASK_CANDIDATES.get(task) or [default]
+        slo = ModelConfig.LATENCY_SLO_SECONDS.get(task, float("inf"))
+
+        eligible = [m for m in candidates if self._meets_slo(m, slo)]
+        if eligible:
+            return min(eligible, key=model_cost)
+
+        # Nothing meets the SLO: fall back to the fastest observed candidate
+        def observed_latency(model: str) -> float:
+            summary = self.stats.summary(model)
+            if not summary or summary["p90_latency"] is None:
+                return float("inf")
+            return summary["p90_latency"]
+
+        return min(candidates, key=observed_latency)
+
+
+model_stats = ModelStats()
+model_selector = ModelSelector(model_stats)
@@ -0,0 +1,156 @@
+"""
+Local research corpus: every search result we have paid for, indexed with
+FTS5/BM25 over titles and snippets in the local SQLite database.
+
+research_node answers a query from the corpus when the local results are
+fresh enough and cover the query's terms, and only calls Tavily otherwise.
+"""
+
+import re
+import json
+import time
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config import BlogConfig, SystemConfig
+from utils.blog_store import SQLiteStore
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS corpus_docs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    query TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_corpus_last_seen ON corpus_docs(last_seen);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS corpus_fts USING fts5(
+    title, snippet,
+    content='corpus_docs', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS corpus_ai AFTER INSERT ON corpus_docs BEGIN
+    INSERT INTO corpus_fts(rowid, title, snippet) VALUES (new.id, new.title, new.snippet);
+END;
+
+CREATE TRIGGER IF NOT EXISTS corpus_ad AFTER DELETE ON corpus_docs BEGIN
+    INSERT INTO corpus_fts(corpus_fts, rowid, title, snippet)
+    VALUES ('delete', old.id, old.title, old.snippet);
+END;
+
+CREATE TRIGGER IF NOT EXISTS corpus_au AFTER UPDATE ON corpus_docs BEGIN
+    INSERT INTO corpus_fts(corpus_fts, rowid, title, snippet)
+    VALUES ('delete', old.id, old.title, old.snippet);
+    INSERT INTO corpus_fts(rowid, title, snippet) VALUES (new.id, new.title, new.snippet);
+END;
+"""
+
+_TERM_RE = re.compile(r"[a-z0-9][a-z0-9+#.-]*[a-z0-9+#]|[a-z0-9]")
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "into", "that", "this", "what", "how",
+    "why", "are", "was", "were", "you", "your", "about", "vs", "guide", "best",
+}
+
+
+def query_terms(text: str) -> List[str]:
+    """Distinct lowercase terms of a query, minus stopwords and 1-2 char noise."""
+    seen = []
+    for term in _TERM_RE.findall(text.lower()):
+        if len(term) >= 3 and term not in _STOPWORDS and term not in seen:
+            seen.append(term)
+    return seen
+
+
+class ResearchCorpus(SQLiteStore):
+    """BM25-searchable store of research results, deduplicated by URL."""
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__(db_path)
+        if self.count() == 0:
+            self.ingest_cache()
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM corpus_docs").fetchone()[0]
+
+    def add(self, query: str, results: List[dict], seen_at: Optional[float] = None):
+        """Upsert results by URL, refreshing their last_seen timestamp."""
+        seen_at = seen_at or time.time()
+        rows = [
+            (r["url"], r.get("title", ""), r.get("snippet", ""), query, seen_at, seen_at)
+            for r in results if r.get("url")
+        ]
+        if not rows:
+            return
+
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO corpus_docs (url, title, snippet, query, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET "
+                "title = excluded.title, snippet = excluded.snippet, query = excluded.query, "
+                "last_seen = MAX(last_seen, excluded.last_seen)",
+                rows
+            )
+
+    def search(self, query: str, limit: int = 10, max_age_days: Optional[float] = None) -> List[dict]:
+        """BM25 search (titles weighted 2x), best first, optionally fresh only."""
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        match = " OR ".join('"{}"'.format(t.replace('"', '""')) for t in terms)
+        since = time.time() - max_age_days * 86400 if max_age_days else 0
+        rows = self._conn().execute(
+            "SELECT d.url, d.title, d.snippet, d.last_seen, bm25(corpus_fts, 2.0, 1.0) AS score "
+            "FROM corpus_fts JOIN corpus_docs d ON d.id = corpus_fts.rowid "
+            "WHERE corpus_fts MATCH ? AND d.last_seen >= ? ORDER BY score LIMIT ?",
+            (match, since, limit)
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def lookup(self, query: str, max_age_days: Optional[float] = None) -> Tuple[List[dict], float]:
+        """Top results for a query and the fraction of its terms they cover."""
+        rows = self.search(query, limit=BlogConfig.RESULTS_PER_QUERY, max_age_days=max_age_days)
+        terms = query_terms(query)
+        if not rows or not terms:
+            return [], 0.0
+
+        found = set(_TERM_RE.findall(" ".join(f"{r['title']} {r['snippet']}" for r in rows).lower()))
+        covered = sum(1 for t in terms if t in found)
+        results = [{"title": r["title"], "url": r["url"], "snippet": r["snippet"]} for r in rows]
+        return results, covered / len(terms)
+
+    def ingest_cache(self, cache_dir: Optional[str] = None) -> int:
+        """Load earlier Tavily responses cached as .cache/tavily_<query>.json."""
+        ingested = 0
+        for path in sorted(Path(cache_dir or SystemConfig.CACHE_DIR).glob("tavily_*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                # CacheManager writes naive UTC timestamps
+                seen_at = datetime.fromisoformat(data["timestamp"]).replace(tzinfo=timezone.utc).timestamp()
+                results = data["value"] or []
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping unreadable research cache file {path.name}: {e}")
+                continue
+
+            self.add(path.stem[len("tavily_"):], results, seen_at=seen_at)
+            ingested += len(results)
+
+        if ingested:
+            metrics.incr("corpus.ingested", ingested)
+            logger.info(f"Research corpus: ingested {ingested} cached result(s)")
+        return ingested
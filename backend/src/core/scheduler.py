@@ -0,0 +1,191 @@
+"""
+Admission scheduler for generation runs.
+
+Runs are admitted up to SystemConfig.MAX_CONCURRENT_RUNS at a time:
+
+- interactive requests always go before batch ones, and batch work may
+  not take the last INTERACTIVE_RESERVED_RUNS slots;
+- within a class, clients share capacity by weighted fair queuing
+  (virtual finish tags, weights from CLIENT_WEIGHTS);
+- a client never holds more than MAX_RUNS_PER_CLIENT slots.
+
+The scheduler lives on the API's event loop: waiting requests hold no
+threadpool thread.
+"""
+
+import time
+import asyncio
+import itertools
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from config import SystemConfig
+from utils.metrics import metrics
+
+
+PRIORITIES = ("interactive", "batch")
+
+
+class SchedulerFull(Exception):
+    """Raised when the admission queue is at MAX_QUEUE_DEPTH."""
+
+
+class ClientGone(Exception):
+    """Raised when a queued client disconnects before admission."""
+
+
+class Ticket:
+    __slots__ = ("client", "priority", "start", "tag", "seq", "future", "enqueued_at")
+
+    def __init__(self, client: str, priority: str, start: float, tag: float, seq: int,
+                 future: asyncio.Future):
+        self.client = client
+        self.priority = priority
+        self.start = start
+        self.tag = tag
+        self.seq = seq
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class AdmissionScheduler:
+    """Priority classes plus per-client weighted fair queuing and quotas."""
+
+    def __init__(self,
+                 capacity: int = SystemConfig.MAX_CONCURRENT_RUNS,
+                 per_client: int = SystemConfig.MAX_RUNS_PER_CLIENT,
+                 reserved_interactive: int = SystemConfig.INTERACTIVE_RESERVED_RUNS,
+                 max_queue: int = SystemConfig.MAX_QUEUE_DEPTH,
+                 weights: Optional[Dict[str, float]] = None):
+        self.capacity = capacity
+        self.per_client = per_client
+        self.reserved_interactive = min(reserved_interactive, capacity - 1)
+        self.max_queue = max_queue
+        self.weights = weights if weights is not None else SystemConfig.CLIENT_WEIGHTS
+
+        self._queues: Dict[str, List[Ticket]] = {p: [] for p in PRIORITIES}
+        self._vtime: Dict[str, float] = {p: 0.0 for p in PRIORITIES}
+        self._last_tag: Dict[tuple, float] = {}
+        self._running = 0
+        self._running_by_client: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._waits: Dict[str, deque] = {p: deque(maxlen=500) for p in PRIORITIES}
+
+    # ---------------- Queueing ----------------
+
+    def _enqueue(self, client: str, priority: str) -> Ticket:
+        # Finish tag: the client's virtual time advances by 1/weight per run
+        key = (priority, client)
+        start = max(self._vtime[priority], self._last_tag.get(key, 0.0))
+        tag = start + 1.0 / max(self.weights.get(client, 1.0), 1e-6)
+        self._last_tag[key] = tag
+
+        ticket = Ticket(client, priority, start, tag, next(self._seq), asyncio.get_running_loop().create_future())
+        self._queues[priority].append(ticket)
+        return ticket
+
+    def _next_ticket(self) -> Optional[Ticket]:
+        for priority in PRIORITIES:
+            if priority == "batch" and self._running >= self.capacity - self.reserved_interactive:
+                return None
+            eligible = [
+                t for t in self._queues[priority]
+                if self._running_by_client.get(t.client, 0) < self.per_client
+            ]
+            if eligible:
+                return min(eligible, key=lambda t: (t.tag, t.seq))
+        return None
+
+    def _dispatch(self):
+        while self._running < self.capacity:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+
+            self._queues[ticket.priority].remove(ticket)
+            self._vtime[ticket.priority] = max(self._vtime[ticket.priority], ticket.start)
+            if len(self._last_tag) > 1000:
+                # Tags at or below virtual time behave like no history at all
+                self._last_tag = {k: v for k, v in self._last_tag.items() if v > self._vtime[k[0]]}
+            self._running += 1
+            self._running_by_client[ticket.client] = self._running_by_client.get(ticket.client, 0) + 1
+
+            waited = time.perf_counter() - ticket.enqueued_at
+            self._waits[ticket.priority].append(waited)
+            metrics.observe(f"scheduler.wait_seconds.{ticket.priority}", waited)
+            metrics.incr(f"scheduler.admitted.{ticket.priority}")
+            ticket.future.set_result(None)
+
+    def _drop(self, ticket: Ticket):
+        if ticket in self._queues[ticket.priority]:
+            self._queues[ticket.priority].remove(ticket)
+
+    # ---------------- Public API ----------------
+
+    async def acquire(self,
+                      client: str,
+                      priority: str = "interactive",
+                      timeout: Optional[float] = None,
+                      is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+                      poll_seconds: float = SystemConfig.DISCONNECT_POLL_SECONDS) -> Ticket:
+        """Wait for a run slot.
+
+        Raises SchedulerFull, asyncio.TimeoutError (timeout elapsed while
+        queued) or ClientGone (is_disconnected() turned true while queued).
+        """
+        if priority not in PRIORITIES:
+            priority = PRIORITIES[0]
+        if sum(len(q) for q in self._queues.values()) >= self.max_queue:
+            metrics.incr("scheduler.rejected")
+            raise SchedulerFull("Admission queue is full.")
+
+        ticket = self._enqueue(client, priority)
+        self._dispatch()
+
+        give_up = None if timeout is None else time.perf_counter() + timeout
+        try:
+            while not ticket.future.done():
+                wait = poll_seconds if give_up is None else min(poll_seconds, give_up - time.perf_counter())
+                if wait <= 0:
+                    metrics.incr("scheduler.timeouts")
+                    raise asyncio.TimeoutError("Deadline passed while queued.")
+                await asyncio.wait({ticket.future}, timeout=wait)
+                if not ticket.future.done() and is_disconnected is not None and await is_disconnected():
+                    metrics.incr("scheduler.abandoned")
+                    raise ClientGone("Client disconnected while queued.")
+        except BaseException:
+            if ticket.future.done():
+                self.release(ticket)
+            else:
+                self._drop(ticket)
+                ticket.future.cancel()
+            raise
+
+        return ticket
+
+    def release(self, ticket: Ticket):
+        self._running -= 1
+        remaining = self._running_by_client.get(ticket.client, 1) - 1
+        if remaining > 0:
+            self._running_by_client[ticket.client] = remaining
+        else:
+            self._running_by_client.pop(ticket.client, None)
+        self._dispatch()
+
+    def snapshot(self) -> dict:
+        def percentile(values: List[float], q: float) -> float:
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 3)
+
+        return {
+            "capacity": self.capacity,
+            "running": self._running,
+            "running_by_client": dict(self._running_by_client),
+            "queued": {p: len(q) for p, q in self._queues.items()},
+            "wait_seconds": {
+                p: {"p50": percentile(list(w), 0.5), "p95": percentile(list(w), 0.95)}
+                for p, w in self._waits.items()
+            },
+        }
@@ -0,0 +1,61 @@
+"""
+Typed schemas for structured LLM outputs.
+"""
+
+from typing import List
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class RouterDecision(BaseModel):
+    """Router output: whether to research and with which queries."""
+
+    needs_research: bool = False
+    mode: str = "closed_book"
+    queries: List[str] = Field(default_factory=list)
+
+    @field_validator("mode", mode="before")
+    @classmethod
+    def normalize_mode(cls, value) -> str:
+        mode = str(value or "closed_book").strip().lower().replace("-", "_").replace(" ", "_")
+        if mode not in ("closed_book", "hybrid", "open_book"):
+            raise ValueError("mode must be one of closed_book, hybrid, open_book")
+        return mode
+
+    @field_validator("queries", mode="before")
+    @classmethod
+    def drop_empty_queries(cls, value) -> List[str]:
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        return [str(q).strip() for q in value if str(q).strip()]
+
+
+class PlanSection(BaseModel):
+    """A single planned blog section."""
+
+    id: int
+    title: str
+    goal: str = ""
+    bullets: List[str] = Field(default_factory=list)
+    target_words: int = Field(default=300, gt=0)
+
+
+class BlogPlan(BaseModel):
+    """Planner output: blog title and ordered sections."""
+
+    blog_title: str = Field(min_length=1)
+    sections: List[PlanSection] = Field(min_length=1)
+
+
+class CombinedPlan(RouterDecision, BlogPlan):
+    """Single-call router + planner output used by the fast profile."""
+
+
+class QualityReport(BaseModel):
+    """Quality checker output for one section."""
+
+    score: float = Field(ge=0, le=10)
+    issues: List[str] = Field(default_factory=list)
+    suggested_fixes: List[str] = Field(default_factory=list)
@@ -0,0 +1,227 @@
+"""
+SEO analyzer for generated and stored blogs.
+
+Scores heading structure, topic keyword density, readability (Flesch
+reading ease), links and length against the platform's word range. Each
+document is tokenized in a single regex pass; all counters are updated
+from that one scan.
+"""
+
+import re
+import json
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional
+
+from config import PLATFORM_CONFIGS
+from utils.blog_store import SQLiteStore
+
+
+# Bump when scoring changes so cached results are recomputed
+ANALYZER_VERSION = 2
+
+WEIGHTS = {"headings": 0.2, "keywords": 0.2, "readability": 0.25, "links": 0.1, "length": 0.25}
+KEYWORD_DENSITY = (0.005, 0.025)
+
+_TOKEN_RE = re.compile(
+    r"(?P<fence>^(?:```|~~~)[^\n]*$)"
+    r"|(?P<heading>^(?P<level>#{1,6})[ \t]+(?P<htext>[^\n]*)$)"
+    r"|(?P<link>\[[^\]\n]*\]\((?P<target>[^)\s]+)[^)\n]*\))"
+    r"|(?P<url>https?://[^\s)>\]]+)"
+    r"|(?P<word>[A-Za-z0-9][A-Za-z0-9'’-]*)"
+    r"|(?P<end>[.!?]+(?=\s|$))",
+    re.MULTILINE
+)
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+_KEYWORD_RE = re.compile(r"[a-z0-9][a-z0-9'’-]*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in",
+    "into", "is", "it", "of", "on", "or", "the", "to", "vs", "what", "why", "with", "your",
+}
+
+
+def _syllables(word: str) -> int:
+    count = len(_VOWEL_GROUP_RE.findall(word))
+    if word.endswith("e") and count > 1 and not word.endswith(("le", "ee")):
+        count -= 1
+    return max(count, 1)
+
+
+def topic_keywords(topic: str) -> List[str]:
+    return [w for w in dict.fromkeys(_KEYWORD_RE.findall(topic.lower())) if w not in _STOPWORDS]
+
+
+def _band_score(value: float, low: float, high: float) -> float:
+    """100 inside [low, high], falling off linearly to 0 at half/double the band."""
+    if low <= value <= high:
+        return 100.0
+    if value < low:
+        return max(0.0, 100.0 * (value - low / 2) / (low / 2)) if low else 0.0
+    return max(0.0, 100.0 * (2 * high - value) / high)
+
+
+def analyze(content: str, topic: str, platform: str = "generic") -> dict:
+    """Score one markdown document. Pure function, safe for process pools."""
+    keywords = topic_keywords(topic)
+    keyword_set = set(keywords)
+
+    words = 0
+    syllables = 0
+    sentences = 0
+    keyword_hits: Counter = Counter()
+    headings: List[tuple] = []
+    links_internal = 0
+    links_external = 0
+    in_code = False
+
+    for m in _TOKEN_RE.finditer(content):
+        kind = m.lastgroup
+        if kind == "fence":
+            in_code = not in_code
+        elif in_code:
+            continue
+        elif kind == "heading":
+            headings.append((len(m.group("level")), m.group("htext").strip()))
+        elif kind == "word":
+            word = m.group("word").lower()
+            words += 1
+            syllables += _syllables(word)
+            if word in keyword_set:
+                keyword_hits[word] += 1
+        elif kind == "end":
+            sentences += 1
+        elif kind == "link":
+            if m.group("target").startswith(("http://", "https://")):
+                links_external += 1
+            else:
+                links_internal += 1
+        elif kind == "url":
+            links_external += 1
+
+    issues: List[str] = []
+
+    # Headings: one H1, at least two H2s, no skipped levels
+    h1 = sum(1 for level, _ in headings if level == 1)
+    h2 = sum(1 for level, _ in headings if level == 2)
+    skipped_levels = sum(1 for (a, _), (b, _) in zip(headings, headings[1:]) if b > a + 1)
+    heading_score = 100.0
+    if h1 != 1:
+        heading_score -= 40
+        issues.append(f"Expected exactly one H1, found {h1}.")
+    if h2 < 2:
+        heading_score -= 30
+        issues.append("Use at least two H2 sections.")
+    if skipped_levels:
+        heading_score -= min(30, 10 * skipped_levels)
+        issues.append("Heading levels skip (e.g. H2 -> H4).")
+
+    # Keywords: each topic term's density in body text is scored against the
+    # band on its own, then averaged; plus presence in headings (whole words)
+    densities = {k: keyword_hits[k] / words if words else 0.0 for k in keywords}
+    density = sum(densities.values()) / len(keywords) if keywords else 0.0
+    keyword_score = (sum(_band_score(d, *KEYWORD_DENSITY) for d in densities.values()) / len(keywords)
+                     if keywords else 100.0)
+    heading_words = {w for _, text in headings for w in _KEYWORD_RE.findall(text.lower())}
+    if keywords and not heading_words & keyword_set:
+        keyword_score *= 0.7
+        issues.append("No topic keyword appears in any heading.")
+    if keywords and density < KEYWORD_DENSITY[0]:
+        issues.append(f"Keyword density {density:.2%} is low.")
+    stuffed = [k for k, d in densities.items() if d > KEYWORD_DENSITY[1]]
+    if stuffed:
+        issues.append(f"Keyword density looks stuffed for: {', '.join(stuffed)}.")
+
+    # Readability: Flesch reading ease, 60+ is plain English
+    sentences = max(sentences, 1)
+    flesch = 206.835 - 1.015 * (words / sentences) - 84.6 * (syllables / max(words, 1)) if words else 0.0
+    readability_score = max(0.0, min(100.0, (flesch - 30) / 30 * 100))
+    if flesch < 50:
+        issues.append(f"Hard to read (Flesch {flesch:.0f}); shorten sentences.")
+
+    # Links: some outbound sources, not a link farm
+    links = links_internal + links_external
+    link_score = 100.0 if 1 <= links <= max(10, words // 100) else (40.0 if links == 0 else 70.0)
+    if links == 0:
+        issues.append("No links; cite sources or related posts.")
+
+    # Length against the platform's range
+    low, high = PLATFORM_CONFIGS.get(platform, PLATFORM_CONFIGS["generic"])["word_count"]
+    length_score = _band_score(words, low, high)
+    if words < low:
+        issues.append(f"{words} words is short for {platform} ({low}-{high}).")
+    elif words > high:
+        issues.append(f"{words} words is long for {platform} ({low}-{high}).")
+
+    components = {
+        "headings": {"score": heading_score, "h1": h1, "h2": h2, "total": len(headings)},
+        "keywords": {"score": round(keyword_score, 1), "density": round(density, 4),
+                     "densities": {k: round(d, 4) for k, d in densities.items()},
+                     "hits": dict(keyword_hits), "keywords": keywords},
+        "readability": {"score": round(readability_score, 1), "flesch": round(flesch, 1),
+                        "words_per_sentence": round(words / sentences, 1)},
+        "links": {"score": link_score, "internal": links_internal, "external": links_external},
+        "length": {"score": round(length_score, 1), "words": words, "range": [low, high]},
+    }
+    score = sum(components[name]["score"] * weight for name, weight in WEIGHTS.items())
+
+    return {
+        "score": round(score, 1),
+        "platform": platform,
+        "components": components,
+        "issues": issues,
+        "version": ANALYZER_VERSION,
+    }
+
+
+# ---------------- CACHE ----------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seo_scores (
+    cache_key TEXT PRIMARY KEY,
+    result TEXT NOT NULL
+);
+"""
+
+
+def cache_key(content: str, topic: str, platform: str) -> str:
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{digest}:{platform}:{hashlib.sha1(topic.lower().encode('utf-8')).hexdigest()[:12]}:v{ANALYZER_VERSION}"
+
+
+class SEOCache(SQLiteStore):
+    """SEO results keyed by content hash, platform, topic and analyzer version."""
+
+    SCHEMA = _SCHEMA
+
+    def get_many(self, keys: List[str]) -> Dict[str, dict]:
+        found: Dict[str, dict] = {}
+        conn = self._conn()
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ",".join("?" for _ in batch)
+            for row in conn.execute(
+                f"SELECT cache_key, result FROM seo_scores WHERE cache_key IN ({placeholders})", batch
+            ):
+                found[row["cache_key"]] = json.loads(row["result"])
+        return found
+
+    def put_many(self, results: Dict[str, dict]):
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO seo_scores (cache_key, result) VALUES (?, ?)",
+                [(key, json.dumps(result)) for key, result in results.items()]
+            )
+
+
+def analyze_cached(content: str, topic: str, platform: str = "generic",
+                   cache: Optional[SEOCache] = None) -> dict:
+    cache = cache or SEOCache()
+    key = cache_key(content, topic, platform)
+    cached = cache.get_many([key]).get(key)
+    if cached is not None:
+        return cached
+    result = analyze(content, topic, platform)
+    cache.put_many({key: result})
+    return result
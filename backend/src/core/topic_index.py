@@ -0,0 +1,216 @@
+"""
+Near-duplicate topic index: MinHash signatures over character shingles
+with LSH banding, persisted in the local SQLite database.
+
+Used to reuse research, plans or whole blogs for paraphrased topics
+("Rust async runtimes" vs "async runtimes in Rust").
+"""
+
+import json
+import hashlib
+import random
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set, Tuple
+
+from core.local_router import normalize_topic, topic_terms, topic_direction
+from utils.blog_store import SQLiteStore
+
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    plan TEXT,
+    evidence TEXT,
+    content_hash TEXT,
+    mode TEXT,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_topics_key ON topics(normalized, platform, profile);
+
+CREATE TABLE IF NOT EXISTS topic_bands (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    topic_id INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_topic_bands ON topic_bands(band, bucket);
+"""
+
+
+def shingles(topic: str) -> Set[str]:
+    """Character n-grams of the topic's order-insensitive content words."""
+    text = topic_terms(topic)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(items: Set[str]) -> List[int]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+        for item in items
+    ]
+    if not hashes:
+        return [0] * NUM_PERM
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def _band_keys(signature: List[int]) -> List[Tuple[int, str]]:
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(",".join(map(str, rows)).encode(), digest_size=8).hexdigest()
+        keys.append((band, digest))
+    return keys
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class TopicIndex(SQLiteStore):
+    """Similarity index over previously generated topics."""
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__(db_path)
+        # Databases created before the mode column existed
+        columns = {row["name"] for row in self._conn().execute("PRAGMA table_info(topics)")}
+        if "mode" not in columns:
+            with self._conn() as conn:
+                conn.execute("ALTER TABLE topics ADD COLUMN mode TEXT")
+
+    def add(self,
+            topic: str,
+            platform: str,
+            profile: str,
+            plan: Optional[dict],
+            evidence: List[dict],
+            content_hash: Optional[str],
+            mode: Optional[str] = None,
+            created_at: Optional[str] = None) -> int:
+        """Upsert the entry for (normalized topic, platform, profile).
+
+        created_at defaults to now; pass the original entry's time when the
+        plan and evidence were reused, so reuse never makes them look fresh.
+        """
+        normalized = normalize_topic(topic)
+        values = (
+            topic,
+            json.dumps(plan, ensure_ascii=False) if plan else None,
+            json.dumps(evidence, ensure_ascii=False),
+            content_hash,
+            mode,
+            created_at or datetime.utcnow().isoformat(timespec="seconds"),
+        )
+        conn = self._conn()
+        with conn:
+            ids = [
+                row["id"] for row in conn.execute(
+                    "SELECT id FROM topics WHERE normalized = ? AND platform = ? AND profile = ? ORDER BY id DESC",
+                    (normalized, platform, profile)
+                )
+            ]
+            if ids:
+                topic_id = ids[0]
+                conn.execute(
+                    "UPDATE topics SET topic = ?, plan = ?, evidence = ?, content_hash = ?, mode = ?, created_at = ? "
+                    "WHERE id = ?",
+                    (*values, topic_id)
+                )
+                # Rows left over from before entries were upserted
+                stale = [(i,) for i in ids[1:]]
+                conn.executemany("DELETE FROM topic_bands WHERE topic_id = ?", stale)
+                conn.executemany("DELETE FROM topics WHERE id = ?", stale)
+                # Same normalized topic, so the same content words and LSH bands
+                return topic_id
+
+            cursor = conn.execute(
+                "INSERT INTO topics (topic, plan, evidence, content_hash, mode, created_at, normalized, platform, profile) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*values, normalized, platform, profile)
+            )
+            topic_id = int(cursor.lastrowid)
+            conn.executemany(
+                "INSERT INTO topic_bands (band, bucket, topic_id) VALUES (?, ?, ?)",
+                [(band, bucket, topic_id) for band, bucket in _band_keys(minhash(shingles(topic)))]
+            )
+        return topic_id
+
+    def find_similar(self, topic: str, platform: str, profile: str,
+                     max_age_days: Optional[Callable[[Optional[str]], float]] = None) -> Optional[dict]:
+        """Return the most similar earlier topic for the same platform/profile.
+
+        LSH buckets narrow the candidates; the score is the exact shingle
+        Jaccard similarity of the topics' content words. Both ignore word
+        order, so candidates must also point the same way (topic_direction):
+        "from Java to Python" never matches "from Python to Java".
+        max_age_days maps an entry's routing mode to how old it may be
+        before it is ignored.
+        """
+        query = shingles(topic)
+        keys = _band_keys(minhash(query))
+
+        conn = self._conn()
+        clause = " OR ".join("(band = ? AND bucket = ?)" for _ in keys)
+        params = [v for key in keys for v in key]
+        candidate_ids = [
+            row["topic_id"] for row in conn.execute(
+                f"SELECT DISTINCT topic_id FROM topic_bands WHERE {clause}", params
+            )
+        ]
+        if not candidate_ids:
+            return None
+
+        placeholders = ",".join("?" for _ in candidate_ids)
+        rows = conn.execute(
+            f"SELECT * FROM topics WHERE id IN ({placeholders}) AND platform = ? AND profile = ? "
+            "ORDER BY id DESC",
+            (*candidate_ids, platform, profile)
+        ).fetchall()
+
+        now = datetime.utcnow()
+        direction = topic_direction(topic)
+        best, best_score = None, 0.0
+        for row in rows:
+            if topic_direction(row["topic"]) != direction:
+                continue
+            if max_age_days is not None:
+                age = now - datetime.fromisoformat(row["created_at"])
+                if age > timedelta(days=max_age_days(row["mode"])):
+                    continue
+            score = jaccard(query, shingles(row["normalized"]))
+            if score > best_score:
+                best, best_score = row, score
+
+        if best is None:
+            return None
+
+        return {
+            "topic_id": best["id"],
+            "topic": best["topic"],
+            "score": round(best_score, 3),
+            "plan": json.loads(best["plan"]) if best["plan"] else None,
+            "evidence": json.loads(best["evidence"] or "[]"),
+            "content_hash": best["content_hash"],
+            "mode": best["mode"],
+            "created_at": best["created_at"],
+        }
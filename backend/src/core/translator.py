@@ -0,0 +1,162 @@
+"""
+Section-wise translation of finished blogs.
+
+A blog is split on its headings and every section x language pair is
+translated concurrently (LLM concurrency is capped globally in
+core.llm_client). Fenced code blocks are masked so they come back
+unchanged, and translations are cached per (section hash, language).
+"""
+
+import re
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config import BlogConfig, SystemConfig
+from core.llm_client import create_client_for_task, LLMClient
+from prompts import system_prompts
+from utils.blog_store import content_hash
+from utils.helpers import CacheManager, ContextThreadPoolExecutor
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+cache = CacheManager()
+
+_FENCE_RE = re.compile(r"^(```|~~~)")
+_CODE_BLOCK_RE = re.compile(r"^(```|~~~)[^\n]*\n.*?^\1[^\n]*$", re.MULTILINE | re.DOTALL)
+_HEADING_RE = re.compile(r"^(#{1,6})\s", re.MULTILINE)
+_PLACEHOLDER = "[[CODE_{}]]"
+
+
+def split_sections(markdown: str) -> List[str]:
+    """Split markdown before each H1/H2 heading outside code fences.
+
+    "".join(split_sections(md)) == md, so whitespace is preserved.
+    """
+    sections: List[str] = []
+    current: List[str] = []
+    in_fence = False
+
+    for line in markdown.splitlines(keepends=True):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and re.match(r"^#{1,2}\s", line) and current:
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
+def _mask_code(text: str) -> Tuple[str, List[str]]:
+    blocks: List[str] = []
+
+    def replace(match):
+        blocks.append(match.group(0))
+        return _PLACEHOLDER.format(len(blocks) - 1)
+
+    return _CODE_BLOCK_RE.sub(replace, text), blocks
+
+
+def _unmask_code(text: str, blocks: List[str]) -> Tuple[str, bool]:
+    intact = True
+    for i, block in enumerate(blocks):
+        placeholder = _PLACEHOLDER.format(i)
+        if placeholder not in text:
+            intact = False
+            continue
+        text = text.replace(placeholder, block, 1)
+    return text, intact
+
+
+def _strip_wrapper(text: str) -> str:
+    """Drop a ```markdown fence the model may wrap the whole answer in."""
+    stripped = text.strip()
+    if stripped.startswith("```") and stripped.endswith("```"):
+        stripped = stripped.split("\n", 1)[-1].rsplit("```", 1)[0]
+    return stripped.strip()
+
+
+def translate_section(client: LLMClient, text: str, language: str) -> str:
+    """Translate one markdown section, keeping its structure and whitespace."""
+    body = text.strip()
+    if not body:
+        return text
+
+    # Hash the language name: a slug of it would map every non-Latin name to "_"
+    language_key = hashlib.sha1(language.strip().casefold().encode("utf-8")).hexdigest()[:12]
+    key = f"translation_{language_key}_{content_hash(text)[:32]}"
+    cached = cache.get(key)
+    if cached is not None:
+        metrics.incr("translation.cache_hits")
+        return cached
+
+    masked, blocks = _mask_code(body)
+    raw = client.generate([
+        {"role": "system", "content": system_prompts.TRANSLATION_PROMPT.format(language=language)},
+        {"role": "user", "content": masked}
+    ])
+    translated, intact = _unmask_code(_strip_wrapper(raw), blocks)
+
+    headings = [len(h) for h in _HEADING_RE.findall(body)]
+    if not intact or [len(h) for h in _HEADING_RE.findall(translated)] != headings:
+        metrics.incr("translation.structure_mismatch")
+        logger.warning(f"Translation to {language} changed the markdown structure of a section")
+
+    # Restore the section's surrounding whitespace so sections re-join cleanly
+    leading = text[:len(text) - len(text.lstrip())]
+    trailing = text[len(text.rstrip()):]
+    result = f"{leading}{translated}{trailing}"
+
+    cache.set(key, result)
+    return result
+
+
+def translate_blog(content: str,
+                   languages: List[str],
+                   client: Optional[LLMClient] = None) -> Dict[str, dict]:
+    """Translate a blog into each language, sections x languages in parallel.
+
+    Sections that fail are kept in the source language and reported.
+
+    Returns:
+        {language: {"content", "partial", "untranslated_sections"}}
+    """
+    languages = list(dict.fromkeys(lang.strip() for lang in languages if lang.strip()))
+    languages = languages[:BlogConfig.MAX_TRANSLATION_LANGUAGES]
+    if not languages:
+        return {}
+
+    client = client or create_client_for_task("translate")
+    sections = split_sections(content)
+    translated = {lang: list(sections) for lang in languages}
+    failed: Dict[str, List[int]] = {lang: [] for lang in languages}
+
+    def run(job):
+        language, index = job
+        try:
+            return language, index, translate_section(client, sections[index], language), None
+        except Exception as e:
+            return language, index, None, e
+
+    jobs = [(lang, i) for lang in languages for i in range(len(sections))]
+    with ContextThreadPoolExecutor(max_workers=SystemConfig.MAX_PARALLEL_WORKERS) as pool:
+        for language, index, text, error in pool.map(run, jobs):
+            if error is not None:
+                logger.warning(f"Translation to {language} failed for section {index}: {error}")
+                failed[language].append(index)
+            else:
+                translated[language][index] = text
+
+    metrics.incr("translation.sections", len(jobs))
+    return {
+        lang: {
+            "content": "".join(translated[lang]),
+            "partial": bool(failed[lang]),
+            "untranslated_sections": failed[lang],
+        }
+        for lang in languages
+    }
@@ -0,0 +1,157 @@
+"""
+Per-run token usage, cost estimation and budget tracking.
+
+LLMClient records every call into the RunUsage registered for the
+current run id (utils.helpers.run_id_var); nodes consult it to size
+plans and to stop early once a budget is spent.
+"""
+
+import threading
+from typing import Dict, Optional
+
+from config import ModelConfig
+
+
+def estimate_cost(model: str,
+                  prompt_tokens: int,
+                  completion_tokens: int,
+                  cached_tokens: int = 0) -> float:
+    """Estimate USD cost from the local price table."""
+    prompt_price, completion_price = ModelConfig.MODEL_PRICES.get(model, (0.0, 0.0))
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    cost = (
+        uncached * prompt_price
+        + cached_tokens * prompt_price * ModelConfig.CACHED_PROMPT_DISCOUNT
+        + completion_tokens * completion_price
+    )
+    return cost / 1_000_000
+
+
+class RunUsage:
+    """Token and cost accounting for a single generation run."""
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None):
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cost = 0.0
+        self.by_model: Dict[str, dict] = {}
+        # Tokens promised to calls still in flight (see reserve)
+        self.reserved = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def record(self, model: str, usage: dict):
+        """Record the `usage` block of an OpenRouter response."""
+        prompt = int(usage.get("prompt_tokens", 0) or 0)
+        completion = int(usage.get("completion_tokens", 0) or 0)
+        cached = int((usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0)
+        cost = estimate_cost(model, prompt, completion, cached)
+
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self.cached_tokens += cached
+            self.cost += cost
+
+            per_model = self.by_model.setdefault(model, {"calls": 0, "tokens": 0, "cost_usd": 0.0})
+            per_model["calls"] += 1
+            per_model["tokens"] += prompt + completion
+            per_model["cost_usd"] += cost
+
+    def remaining_tokens(self, model: Optional[str] = None) -> Optional[int]:
+        """Tokens left under both budgets; cost is converted at `model`'s
+        completion price. None when the run is unbudgeted."""
+        limits = []
+        if self.max_tokens is not None:
+            limits.append(self.max_tokens - self.total_tokens)
+        if self.max_cost is not None and model:
+            _, completion_price = ModelConfig.MODEL_PRICES.get(model, (0.0, 0.0))
+            if completion_price > 0:
+                limits.append(int((self.max_cost - self.cost) * 1_000_000 / completion_price))
+
+        if not limits:
+            return None
+        return max(min(limits), 0)
+
+    def reserve(self, tokens: int, model: Optional[str] = None) -> int:
+        """Reserve up to `tokens` of the remaining budget for one call and
+        return the amount granted (0 when nothing is left). Parallel callers
+        each get a share of what is left instead of all seeing the same
+        remaining figure. Unbudgeted runs are granted everything."""
+        with self._lock:
+            available = self.remaining_tokens(model)
+            if available is None:
+                return tokens
+            granted = max(min(tokens, available - self.reserved), 0)
+            self.reserved += granted
+            return granted
+
+    def settle(self, tokens: int):
+        """Release a reservation once its call has finished (and its actual
+        usage has been recorded)."""
+        with self._lock:
+            self.reserved = max(self.reserved - tokens, 0)
+
+    def exhausted(self) -> bool:
+        if self.max_tokens is not None and self.total_tokens >= self.max_tokens:
+            return True
+        if self.max_cost is not None and self.cost >= self.max_cost:
+            return True
+        return False
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cached_tokens": self.cached_tokens,
+                "total_tokens": self.total_tokens,
+                "cost_usd": round(self.cost, 6),
+                "by_model": {
+                    model: {**stats, "cost_usd": round(stats["cost_usd"], 6)}
+                    for model, stats in self.by_model.items()
+                },
+                "budget": {
+                    "max_tokens": self.max_tokens,
+                    "max_cost": self.max_cost,
+                    "exhausted": self.exhausted(),
+                },
+            }
+
+
+_runs: Dict[str, RunUsage] = {}
+_runs_lock = threading.Lock()
+
+
+def start_run(run_id: str,
+              max_tokens: Optional[int] = None,
+              max_cost: Optional[float] = None) -> RunUsage:
+    run = RunUsage(max_tokens=max_tokens, max_cost=max_cost)
+    with _runs_lock:
+        # Replacing a live run's tracker would reset its budget
+        if run_id in _runs:
+            raise RuntimeError(f"Run {run_id} is already active")
+        _runs[run_id] = run
+    return run
+
+
+def get_run(run_id: Optional[str]) -> Optional[RunUsage]:
+    if not run_id:
+        return None
+    with _runs_lock:
+        return _runs.get(run_id)
+
+
+def end_run(run_id: str) -> Optional[RunUsage]:
+    with _runs_lock:
+        return _runs.pop(run_id, None)
@@ -13,53 +13,45 @@ Responsibilities:
 Core agent logic and model configuration are NOT modified here.
 """
 
+import json
 import logging
 import time
 import argparse
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List
 
-from core.blog_agent import create_blog_agent
-from utils.helpers import setup_logging, save_blog, ProgressTracker
-from config import load_config, validate_config, PLATFORM_CONFIGS
-
-
-# ---------------------------------------------------------------------
-# State Factory
-# ---------------------------------------------------------------------
-
-def create_initial_state(topic: str, platform: str) -> Dict[str, Any]:
-    """
-    Creates initial state object for the blog agent.
-    Encapsulated to avoid inline state dictionaries.
-    """
-    return {
-        "topic": topic,
-        "platform": platform,
-        "needs_research": False,
-        "mode": "",
-        "queries": [],
-        "evidence": [],
-        "plan": None,
-        "sections": [],
-        "final_blog": "",
-        "md_with_placeholders": "",
-        "image_specs": [],
-        "final_images": [],
-        "metadata": {}
-    }
+from core.blog_agent import create_blog_agent, create_initial_state, run_agent, generate_variants
+from utils.helpers import setup_logging, save_blog, ProgressTracker, run_id_var
+from utils.blog_store import BlogStore
+from utils.profiler import profile_path
+from config import load_config, validate_config, PLATFORM_CONFIGS, GENERATION_PROFILES, DEFAULT_PROFILE
 
 
 # ---------------------------------------------------------------------
 # Blog Generation Wrapper
 # ---------------------------------------------------------------------
 
-def generate_blog(topic: str, platform: str) -> Dict[str, Any]:
+def generate_blog(topic: str,
+                  platform: str,
+                  profile: str = DEFAULT_PROFILE,
+                  research: bool = False,
+                  max_tokens_budget: Optional[int] = None,
+                  max_cost: Optional[float] = None,
+                  deadline_seconds: Optional[float] = None,
+                  languages: Optional[List[str]] = None,
+                  profile_run: bool = False) -> Dict[str, Any]:
     """
     Executes blog generation using the configured agent.
 
     Args:
         topic: Blog topic
         platform: Target publishing platform
+        profile: Generation profile (fast, balanced, quality)
+        research: Force web research regardless of routing
+        max_tokens_budget: Token budget for the whole run
+        max_cost: Estimated USD budget for the whole run
+        deadline_seconds: End-to-end time limit; unfinished sections are skipped
+        languages: Languages to translate the finished blog into
+        profile_run: Save per-node timings and a cProfile of this run
 
     Returns:
         Result dictionary containing final_blog and metadata
@@ -69,17 +61,24 @@ def generate_blog(topic: str, platform: str) -> Dict[str, Any]:
         logging.warning("Invalid platform '%s'. Falling back to 'generic'.", platform)
         platform = "generic"
 
-    logging.info("Starting blog generation | Topic: %s | Platform: %s", topic, platform)
+    if profile not in GENERATION_PROFILES:
+        logging.warning("Invalid profile '%s'. Falling back to '%s'.", profile, DEFAULT_PROFILE)
+        profile = DEFAULT_PROFILE
+
+    logging.info("Starting blog generation | Topic: %s | Platform: %s | Profile: %s", topic, platform, profile)
 
     agent = create_blog_agent()
     tracker = ProgressTracker(total_steps=3)
 
-    state = create_initial_state(topic, platform)
+    state = create_initial_state(topic, platform, profile=profile, needs_research=research,
+                                 deadline_seconds=deadline_seconds, languages=languages)
+    run_id_var.set(state["run_id"])
 
     start_time = time.time()
 
     tracker.update("Processing", "Generating blog content...")
-    result = agent.invoke(state)
+    result = run_agent(agent, state, max_tokens_budget=max_tokens_budget, max_cost=max_cost,
+                       profile_run=profile_run)
     tracker.complete()
 
     duration = round(time.time() - start_time, 2)
@@ -117,6 +116,55 @@ def parse_arguments():
         help=f"Target platform ({', '.join(PLATFORM_CONFIGS.keys())})"
     )
 
+    parser.add_argument(
+        "--platforms",
+        type=str,
+        help="Comma-separated platforms; generates one variant each from a shared plan"
+    )
+
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE,
+        help=f"Generation profile ({', '.join(GENERATION_PROFILES.keys())})"
+    )
+
+    parser.add_argument(
+        "--research",
+        action="store_true",
+        help="Force web research"
+    )
+
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="Token budget for the run"
+    )
+
+    parser.add_argument(
+        "--max-cost",
+        type=float,
+        help="Estimated USD budget for the run"
+    )
+
+    parser.add_argument(
+        "--languages",
+        type=str,
+        help="Comma-separated languages to translate the blog into (e.g. Spanish,German)"
+    )
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="End-to-end time limit in seconds; returns a partial blog if reached"
+    )
+
+    parser.add_argument(
+        "--profile-run",
+        action="store_true",
+        help="Profile this run (per-node wall/CPU time + cProfile) into the profiles directory"
+    )
+
     parser.add_argument(
         "--no-preview",
         action="store_true",
@@ -126,6 +174,70 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def _print_profile(metadata: dict):
+    """Summarize a --profile-run profile: slowest nodes first."""
+    path = profile_path(metadata["profile_id"]) if metadata.get("profile_id") else None
+    if path is None:
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        summary = json.load(f)
+
+    print(f"Profile: {path} (wall {summary['wall_seconds']}s, outside nodes {summary['outside_nodes_seconds']}s)")
+    nodes = {**summary["nodes"], **summary["tasks"]}
+    for name, stats in sorted(nodes.items(), key=lambda item: item[1]["wall_seconds"], reverse=True):
+        print(f"  {name:<12} x{stats['calls']:<3} wall {stats['wall_seconds']:>7.2f}s"
+              f"  cpu {stats['cpu_seconds']:>7.2f}s  wait {stats['wait_seconds']:>7.2f}s")
+
+
+def _run_variants(topic: str, args) -> int:
+    """
+    Generates one variant per platform in --platforms and saves each.
+    """
+    platforms = [p.strip().lower() for p in args.platforms.split(",") if p.strip()]
+    print(f"Generating variants for {', '.join(platforms)}...\n")
+
+    try:
+        result = generate_variants(
+            topic,
+            platforms,
+            profile=args.profile.lower(),
+            needs_research=args.research,
+            max_tokens_budget=args.max_tokens,
+            max_cost=args.max_cost,
+            deadline_seconds=args.deadline,
+            profile_run=args.profile_run,
+            languages=[l.strip() for l in args.languages.split(",")] if args.languages else None
+        )
+    except Exception as exc:
+        logging.exception("Unexpected error during variant generation")
+        print(f"Error: {exc}")
+        return 3
+
+    store = BlogStore()
+    for platform, variant in result["variants"].items():
+        metadata = variant["metadata"]
+        filepath = save_blog(
+            content=variant["final_blog"],
+            title=f"{metadata.get('title', 'untitled')}-{platform}",
+            metadata=metadata
+        )
+        blog_id = store.save(variant["final_blog"], metadata)
+        partial = " (partial)" if metadata.get("partial") else ""
+        print(f"{platform}: {metadata.get('word_count')} words{partial} -> {filepath} (history id {blog_id})")
+        for language, translation in variant["translations"].items():
+            translated_path = save_blog(
+                content=translation["content"],
+                title=f"{metadata.get('title', 'untitled')}-{platform}-{language}",
+                metadata={**metadata, "language": language}
+            )
+            print(f"  [{language}] -> {translated_path}")
+
+    usage = result["metadata"]["usage"]
+    print(f"Tokens: {usage.get('total_tokens', 'N/A')} | Est. cost: ${usage.get('cost_usd', 0):.4f}")
+    _print_profile(result["metadata"])
+    return 0
+
+
 # ---------------------------------------------------------------------
 # Main Entry Point
 # ---------------------------------------------------------------------
@@ -160,10 +272,23 @@ def main() -> int:
         logging.warning("Unsupported platform '%s'. Using generic.", platform)
         platform = "generic"
 
+    if args.platforms:
+        return _run_variants(topic, args)
+
     print("Generating blog...\n")
 
     try:
-        result = generate_blog(topic, platform)
+        result = generate_blog(
+            topic,
+            platform,
+            profile=args.profile.lower(),
+            research=args.research,
+            max_tokens_budget=args.max_tokens,
+            max_cost=args.max_cost,
+            deadline_seconds=args.deadline,
+            languages=[l.strip() for l in args.languages.split(",")] if args.languages else None,
+            profile_run=args.profile_run
+        )
 
         metadata = result.get("metadata", {})
         final_blog = result.get("final_blog", "")
@@ -173,14 +298,29 @@ def main() -> int:
             title=metadata.get("title", "untitled"),
             metadata=metadata
         )
+        blog_id = BlogStore().save(final_blog, metadata)
 
         print("Blog generated successfully.")
         print("-" * 50)
         print(f"Title: {metadata.get('title', 'N/A')}")
         print(f"Word count: {metadata.get('word_count', 'N/A')}")
         print(f"Sections: {metadata.get('sections', 'N/A')}")
+        print(f"Profile: {metadata.get('profile', 'N/A')}")
         print(f"Generation time: {metadata.get('generation_time', 'N/A')} seconds")
-        print(f"Saved to: {filepath}")
+        usage = metadata.get("usage", {})
+        print(f"Tokens: {usage.get('total_tokens', 'N/A')} | Est. cost: ${usage.get('cost_usd', 0):.4f}")
+        if metadata.get("partial"):
+            print(f"Partial result ({metadata.get('partial_reason')}), skipped sections {metadata.get('skipped_sections')}")
+        print(f"Saved to: {filepath} (history id {blog_id})")
+        for language, translation in (result.get("translations") or {}).items():
+            translated_path = save_blog(
+                content=translation["content"],
+                title=f"{metadata.get('title', 'untitled')}-{language}",
+                metadata={**metadata, "language": language}
+            )
+            partial = " (partial)" if translation["partial"] else ""
+            print(f"Translation [{language}]{partial}: {translated_path}")
+        _print_profile(metadata)
         print()
 
         if not args.no_preview and final_blog:
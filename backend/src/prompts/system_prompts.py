@@ -112,6 +112,36 @@ Return JSON only.
 
 
 
+# ============================================================
+# COMBINED PLANNER PROMPT (fast profile)
+# ============================================================
+
+COMBINED_PLANNER_PROMPT = """
+Decide whether research is required AND create a compact blog outline.
+
+Research:
+closed_book → Timeless, foundational, how-to basics.
+hybrid → Needs updated tools, examples, stats, case studies.
+open_book → Time-sensitive, recent events, "latest", rankings.
+If research needed, generate 2–4 precise search queries.
+
+Outline:
+• {min_sections}–{max_sections} sections with logical progression
+• Each section must include: id, title, goal, 2–4 bullets, target_words
+• Avoid generic section titles like "Overview".
+
+Return JSON:
+{{
+  "needs_research": boolean,
+  "mode": "closed_book|hybrid|open_book",
+  "queries": [],
+  "blog_title": "",
+  "sections": []
+}}
+"""
+
+
+
 # ============================================================
 # WRITER PROMPT
 # ============================================================
@@ -177,6 +207,26 @@ Return JSON:
 
 
 
+# ============================================================
+# TRANSLATION PROMPT
+# ============================================================
+
+TRANSLATION_PROMPT = """
+Translate this blog section into {language}.
+
+Rules:
+
+• Translate prose, headings, list items and link text only.
+• Keep markdown exactly: heading levels, lists, bold/italics, tables, links.
+• Keep URLs, inline `code` and placeholders like [[CODE_0]] unchanged.
+• Keep technical terms in English when that is the norm in {language}.
+• Do not add, drop or summarize content.
+
+Return ONLY the translated markdown.
+"""
+
+
+
 # ============================================================
 # EXPORT
 # ============================================================
@@ -185,7 +235,9 @@ __all__ = [
     "MASTER_BLOG_WRITER_PROMPT",
     "ROUTER_PROMPT",
     "PLANNER_PROMPT",
+    "COMBINED_PLANNER_PROMPT",
     "WRITER_PROMPT",
     "WRITER_PROMPT",
-    "QUALITY_CHECKER_PROMPT"
+    "QUALITY_CHECKER_PROMPT",
+    "TRANSLATION_PROMPT"
 ]
@@ -0,0 +1,160 @@
+"""
+Draftly - Batch SEO scoring
+
+Scores every blog in OUTPUT_DIR or the blog history store across a
+process pool, caching results by content hash, and reports throughput.
+
+Usage:
+    python seo_batch.py --source store --workers 4
+    python seo_batch.py --source output --benchmark
+"""
+
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from config import SystemConfig
+from core.seo import analyze, cache_key, SEOCache
+from utils.blog_store import BlogStore
+from utils.helpers import setup_logging
+
+
+# (doc id, content, topic, platform)
+Doc = Tuple[str, str, str, str]
+
+
+# ---------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------
+
+def iter_output_dir(output_dir: str) -> Iterator[Doc]:
+    """Markdown files in OUTPUT_DIR with their *_metadata.json sidecars."""
+    for path in sorted(Path(output_dir).glob("*.md")):
+        meta_path = path.with_name(f"{path.stem}_metadata.json")
+        metadata = {}
+        if meta_path.exists():
+            try:
+                metadata = json.loads(meta_path.read_text(encoding="utf-8"))
+            except ValueError:
+                logging.warning("Unreadable metadata for %s", path.name)
+        yield (
+            str(path),
+            path.read_text(encoding="utf-8"),
+            metadata.get("topic") or metadata.get("title") or path.stem.replace("_", " "),
+            metadata.get("platform", "generic"),
+        )
+
+
+def iter_blog_store(page_size: int = 100) -> Iterator[Doc]:
+    """Every stored blog, newest first, paged by keyset cursor."""
+    store = BlogStore()
+    cursor = None
+    while True:
+        page = store.list(limit=page_size, cursor=cursor)
+        for item in page["items"]:
+            blog = store.get(item["id"])
+            if blog:
+                yield str(blog["id"]), blog["content"], blog["topic"], blog["platform"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+
+# ---------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------
+
+def _score(doc: Doc) -> Tuple[str, dict]:
+    doc_id, content, topic, platform = doc
+    return doc_id, analyze(content, topic, platform)
+
+
+def score_batch(docs: List[Doc], workers: int, use_cache: bool = True) -> dict:
+    """Score docs across a process pool; cached results are not recomputed."""
+    cache = SEOCache() if use_cache else None
+    keys = {doc[0]: cache_key(doc[1], doc[2], doc[3]) for doc in docs}
+    cached = cache.get_many(list(keys.values())) if cache else {}
+
+    results = {doc_id: cached[key] for doc_id, key in keys.items() if key in cached}
+    pending = [doc for doc in docs if doc[0] not in results]
+
+    start = time.perf_counter()
+    if pending:
+        if workers > 1:
+            chunksize = max(1, len(pending) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                scored = dict(pool.map(_score, pending, chunksize=chunksize))
+        else:
+            scored = dict(map(_score, pending))
+        results.update(scored)
+        if cache:
+            cache.put_many({keys[doc_id]: result for doc_id, result in scored.items()})
+    elapsed = time.perf_counter() - start
+
+    return {
+        "results": results,
+        "scored": len(pending),
+        "cached": len(docs) - len(pending),
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(len(pending) / elapsed, 1) if pending and elapsed else None,
+    }
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Draftly - batch SEO scoring")
+    parser.add_argument("--source", choices=["output", "store"], default="store",
+                        help="Score OUTPUT_DIR markdown files or the blog history store")
+    parser.add_argument("--workers", type=int, default=4, help="Process pool size")
+    parser.add_argument("--limit", type=int, help="Score at most this many blogs")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not write cached scores")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare uncached throughput with 1 worker and with --workers")
+    parser.add_argument("--output", type=str, help="Write all results to this JSON file")
+    return parser.parse_args()
+
+
+def main() -> int:
+    setup_logging()
+    args = parse_arguments()
+
+    source = iter_output_dir(SystemConfig.OUTPUT_DIR) if args.source == "output" else iter_blog_store()
+    docs = []
+    for doc in source:
+        docs.append(doc)
+        if args.limit and len(docs) >= args.limit:
+            break
+
+    if not docs:
+        print("No blogs found.")
+        return 1
+
+    if args.benchmark:
+        for workers in sorted({1, args.workers}):
+            run = score_batch(docs, workers, use_cache=False)
+            print(f"{workers} worker(s): {len(docs)} docs in {run['seconds']}s -> {run['docs_per_sec']} docs/sec")
+        return 0
+
+    run = score_batch(docs, args.workers, use_cache=not args.no_cache)
+    scores = [r["score"] for r in run["results"].values()]
+    print(f"Scored {run['scored']} blog(s), {run['cached']} from cache, in {run['seconds']}s"
+          + (f" ({run['docs_per_sec']} docs/sec)" if run["docs_per_sec"] else ""))
+    print(f"Average score: {sum(scores) / len(scores):.1f} | Lowest: {min(scores):.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run["results"], f, indent=2, ensure_ascii=False)
+        print(f"Results written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,229 @@
+"""
+Blog history store: a single SQLite database with an FTS5 index.
+"""
+
+import json
+import hashlib
+import sqlite3
+import os
+import threading
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+from config import SystemConfig
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blogs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    word_count INTEGER NOT NULL DEFAULT 0,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_blogs_platform ON blogs(platform, id);
+CREATE INDEX IF NOT EXISTS idx_blogs_created ON blogs(created_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts USING fts5(
+    title, topic, content,
+    content='blogs', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS blogs_ai AFTER INSERT ON blogs BEGIN
+    INSERT INTO blogs_fts(rowid, title, topic, content)
+    VALUES (new.id, new.title, new.topic, new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS blogs_ad AFTER DELETE ON blogs BEGIN
+    INSERT INTO blogs_fts(blogs_fts, rowid, title, topic, content)
+    VALUES ('delete', old.id, old.title, old.topic, old.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS blogs_au AFTER UPDATE ON blogs BEGIN
+    INSERT INTO blogs_fts(blogs_fts, rowid, title, topic, content)
+    VALUES ('delete', old.id, old.title, old.topic, old.content);
+    INSERT INTO blogs_fts(rowid, title, topic, content)
+    VALUES (new.id, new.title, new.topic, new.content);
+END;
+"""
+
+_SUMMARY_COLUMNS = "id, title, topic, platform, word_count, content_hash, created_at"
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _fts_query(text: str) -> str:
+    """Quote each term so user input can't inject FTS5 syntax."""
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " ".join(f'"{t}"' for t in terms if t)
+
+
+class SQLiteStore:
+    """Base for stores sharing the local SQLite database."""
+
+    SCHEMA = ""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or SystemConfig.DB_PATH
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+        _stores.add(self)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers proceed during writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+# SQLite connections must not cross fork(): a worker forked from a process
+# that already opened them (gunicorn preload) starts with fresh ones
+_stores: "weakref.WeakSet[SQLiteStore]" = weakref.WeakSet()
+_inherited: list = []
+
+
+def _reset_after_fork():
+    for store in list(_stores):
+        # Keep the parent's objects referenced so they are never closed (or
+        # finalized) from the child, which could disturb the parent's locks
+        _inherited.append(store._local)
+        store._local = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class BlogStore(SQLiteStore):
+    """SQLite-backed store for generated blogs."""
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__(db_path)
+        # Databases created before content_hash was unique may hold copies
+        # saved by concurrent requests: keep the first of each, then enforce it
+        conn = self._conn()
+        unique = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_blogs_content_hash'"
+        ).fetchone()
+        if not unique:
+            with conn:
+                conn.execute("DELETE FROM blogs WHERE id NOT IN (SELECT MIN(id) FROM blogs GROUP BY content_hash)")
+                conn.execute("DROP INDEX IF EXISTS idx_blogs_hash")
+                conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_blogs_content_hash ON blogs(content_hash)")
+
+    def save(self, content: str, metadata: dict) -> int:
+        """Store a blog and return its id. Identical content is stored once,
+        also when several requests save it at the same time."""
+        digest = content_hash(content)
+        conn = self._conn()
+
+        with conn:
+            conn.execute(
+                "INSERT INTO blogs (title, topic, platform, word_count, content, metadata, content_hash, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(content_hash) DO NOTHING",
+                (
+                    metadata.get("title", "Untitled"),
+                    metadata.get("topic", ""),
+                    metadata.get("platform", "generic"),
+                    int(metadata.get("word_count", 0)),
+                    content,
+                    json.dumps(metadata, ensure_ascii=False),
+                    digest,
+                    datetime.utcnow().isoformat(timespec="seconds"),
+                )
+            )
+        row = conn.execute("SELECT id FROM blogs WHERE content_hash = ?", (digest,)).fetchone()
+        return int(row["id"])
+
+    def get(self, blog_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            f"SELECT {_SUMMARY_COLUMNS}, content, metadata FROM blogs WHERE id = ?",
+            (blog_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        blog = dict(row)
+        blog["metadata"] = json.loads(blog["metadata"])
+        return blog
+
+    def get_by_hash(self, digest: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT id FROM blogs WHERE content_hash = ?", (digest,)
+        ).fetchone()
+        return self.get(row["id"]) if row else None
+
+    def get_hash(self, blog_id: int) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT content_hash FROM blogs WHERE id = ?", (blog_id,)
+        ).fetchone()
+        return row["content_hash"] if row else None
+
+    def list(self,
+             limit: int = 20,
+             cursor: Optional[int] = None,
+             platform: Optional[str] = None,
+             date_from: Optional[str] = None,
+             date_to: Optional[str] = None) -> Dict[str, Any]:
+        """List blog summaries, newest first, with keyset pagination.
+
+        Args:
+            cursor: id of the last item from the previous page
+            date_from/date_to: ISO dates (inclusive)
+        """
+        clauses, params = [], []
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform)
+        if date_from:
+            clauses.append("created_at >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("created_at < date(?, '+1 day')")
+            params.append(date_to)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM blogs {where} ORDER BY id DESC LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+
+        items = [dict(r) for r in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over title, topic and content, best match first."""
+        match = _fts_query(query)
+        if not match:
+            return []
+
+        rows = self._conn().execute(
+            "SELECT b.id, b.title, b.topic, b.platform, b.word_count, b.content_hash, b.created_at, "
+            "snippet(blogs_fts, 2, '**', '**', '…', 16) AS snippet "
+            "FROM blogs_fts JOIN blogs b ON b.id = blogs_fts.rowid "
+            "WHERE blogs_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit)
+        ).fetchall()
+        return [dict(r) for r in rows]
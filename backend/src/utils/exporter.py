@@ -0,0 +1,319 @@
+"""
+Server-side export of blog markdown to HTML, PDF and DOCX.
+
+Rendering uses local libraries only (markdown, fpdf2, python-docx), which are
+imported lazily so the API starts without them. It runs in a process pool so
+CPU-heavy renders never block generation. Artifacts are cached on disk by
+content hash and format, so a repeat download is a file read.
+"""
+
+import os
+import re
+import html
+import asyncio
+import tempfile
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import SystemConfig
+from utils.blog_store import content_hash
+
+
+FORMATS = {
+    "html": "text/html; charset=utf-8",
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+body {{ max-width: 46rem; margin: 2rem auto; padding: 0 1rem; font: 17px/1.6 Georgia, serif; color: #222; }}
+h1, h2, h3 {{ font-family: system-ui, sans-serif; line-height: 1.25; }}
+pre {{ background: #f6f8fa; padding: 1rem; overflow-x: auto; font-size: 14px; }}
+code {{ font-family: ui-monospace, Menlo, monospace; }}
+blockquote {{ border-left: 4px solid #ddd; margin-left: 0; padding-left: 1rem; color: #555; }}
+table {{ border-collapse: collapse; }} td, th {{ border: 1px solid #ddd; padding: .4rem .6rem; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+_LATIN1_REPLACEMENTS = str.maketrans({
+    "‘": "'", "’": "'", "“": '"', "”": '"',
+    "–": "-", "—": "-", "…": "...", "•": "-", " ": " ",
+})
+
+
+class ExportUnavailable(RuntimeError):
+    """Raised when the library a format needs is not installed."""
+
+
+# ---------------- RENDERERS ----------------
+
+def _markdown_to_html(markdown_text: str) -> str:
+    try:
+        import markdown
+    except ImportError:
+        raise ExportUnavailable("Install 'markdown' to export HTML/PDF.")
+    return markdown.markdown(markdown_text, extensions=["fenced_code", "tables", "sane_lists"])
+
+
+def render_html(markdown_text: str, title: str) -> bytes:
+    body = _markdown_to_html(markdown_text)
+    return _HTML_TEMPLATE.format(title=html.escape(title), body=body).encode("utf-8")
+
+
+def _to_latin1(text: str) -> str:
+    """Core PDF fonts are latin-1 only: map common punctuation, drop the rest."""
+    text = unicodedata.normalize("NFKC", text.translate(_LATIN1_REPLACEMENTS))
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+# write_html switches to these styles for <b>, <i> and <b><i>
+_FONT_STYLES = {"B": ("Bold",), "I": ("Oblique", "Italic"), "BI": ("BoldOblique", "BoldItalic")}
+
+
+def _font_family(path: str) -> Optional[Dict[str, str]]:
+    """Files for every style of a TTF family, found next to the regular file
+    (DejaVuSans.ttf -> DejaVuSans-Bold.ttf, DejaVuSans-Oblique.ttf, ...).
+
+    Missing styles reuse the nearest face that exists: bold and italic the
+    regular file, bold italic the bold one. Markdown then renders upright
+    instead of losing non-latin text to the Helvetica fallback. None if the
+    regular file is missing.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    regular = Path(path)
+    files = {"": str(regular)}
+    fallbacks = {"B": "", "I": "", "BI": "B"}
+    for style, names in _FONT_STYLES.items():
+        for name in names:
+            candidate = regular.with_name(f"{regular.stem}-{name}{regular.suffix}")
+            if candidate.exists():
+                files[style] = str(candidate)
+                break
+        else:
+            files[style] = files[fallbacks[style]]
+    return files
+
+
+def render_pdf(markdown_text: str, title: str) -> bytes:
+    try:
+        from fpdf import FPDF
+    except ImportError:
+        raise ExportUnavailable("Install 'fpdf2' to export PDF.")
+
+    body = _markdown_to_html(markdown_text)
+    pdf = FPDF()
+    pdf.set_title(title)
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+
+    family = _font_family(SystemConfig.PDF_FONT_PATH)
+    if family:
+        for style, fname in family.items():
+            pdf.add_font("body", style=style, fname=fname)
+        pdf.write_html(body, font_family="body", pre_code_font="body")
+    else:
+        pdf.write_html(_to_latin1(body), font_family="helvetica")
+
+    return bytes(pdf.output())
+
+
+_INLINE_RE = re.compile(
+    r"(?P<bold>\*\*(?P<btext>.+?)\*\*)"
+    r"|(?P<code>`(?P<ctext>[^`]+)`)"
+    r"|(?P<link>\[(?P<ltext>[^\]]+)\]\((?P<url>[^)\s]+)[^)]*\))"
+    r"|(?P<italic>(?<![\w*])[*_](?P<itext>[^*_]+)[*_](?![\w*]))"
+)
+
+
+def _add_inline(paragraph, text: str):
+    """Add text to a docx paragraph, mapping **bold**, *italic*, `code` and links to runs."""
+    position = 0
+    for m in _INLINE_RE.finditer(text):
+        if m.start() > position:
+            paragraph.add_run(text[position:m.start()])
+        if m.group("bold"):
+            paragraph.add_run(m.group("btext")).bold = True
+        elif m.group("code"):
+            paragraph.add_run(m.group("ctext")).font.name = "Courier New"
+        elif m.group("link"):
+            paragraph.add_run(m.group("ltext")).underline = True
+            paragraph.add_run(f" ({m.group('url')})")
+        else:
+            paragraph.add_run(m.group("itext")).italic = True
+        position = m.end()
+    if position < len(text):
+        paragraph.add_run(text[position:])
+
+
+def render_docx(markdown_text: str, title: str) -> bytes:
+    try:
+        from docx import Document
+        from docx.shared import Pt
+    except ImportError:
+        raise ExportUnavailable("Install 'python-docx' to export DOCX.")
+
+    import io
+
+    document = Document()
+    document.core_properties.title = title
+
+    paragraph_lines: list = []
+    code_lines: list = []
+    table_rows: list = []
+    in_code = False
+
+    def flush_paragraph():
+        if paragraph_lines:
+            _add_inline(document.add_paragraph(), " ".join(paragraph_lines))
+            paragraph_lines.clear()
+
+    def flush_table():
+        rows = [r for r in table_rows if not re.fullmatch(r"[\s|:-]+", r)]
+        table_rows.clear()
+        if not rows:
+            return
+        cells = [[c.strip() for c in r.strip().strip("|").split("|")] for r in rows]
+        table = document.add_table(rows=len(cells), cols=max(len(r) for r in cells))
+        table.style = "Table Grid"
+        for i, row in enumerate(cells):
+            for j, value in enumerate(row):
+                _add_inline(table.cell(i, j).paragraphs[0], value)
+
+    for line in markdown_text.splitlines():
+        if line.startswith(("```", "~~~")):
+            if in_code:
+                run = document.add_paragraph().add_run("\n".join(code_lines))
+                run.font.name = "Courier New"
+                run.font.size = Pt(9)
+                code_lines.clear()
+            else:
+                flush_paragraph()
+                flush_table()
+            in_code = not in_code
+            continue
+        if in_code:
+            code_lines.append(line)
+            continue
+
+        if line.lstrip().startswith("|"):
+            flush_paragraph()
+            table_rows.append(line)
+            continue
+        flush_table()
+
+        heading = re.match(r"^(#{1,6})\s+(.*)", line)
+        bullet = re.match(r"^\s*[-*+]\s+(.*)", line)
+        numbered = re.match(r"^\s*\d+[.)]\s+(.*)", line)
+        if heading:
+            flush_paragraph()
+            document.add_heading(heading.group(2).strip(), level=len(heading.group(1)))
+        elif bullet or numbered:
+            flush_paragraph()
+            style = "List Bullet" if bullet else "List Number"
+            _add_inline(document.add_paragraph(style=style), (bullet or numbered).group(1))
+        elif line.startswith(">"):
+            flush_paragraph()
+            _add_inline(document.add_paragraph(style="Quote"), line.lstrip("> "))
+        elif not line.strip() or re.fullmatch(r"\s*([-*_])\s*(\1\s*){2,}", line):
+            flush_paragraph()
+        else:
+            paragraph_lines.append(line.strip())
+
+    flush_paragraph()
+    flush_table()
+    if in_code and code_lines:
+        document.add_paragraph().add_run("\n".join(code_lines)).font.name = "Courier New"
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+_RENDERERS = {"html": render_html, "pdf": render_pdf, "docx": render_docx}
+
+
+def render(markdown_text: str, fmt: str, title: str) -> bytes:
+    """Render markdown to `fmt`. Top-level so it can run in a process pool."""
+    return _RENDERERS[fmt](markdown_text, title)
+
+
+# ---------------- CACHE + POOL ----------------
+
+class Exporter:
+    """Renders in a process pool and caches artifacts by content hash and format."""
+
+    def __init__(self, cache_dir: Optional[str] = None, workers: int = SystemConfig.EXPORT_WORKERS):
+        self.cache_dir = Path(cache_dir or Path(SystemConfig.CACHE_DIR) / "exports")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def path(self, digest: str, fmt: str) -> Path:
+        return self.cache_dir / f"{digest}.{fmt}"
+
+    def _store(self, digest: str, fmt: str, data: bytes) -> Path:
+        # Write-then-rename so a concurrent download never sees a partial file
+        path = self.path(digest, fmt)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return path
+
+    async def _render(self, content: str, fmt: str, title: str, digest: str) -> Path:
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self._executor(), render, content, fmt, title)
+        return await loop.run_in_executor(None, self._store, digest, fmt, data)
+
+    async def export(self, content: str, fmt: str, title: str, digest: Optional[str] = None) -> Path:
+        """Path of the rendered artifact, rendering at most once per (hash, format)."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        digest = digest or content_hash(content)
+        path = self.path(digest, fmt)
+        if path.exists():
+            return path
+
+        # Concurrent requests for the same artifact share one render
+        key = (digest, fmt)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render(content, fmt, title, digest))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -4,39 +4,144 @@ Utility helpers: logging, caching, file saving, word counting.
 
 import os
 import json
+import atexit
 import logging
+import queue
+import random
+import tempfile
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime, timedelta
 from pathlib import Path
 
 from config import SystemConfig
+from utils import profiler
 
 
 # ---------------- LOGGING ----------------
 
+# Current run id (always server-generated), attached to every log record
+run_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("run_id", default="-")
+# The client's X-Request-ID, for log correlation only; never keys run state
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+_listener: "QueueListener | None" = None
+
+
+class RunContextFilter(logging.Filter):
+    """Stamp records with the run and request ids and sample high-volume DEBUG logs.
+
+    Runs in the calling thread (on the QueueHandler), so the run id is
+    read from the caller's context before the record is queued.
+    """
+
+    def __init__(self, debug_sample_rate: float = 1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        record.run_id = run_id_var.get()
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "run_id": getattr(record, "run_id", "-"),
+            "request_id": getattr(record, "request_id", "-"),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
 def setup_logging():
-    """Configure application logging."""
+    """Configure application logging.
+
+    Log calls only enqueue the record; a QueueListener thread does the
+    file (JSON, size-rotated) and console I/O off the request path.
+    """
+    global _listener
 
     root_logger = logging.getLogger()
     root_logger.setLevel(SystemConfig.LOG_LEVEL)
 
-    # Prevent duplicate handlers
-    if root_logger.handlers:
-        root_logger.handlers.clear()
-
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    )
+    # Prevent duplicate handlers. A repeat call also retires the previous
+    # listener: drain it, close its file, and drop its exit hook
+    if _listener is not None:
+        atexit.unregister(_listener.stop)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    for handler in root_logger.handlers:
+        if isinstance(handler, QueueHandler):
+            handler.close()
+    root_logger.handlers.clear()
 
     # File handler
-    file_handler = logging.FileHandler(SystemConfig.LOG_FILE)
-    file_handler.setFormatter(formatter)
+    file_handler = RotatingFileHandler(
+        SystemConfig.LOG_FILE,
+        maxBytes=SystemConfig.LOG_MAX_BYTES,
+        backupCount=SystemConfig.LOG_BACKUP_COUNT,
+        encoding="utf-8"
+    )
+    file_handler.setFormatter(JSONFormatter())
 
     # Console handler
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(logging.Formatter(
+        "%(asctime)s | %(levelname)s | %(run_id)s | %(name)s | %(message)s"
+    ))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RunContextFilter(SystemConfig.LOG_DEBUG_SAMPLE_RATE))
+    root_logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def _restart_log_listener():
+    """The listener thread does not survive fork (e.g. gunicorn preload), so
+    a forked worker starts its own on the same queue and handlers."""
+    global _listener
+    if _listener is None:
+        return
+    atexit.unregister(_listener.stop)
+    _listener = QueueListener(_listener.queue, *_listener.handlers,
+                              respect_handler_level=_listener.respect_handler_level)
+    _listener.start()
+    atexit.register(_listener.stop)
+
 
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_log_listener)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that runs tasks in the submitter's context,
+    so the run id (and other context vars) follow work into the pool."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        ctx = contextvars.copy_context()
+        run_profile = profiler.active(ctx.get(run_id_var))
+        if run_profile is not None:
+            fn = run_profile.wrap(fn, getattr(fn, "__name__", "task"))
+        return super().submit(ctx.run, fn, *args, **kwargs)
 
 
 # ---------------- CACHE ----------------
@@ -56,8 +161,11 @@ class CacheManager:
         if not path.exists():
             return None
 
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
 
         timestamp = datetime.fromisoformat(data["timestamp"])
         if datetime.utcnow() - timestamp > timedelta(hours=SystemConfig.CACHE_TTL_HOURS):
@@ -66,17 +174,28 @@ class CacheManager:
         return data["value"]
 
     def set(self, key: str, value):
+        # Write a temp file and rename it over the entry, so concurrent
+        # writers (threads or worker processes) never leave a torn file
         path = self._get_path(key)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "value": value
-                },
-                f,
-                ensure_ascii=False,
-                indent=2
-            )
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "timestamp": datetime.utcnow().isoformat(),
+                        "value": value
+                    },
+                    f,
+                    ensure_ascii=False,
+                    indent=2
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
 
 
 # ---------------- FILE SAVING ----------------
@@ -91,14 +210,21 @@ def save_blog(content: str, title: str, metadata: dict) -> str:
     # Remove characters invalid in Windows filenames
     safe_title = re.sub(r'[<>:"/\\|?*]', '', title.lower()).replace(" ", "_")
     safe_title = safe_title.strip("_") or "untitled"
-    filename = f"{safe_title}.md"
-    filepath = output_dir / filename
+
+    # Never overwrite an earlier post with the same title
+    stem = safe_title
+    suffix = 2
+    while (output_dir / f"{stem}.md").exists():
+        stem = f"{safe_title}_{suffix}"
+        suffix += 1
+
+    filepath = output_dir / f"{stem}.md"
 
     with open(filepath, "w", encoding="utf-8") as f:
         f.write(content)
 
     # Also save metadata
-    meta_path = output_dir / f"{safe_title}_metadata.json"
+    meta_path = output_dir / f"{stem}_metadata.json"
     with open(meta_path, "w", encoding="utf-8") as f:
         json.dump(metadata, f, indent=2, ensure_ascii=False)
 
@@ -0,0 +1,74 @@
+"""
+In-process metrics: counters and timing observations.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict, Any, Iterable
+
+
+class Metrics:
+    """Thread-safe counter and observation registry."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._observations: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1):
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float):
+        """Record a single observation (e.g. a latency in seconds)."""
+        with self._lock:
+            stats = self._observations.get(name)
+            if stats is None:
+                self._observations[name] = {"count": 1, "sum": value, "max": value}
+                return
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["max"] = max(stats["max"], value)
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of all counters and observation summaries."""
+        with self._lock:
+            observations = {
+                name: {**stats, "avg": stats["sum"] / stats["count"]}
+                for name, stats in self._observations.items()
+            }
+            return {
+                "counters": dict(self._counters),
+                "observations": observations,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+metrics = Metrics()
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine snapshots from several processes: counters and observation
+    counts/sums add up, maxima take the largest."""
+    counters: Dict[str, float] = defaultdict(float)
+    observations: Dict[str, Dict[str, float]] = {}
+    for snap in snapshots:
+        for name, value in snap.get("counters", {}).items():
+            counters[name] += value
+        for name, stats in snap.get("observations", {}).items():
+            merged = observations.setdefault(name, {"count": 0, "sum": 0.0, "max": stats["max"]})
+            merged["count"] += stats["count"]
+            merged["sum"] += stats["sum"]
+            merged["max"] = max(merged["max"], stats["max"])
+    for stats in observations.values():
+        stats["avg"] = stats["sum"] / stats["count"] if stats["count"] else 0.0
+    return {"counters": dict(counters), "observations": observations}
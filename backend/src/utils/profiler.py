@@ -0,0 +1,265 @@
+"""
+Per-run profiling, switched on for a single API request (X-Draftly-Profile
+header) or CLI run (--profile-run).
+
+A profiled run records wall and CPU time for every graph node and pool task,
+plus a deterministic cProfile of each, merged into one pstats file. Both are
+saved to PROFILE_DIR as <run_id>.json (summary) and <run_id>.prof (load with
+pstats or snakeviz). Runs that are not profiled pay one dict lookup per node.
+"""
+
+import re
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import SystemConfig
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+_active: Dict[str, "RunProfile"] = {}
+_active_lock = threading.Lock()
+# Set while a profiler is enabled on this thread; nested spans only time
+_local = threading.local()
+
+
+def _safe_id(run_id: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", run_id)[:64] or "run"
+
+
+class RunProfile:
+    """Timings and merged cProfile stats of one run, across threads."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.started_at = datetime.utcnow().isoformat(timespec="seconds")
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.spans: List[dict] = []
+        self._stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "node"):
+        profiler = None
+        if not getattr(_local, "profiling", False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                _local.profiling = True
+            except ValueError:
+                # Python 3.12+ allows one active profiler per process
+                profiler = None
+
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu_start
+            if profiler is not None:
+                profiler.disable()
+                _local.profiling = False
+
+            with self._lock:
+                self.spans.append({
+                    "name": name,
+                    "kind": kind,
+                    "thread": threading.current_thread().name,
+                    "offset_seconds": round(start - self.started, 4),
+                    "wall_seconds": round(wall, 4),
+                    "cpu_seconds": round(cpu, 4),
+                })
+                if profiler is not None:
+                    try:
+                        if self._stats is None:
+                            self._stats = pstats.Stats(profiler)
+                        else:
+                            self._stats.add(profiler)
+                    except TypeError:
+                        # Nothing was recorded (e.g. the span raised immediately)
+                        pass
+
+    def wrap(self, fn, name: str, kind: str = "task"):
+        def profiled(*args, **kwargs):
+            with self.span(name, kind):
+                return fn(*args, **kwargs)
+        return profiled
+
+    # ---------------- Summary ----------------
+
+    def _totals(self, kind: str) -> Dict[str, dict]:
+        totals: Dict[str, dict] = {}
+        for span in self.spans:
+            if span["kind"] != kind:
+                continue
+            entry = totals.setdefault(span["name"], {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+            entry["calls"] += 1
+            entry["wall_seconds"] += span["wall_seconds"]
+            entry["cpu_seconds"] += span["cpu_seconds"]
+        for entry in totals.values():
+            # Wall time not spent on this thread's CPU: network, locks, sleeps
+            entry["wait_seconds"] = round(max(0.0, entry["wall_seconds"] - entry["cpu_seconds"]), 4)
+            entry["wall_seconds"] = round(entry["wall_seconds"], 4)
+            entry["cpu_seconds"] = round(entry["cpu_seconds"], 4)
+        return totals
+
+    def _outside_nodes(self, wall: float) -> float:
+        """Run time covered by no node span: graph scheduling, reducers, setup."""
+        intervals = sorted(
+            (s["offset_seconds"], s["offset_seconds"] + s["wall_seconds"])
+            for s in self.spans if s["kind"] == "node"
+        )
+        covered, end = 0.0, 0.0
+        for a, b in intervals:
+            if b > end:
+                covered += b - max(a, end)
+                end = b
+        return round(max(0.0, wall - covered), 4)
+
+    def _hotspots(self) -> Dict[str, float]:
+        """Cumulative seconds in the usual suspects. Categories can overlap
+        (JSON parsing inside a cache read counts for both)."""
+        totals = {"http": 0.0, "structured_parse": 0.0, "json": 0.0, "cache_io": 0.0, "langgraph": 0.0}
+        if self._stats is None:
+            return totals
+        for (filename, _, func), (_, _, tottime, cumtime, _) in self._stats.stats.items():
+            path = filename.replace("\\", "/")
+            if path.endswith("requests/sessions.py") and func == "send":
+                totals["http"] += cumtime
+            elif path.endswith("core/llm_client.py") and func == "_parse_structured":
+                totals["structured_parse"] += cumtime
+            elif path.endswith("json/__init__.py") and func in ("loads", "dumps", "dump"):
+                totals["json"] += cumtime
+            elif path.endswith("utils/helpers.py") and func in ("get", "set"):
+                totals["cache_io"] += cumtime
+            elif "/langgraph/" in path:
+                totals["langgraph"] += tottime
+        return {name: round(value, 4) for name, value in totals.items()}
+
+    def _top_functions(self, limit: int) -> List[dict]:
+        if self._stats is None:
+            return []
+        rows = sorted(self._stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [
+            {
+                "function": f"{Path(filename).name}:{line}({func})" if filename != "~" else func,
+                "calls": calls,
+                "tottime": round(tottime, 4),
+                "cumtime": round(cumtime, 4),
+            }
+            for (filename, line, func), (_, calls, tottime, cumtime, _) in rows
+        ]
+
+    def summary(self) -> dict:
+        wall = time.perf_counter() - self.started
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "wall_seconds": round(wall, 4),
+                # Whole process: includes any other runs in flight
+                "process_cpu_seconds": round(time.process_time() - self.cpu_started, 4),
+                "outside_nodes_seconds": self._outside_nodes(wall),
+                "nodes": self._totals("node"),
+                "tasks": self._totals("task"),
+                "hotspots": self._hotspots(),
+                "top_functions": self._top_functions(SystemConfig.PROFILE_TOP_FUNCTIONS),
+                "spans": sorted(self.spans, key=lambda s: s["offset_seconds"]),
+            }
+
+    def save(self, profile_dir: Optional[str] = None) -> dict:
+        directory = Path(profile_dir or SystemConfig.PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = _safe_id(self.run_id)
+
+        summary = self.summary()
+        with self._lock:
+            if self._stats is not None:
+                self._stats.dump_stats(str(directory / f"{stem}.prof"))
+                summary["pstats_file"] = f"{stem}.prof"
+        with open(directory / f"{stem}.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+# ---------------- Registry ----------------
+
+def active(run_id: Optional[str]) -> Optional[RunProfile]:
+    """The run's profile if it is being profiled. Lock-free: the hot path."""
+    return _active.get(run_id) if _active else None
+
+
+def start(run_id: str) -> RunProfile:
+    profile = RunProfile(run_id)
+    with _active_lock:
+        _active[run_id] = profile
+    metrics.incr("profiler.runs")
+    return profile
+
+
+def finish(run_id: str) -> Optional[dict]:
+    """Stop profiling a run and save it. Returns the summary."""
+    with _active_lock:
+        profile = _active.pop(run_id, None)
+    if profile is None:
+        return None
+    try:
+        summary = profile.save()
+    except OSError as e:
+        logger.warning(f"Could not save profile for run {run_id}: {e}")
+        return None
+    logger.info(f"Profile saved: {SystemConfig.PROFILE_DIR}/{_safe_id(run_id)}.json")
+    return summary
+
+
+@contextmanager
+def profiled_run(run_id: str, enabled: bool):
+    """Profile the enclosed run when enabled; yields the RunProfile or None."""
+    if not enabled:
+        yield None
+        return
+    profile = start(run_id)
+    try:
+        with profile.span("run", kind="run"):
+            yield profile
+    finally:
+        finish(run_id)
+
+
+# ---------------- Stored profiles ----------------
+
+def list_profiles(limit: int = 50) -> List[dict]:
+    directory = Path(SystemConfig.PROFILE_DIR)
+    if not directory.exists():
+        return []
+    paths = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    items = []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        items.append({
+            "run_id": data.get("run_id", path.stem),
+            "started_at": data.get("started_at"),
+            "wall_seconds": data.get("wall_seconds"),
+            "has_pstats": bool(data.get("pstats_file")),
+        })
+    return items
+
+
+def profile_path(run_id: str, ext: str = "json") -> Optional[Path]:
+    path = Path(SystemConfig.PROFILE_DIR) / f"{_safe_id(run_id)}.{ext}"
+    return path if path.exists() else None
@@ -0,0 +1,57 @@
+"""BlogStore stores identical content once, also under concurrent saves."""
+
+import sqlite3
+import threading
+
+from utils.blog_store import BlogStore, content_hash
+
+METADATA = {"title": "T", "topic": "t", "platform": "generic", "word_count": 2}
+
+
+def test_save_same_content_returns_same_id(tmp_path):
+    store = BlogStore(str(tmp_path / "blogs.db"))
+    first = store.save("hello world", METADATA)
+    assert store.save("hello world", {**METADATA, "title": "Other"}) == first
+    assert store.save("something else", METADATA) != first
+
+
+def test_concurrent_saves_store_one_row(tmp_path):
+    store = BlogStore(str(tmp_path / "blogs.db"))
+    barrier = threading.Barrier(8)
+    ids = []
+
+    def save():
+        barrier.wait()
+        ids.append(store.save("same draft", METADATA))
+
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(ids)) == 1
+    count = store._conn().execute("SELECT COUNT(*) FROM blogs").fetchone()[0]
+    assert count == 1
+
+
+def test_legacy_duplicates_are_collapsed(tmp_path):
+    path = str(tmp_path / "blogs.db")
+    BlogStore(path)
+    # A database from before the unique index, with a duplicate saved by a race
+    conn = sqlite3.connect(path)
+    conn.execute("DROP INDEX idx_blogs_content_hash")
+    for _ in range(2):
+        conn.execute(
+            "INSERT INTO blogs (title, topic, platform, word_count, content, metadata, content_hash, created_at) "
+            "VALUES ('T', 't', 'generic', 1, 'dup', '{}', ?, '2026-01-01T00:00:00')",
+            (content_hash("dup"),)
+        )
+    conn.commit()
+    conn.close()
+
+    store = BlogStore(path)
+    assert store.save("dup", METADATA) == 1
+    assert store._conn().execute("SELECT COUNT(*) FROM blogs").fetchone()[0] == 1
+    # The dropped copy leaves the full-text index too
+    assert [blog["id"] for blog in store.search("dup")] == [1]
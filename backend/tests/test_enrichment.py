@@ -0,0 +1,152 @@
+"""PageFetcher against a local HTTP fixture server."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import pytest
+
+pytest.importorskip("requests")
+
+from config import SystemConfig
+from core import enrichment
+from core.enrichment import BlockedURL, PageFetcher
+
+ARTICLE = (
+    "<html><head><title>Fixture page</title><script>var tracking = 'not content at all';</script></head>"
+    "<body><nav><p>Home About Pricing Contact Blog</p></nav>"
+    "<article><h1>Streaming extraction</h1>"
+    "<p>Main text is extracted while the body streams in.</p>"
+    "<p>Only the best chunks per page go into the evidence.</p></article>"
+    "<footer><p>Copyright and other footer boilerplate text</p></footer></body></html>"
+)
+BIG = "<html><body>" + "<p>filler words for the byte cap test</p>" * 60_000 + "</body></html>"
+
+
+class FixtureServer:
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server.requests.append((self.path, self.headers.get("If-None-Match")))
+                path = self.path.split("?")[0]
+                if path == "/article":
+                    if self.headers.get("If-None-Match") == '"v1"':
+                        return self._send(304, headers={"ETag": '"v1"'})
+                    return self._send(200, ARTICLE.encode(), {"Content-Type": "text/html; charset=utf-8",
+                                                              "ETag": '"v1"'})
+                if path == "/slow":
+                    with server._lock:
+                        server.active += 1
+                        server.peak = max(server.peak, server.active)
+                    time.sleep(0.2)
+                    with server._lock:
+                        server.active -= 1
+                    return self._send(200, ARTICLE.encode(), {"Content-Type": "text/html"})
+                if path == "/big":
+                    return self._send(200, BIG.encode(), {"Content-Type": "text/html"})
+                if path == "/redirect":
+                    location = unquote(self.path.split("to=", 1)[1])
+                    return self._send(302, headers={"Location": location})
+                self._send(404)
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    with FixtureServer() as s:
+        yield s
+
+
+def _fetcher(tmp_path, **kwargs) -> PageFetcher:
+    return PageFetcher(cache_dir=str(tmp_path / "pages"), allow_private=True, **kwargs)
+
+
+def test_extracts_main_text(server, tmp_path):
+    doc = _fetcher(tmp_path).fetch(f"{server.url}/article")
+    assert doc["title"] == "Fixture page"
+    assert doc["etag"] == '"v1"'
+    assert "Main text is extracted" in doc["text"]
+    assert "Pricing" not in doc["text"] and "tracking" not in doc["text"] and "Copyright" not in doc["text"]
+
+
+def test_per_host_limit(server, tmp_path):
+    fetcher = _fetcher(tmp_path, max_workers=4, per_host=1)
+    docs = fetcher.fetch_many([f"{server.url}/slow?page={i}" for i in range(4)])
+    assert len(docs) == 4
+    assert server.peak == 1
+
+
+def test_stale_page_revalidated_with_etag(server, tmp_path, monkeypatch):
+    fetcher = _fetcher(tmp_path)
+    url = f"{server.url}/article"
+    first = fetcher.fetch(url)
+
+    # Fresh: served from the cache without a request
+    assert fetcher.fetch(url)["text"] == first["text"]
+    assert len(server.requests) == 1
+
+    # Stale: revalidated, and the 304 keeps the cached text
+    monkeypatch.setattr(SystemConfig, "CACHE_TTL_HOURS", 0)
+    assert fetcher.fetch(url)["text"] == first["text"]
+    assert server.requests[-1] == ("/article", '"v1"')
+
+
+def test_byte_cap(server, tmp_path):
+    doc = _fetcher(tmp_path, max_bytes=32 * 1024, max_chars=10_000_000).fetch(f"{server.url}/big")
+    assert doc["text"]
+    # Reading stops within one 16 KiB chunk of the cap
+    assert len(doc["text"]) < 48 * 1024 < len(BIG)
+
+
+def test_rejects_non_public_address(server, tmp_path):
+    fetcher = PageFetcher(cache_dir=str(tmp_path / "pages"))
+    with pytest.raises(BlockedURL):
+        fetcher.fetch(f"{server.url}/article")
+    assert server.requests == []
+
+
+def test_redirect_hops_are_checked(server, tmp_path, monkeypatch):
+    # Treat the fixture's IPv4 loopback as public, so only the hop is blocked
+    monkeypatch.setattr(enrichment, "_is_public", lambda ip: ip.version == 4)
+    fetcher = PageFetcher(cache_dir=str(tmp_path / "pages"))
+
+    doc = fetcher.fetch(f"{server.url}/redirect?to={server.url}/article")
+    assert doc["url"] == f"{server.url}/redirect?to={server.url}/article"
+    assert "Main text is extracted" in doc["text"]
+
+    with pytest.raises(BlockedURL):
+        fetcher.fetch(f"{server.url}/redirect?to=http://[::1]:{server.url.rsplit(':', 1)[1]}/article")
+    with pytest.raises(BlockedURL):
+        fetcher.fetch(f"{server.url}/redirect?to=file:///etc/passwd")
+    assert [path for path, _ in server.requests].count("/article") == 1
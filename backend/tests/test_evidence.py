@@ -0,0 +1,38 @@
+"""Per-run evidence stores: ids only resolve inside their own open run."""
+
+import pytest
+
+from core.evidence import EvidenceStore, UnknownEvidence, open_store, release, store_for
+
+ITEMS = [
+    {"title": "Rust async", "url": "https://a.example/1", "snippet": "tokio runtime"},
+    {"title": "Go channels", "url": "https://b.example/2", "snippet": "goroutines"},
+]
+
+
+def test_add_dedupes_by_url():
+    store = EvidenceStore()
+    assert store.add(ITEMS) == [0, 1]
+    assert store.add([ITEMS[1], {**ITEMS[0], "chunks": ["full text"]}]) == [1, 0]
+    assert store.get([0])[0].chunks == ("full text",)
+
+
+def test_unknown_ids_raise():
+    store = EvidenceStore()
+    store.add(ITEMS)
+    with pytest.raises(UnknownEvidence):
+        store.get([0, 5])
+
+
+def test_store_only_exists_while_run_is_open():
+    with pytest.raises(UnknownEvidence):
+        store_for("run-a")
+    store = open_store("run-a")
+    try:
+        assert store_for("run-a") is store
+        with pytest.raises(RuntimeError):
+            open_store("run-a")
+    finally:
+        release("run-a")
+    with pytest.raises(UnknownEvidence):
+        store_for("run-a")
@@ -0,0 +1,84 @@
+"""PDF export with styled (bold/italic) markdown."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fpdf")
+pytest.importorskip("markdown")
+
+from config import SystemConfig
+from utils import exporter
+
+STYLED = "# Title\n\nPlain, **bold**, *italic* and ***both***.\n\n- a **bold** item\n"
+DEJAVU = Path("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+
+def _family(directory: Path, *styles: str) -> Path:
+    regular = directory / "Body.ttf"
+    regular.write_bytes(b"")
+    for style in styles:
+        (directory / f"Body-{style}.ttf").write_bytes(b"")
+    return regular
+
+
+def test_font_family_finds_all_styles(tmp_path):
+    regular = _family(tmp_path, "Bold", "Italic", "BoldItalic")
+    family = exporter._font_family(str(regular))
+    assert family == {
+        "": str(regular),
+        "B": str(tmp_path / "Body-Bold.ttf"),
+        "I": str(tmp_path / "Body-Italic.ttf"),
+        "BI": str(tmp_path / "Body-BoldItalic.ttf"),
+    }
+
+
+def test_font_family_missing_style(tmp_path):
+    # No italic faces: italic reuses the regular file, bold italic the bold one
+    regular = _family(tmp_path, "Bold")
+    assert exporter._font_family(str(regular)) == {
+        "": str(regular),
+        "B": str(tmp_path / "Body-Bold.ttf"),
+        "I": str(regular),
+        "BI": str(tmp_path / "Body-Bold.ttf"),
+    }
+    assert exporter._font_family(str(tmp_path / "missing.ttf")) is None
+
+
+def test_render_pdf_styled_text_default_font():
+    assert exporter.render_pdf(STYLED, "Styled").startswith(b"%PDF")
+
+
+def test_render_pdf_styled_text_regular_only(tmp_path, monkeypatch):
+    # Only the regular face available: every style renders with it
+    if not DEJAVU.exists():
+        pytest.skip("DejaVu Sans not installed")
+    regular = tmp_path / "DejaVuSans.ttf"
+    shutil.copy(DEJAVU, regular)
+    monkeypatch.setattr(SystemConfig, "PDF_FONT_PATH", str(regular))
+    pdf = exporter.render_pdf(STYLED, "Styled")
+    assert pdf.startswith(b"%PDF")
+    assert b"DejaVuSans" in pdf
+
+
+def test_render_pdf_regular_and_bold_only(tmp_path, monkeypatch):
+    # The stock DejaVu install: no oblique faces, unicode text still embeds DejaVu
+    if not DEJAVU.exists():
+        pytest.skip("DejaVu Sans not installed")
+    for style in ("", "-Bold"):
+        shutil.copy(DEJAVU, tmp_path / f"DejaVuSans{style}.ttf")
+    monkeypatch.setattr(SystemConfig, "PDF_FONT_PATH", str(tmp_path / "DejaVuSans.ttf"))
+    pdf = exporter.render_pdf(STYLED + "\nUnicode: Привет, naïve ✓\n", "Styled")
+    assert pdf.startswith(b"%PDF")
+    assert b"DejaVuSans" in pdf
+    assert b"Helvetica" not in pdf
+
+
+def test_render_pdf_styled_text_full_family(tmp_path, monkeypatch):
+    if not DEJAVU.exists():
+        pytest.skip("DejaVu Sans not installed")
+    for style in ("", "-Bold", "-Oblique", "-BoldOblique"):
+        shutil.copy(DEJAVU, tmp_path / f"DejaVuSans{style}.ttf")
+    monkeypatch.setattr(SystemConfig, "PDF_FONT_PATH", str(tmp_path / "DejaVuSans.ttf"))
+    assert exporter.render_pdf(STYLED + "\nUnicode: naïve — “quotes” ✓\n", "Styled").startswith(b"%PDF")
@@ -0,0 +1,36 @@
+"""setup_logging can be called again without leaking listeners or files."""
+
+import atexit
+import logging
+
+from config import SystemConfig
+from utils import helpers
+
+
+def test_setup_logging_twice_retires_previous_listener(tmp_path, monkeypatch):
+    monkeypatch.setattr(SystemConfig, "LOG_FILE", str(tmp_path / "draftly.log"))
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    monkeypatch.setattr(atexit, "unregister", registered.remove)
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+
+    try:
+        helpers.setup_logging()
+        first = helpers._listener
+        file_handler = first.handlers[0]
+        logging.getLogger("test").info("first")
+
+        helpers.setup_logging()
+        assert helpers._listener is not first
+        assert registered == [helpers._listener.stop]
+        assert file_handler.stream is None
+        assert len(root.handlers) == 1
+        assert "first" in (tmp_path / "draftly.log").read_text(encoding="utf-8")
+    finally:
+        helpers._listener.stop()
+        for handler in helpers._listener.handlers:
+            handler.close()
+        helpers._listener = None
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
@@ -0,0 +1,42 @@
+"""Near-duplicate topic matching keeps word order and direction."""
+
+from core.local_router import LocalRouter, normalize_topic, topic_direction
+from core.topic_index import TopicIndex
+
+
+def _index(tmp_path) -> TopicIndex:
+    return TopicIndex(str(tmp_path / "topics.db"))
+
+
+def test_normalize_keeps_order():
+    assert normalize_topic("Migrating from Java to Python") != normalize_topic("Migrating from Python to Java")
+    assert topic_direction("Migrating from Java to Python") == ("from java", "to python")
+
+
+def test_reversed_topic_is_not_reused(tmp_path):
+    index = _index(tmp_path)
+    index.add("Migrating from Java to Python", "medium", "balanced", {"blog_title": "J2P"}, [], "h1")
+
+    assert index.find_similar("Migrating from Python to Java", "medium", "balanced") is None
+    match = index.find_similar("migrating from java to python", "medium", "balanced")
+    assert match and match["plan"] == {"blog_title": "J2P"}
+
+
+def test_paraphrase_still_matches(tmp_path):
+    index = _index(tmp_path)
+    index.add("Rust async runtimes", "medium", "balanced", {"blog_title": "R"}, [], "h1")
+    match = index.find_similar("async runtimes in Rust", "medium", "balanced")
+    assert match and match["score"] == 1.0
+
+
+def test_upsert_keeps_reversed_topics_apart(tmp_path):
+    index = _index(tmp_path)
+    a = index.add("Migrating from Java to Python", "medium", "balanced", None, [], "h1")
+    b = index.add("Migrating from Python to Java", "medium", "balanced", None, [], "h2")
+    assert a != b
+    assert index.add("Migrating from Java to Python", "medium", "balanced", None, [], "h3") == a
+
+
+def test_router_cache_key_is_directional():
+    router = LocalRouter.__new__(LocalRouter)
+    assert router._key("from Java to Python") != router._key("from Python to Java")